@@ -25,3 +25,9 @@ def abw_explanation(input_variables):
 
     return {"Explanation": explanation, "ABW": abw_explanation_string, "Answer": abw}
 
+
+def compute_abw(input_variables, context):
+
+    weight = context.weight(input_variables["weight"])
+    ibw = context.ibw(input_variables)
+    return round_number(ibw + 0.4 * (weight - ibw))
@@ -22,3 +22,10 @@ def compute_albumin_corrected_anion_explanation(input_parameters):
     explanation += f"Hence, the patient's albumin corrected anion gap is {final_answer} mEq/L."
 
     return {"Explanation": explanation, "Answer": final_answer}
+
+
+def compute_albumin_corrected_anion(input_parameters, context):
+
+    anion_gap_val = context.anion_gap(input_parameters)
+    albumin = context.conversion(input_parameters["albumin"][0], "albumin", None, None, input_parameters["albumin"][1], "g/dL")
+    return round_number(anion_gap_val + 2.5 * (4 - albumin))
@@ -18,3 +18,7 @@ def compute_albumin_corrected_delta_gap_explanation(input_parameters):
     explanation += f"Hence, the patient's albumin corrected delta gap is {answer} mEq/L."
 
     return {"Explanation": explanation, "Answer": answer}
+
+
+def compute_albumin_corrected_delta_gap(input_parameters, context=None):
+    return round_number(albumin_corrected_anion.compute_albumin_corrected_anion(input_parameters, context) - 12.0)
@@ -22,5 +22,10 @@ def compute_albumin_delta_ratio_explanation(input_parameters):
     explanation += f"The patient's albumin corrected delta ratio is {final_answer}."
 
     return {"Explanation": explanation, "Answer": final_answer}
- 
 
+
+def compute_albumin_delta_ratio(input_parameters, context):
+
+    albumin_corrected_delta_gap_val = albumin_corrected_delta_gap.compute_albumin_corrected_delta_gap(input_parameters, context)
+    bicarbonate_val = context.conversion(input_parameters["bicarbonate"][0], "bicarbonate", 61.02, 1, input_parameters["bicarbonate"][1], "mEq/L")
+    return round_number(albumin_corrected_delta_gap_val/(24 - bicarbonate_val))
@@ -27,3 +27,10 @@ def compute_anion_gap_explanation(input_parameters):
     return {"Explanation": explanation, "Answer": answer}
 
 
+def compute_anion_gap(input_parameters, context):
+
+    sodium = context.conversion(input_parameters["sodium"][0], "sodium", 22.99, 1, input_parameters["sodium"][1], "mEq/L")
+    chloride = context.conversion(input_parameters["chloride"][0], "chloride", 35.45, 1, input_parameters["chloride"][1], "mEq/L")
+    bicarbonate = context.conversion(input_parameters["bicarbonate"][0], "bicarbonate", 61.02, 1, input_parameters["bicarbonate"][1], "mEq/L")
+
+    return round_number(sodium - (chloride + bicarbonate))
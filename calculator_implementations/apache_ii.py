@@ -410,3 +410,225 @@ The total APACHE II score is calculated by summing the points for each criterion
     return {"Explanation": explanation, "Answer": score}
 
 
+def compute_apache_ii(input_parameters, context):
+
+    score = 0
+
+    sodium = context.conversion(input_parameters['sodium'][0], "sodium", 22.99, 1, input_parameters['sodium'][1], "mmol/L")
+    pH = input_parameters['pH']
+    heart_rate = input_parameters['heart_rate'][0]
+    respiratory_rate = input_parameters['respiratory_rate'][0]
+    potassium = context.conversion(input_parameters['potassium'][0], "potassium", 39.10, 1, input_parameters['potassium'][1], "mmol/L")
+    creatinine = context.conversion(input_parameters['creatinine'][0], "creatinine", 113.12, None, input_parameters['creatinine'][1], "mg/dL")
+    acute_renal_failure = input_parameters.get('acute_renal_failure', False)
+    chronic_renal_failure = input_parameters.get('chronic_renal_failure', False)
+    hematocrit = input_parameters['hematocrit'][0]
+    wbc = unit_converter_new.convert_to_units_per_liter(input_parameters['wbc'][0], input_parameters['wbc'][1], "L")
+    fio2 = input_parameters['fio2'][0]
+    gcs = int(input_parameters['gcs'])
+
+    age = context.age(input_parameters['age'])
+
+    if 45 <= age <= 54:
+        score += 2
+    elif 55 <= age <= 64:
+        score += 3
+    elif 65 <= age <= 74:
+        score += 5
+    elif age >= 75:
+        score += 6
+
+    if input_parameters.get('organ_failure_immunocompromise'):
+        surgery_type = input_parameters.get('surgery_type', None)
+
+        if surgery_type in ("Nonoperative", "Emergency"):
+            score += 5
+        elif surgery_type == "Elective":
+            score += 2
+
+    if fio2 >= 50:
+        a_a_gradient = input_parameters['a_a_gradient']
+
+        if a_a_gradient > 499:
+            score += 4
+        elif 350 <= a_a_gradient <= 499:
+            score += 3
+        elif 200 <= a_a_gradient <= 349:
+            score += 2
+    else:
+        partial_pressure_oxygen = input_parameters['pao2'][0]
+
+        if partial_pressure_oxygen > 70:
+            pass
+        elif 61 <= partial_pressure_oxygen <= 70:
+            score += 1
+        elif 55 <= partial_pressure_oxygen <= 60:
+            score += 3
+        else:
+            score += 4
+
+    temperature = convert_temperature.fahrenheit_to_celsius(input_parameters["temperature"][0], input_parameters["temperature"][1])
+
+    if temperature >= 41:
+        score += 4
+    elif 39 <= temperature < 41:
+        score += 3
+    elif 38.5 <= temperature < 39:
+        score += 1
+    elif 36 <= temperature < 38.5:
+        pass
+    elif 34 <= temperature < 36:
+        score += 1
+    elif 32 <= temperature < 34:
+        score += 2
+    elif 30 <= temperature < 32:
+        score += 3
+    elif temperature < 30:
+        score += 4
+
+    map_value = mean_arterial_pressure.compute_mean_arterial_pressure(input_parameters)
+
+    if map_value > 159:
+        score += 4
+    elif 129 < map_value <= 159:
+        score += 3
+    elif 109 < map_value <= 129:
+        score += 2
+    elif 69 < map_value <= 109:
+        pass
+    elif 49 < map_value <= 69:
+        score += 2
+    elif map_value <= 49:
+        score += 4
+
+    if heart_rate >= 180:
+        score += 4
+    elif 140 <= heart_rate < 180:
+        score += 3
+    elif 110 <= heart_rate < 140:
+        score += 2
+    elif 70 <= heart_rate < 110:
+        pass
+    elif 55 <= heart_rate < 70:
+        score += 2
+    elif 40 <= heart_rate < 55:
+        score += 3
+    elif heart_rate < 40:
+        score += 4
+
+    if respiratory_rate >= 50:
+        score += 4
+    elif 35 <= respiratory_rate < 50:
+        score += 3
+    elif 25 <= respiratory_rate < 35:
+        score += 1
+    elif 12 <= respiratory_rate < 25:
+        pass
+    elif 10 <= respiratory_rate < 12:
+        score += 1
+    elif 6 <= respiratory_rate < 10:
+        score += 2
+    elif respiratory_rate < 6:
+        score += 4
+
+    if pH >= 7.70:
+        score += 4
+    elif 7.60 <= pH < 7.70:
+        score += 3
+    elif 7.50 <= pH < 7.60:
+        score += 1
+    elif 7.33 <= pH < 7.50:
+        pass
+    elif 7.25 <= pH < 7.33:
+        score += 2
+    elif 7.15 <= pH < 7.25:
+        score += 3
+    elif pH < 7.15:
+        score += 4
+
+    if sodium >= 180:
+        score += 4
+    elif 160 <= sodium < 180:
+        score += 3
+    elif 155 <= sodium < 160:
+        score += 2
+    elif 150 <= sodium < 155:
+        score += 1
+    elif 130 <= sodium < 150:
+        pass
+    elif 120 <= sodium < 130:
+        score += 2
+    elif 111 <= sodium < 120:
+        score += 3
+    elif sodium < 111:
+        score += 4
+
+    if potassium >= 7.0:
+        score += 4
+    elif 6.0 <= potassium < 7.0:
+        score += 3
+    elif 5.5 <= potassium < 6.0:
+        score += 1
+    elif 3.5 <= potassium < 5.5:
+        pass
+    elif 3.0 <= potassium < 3.5:
+        score += 1
+    elif 2.5 <= potassium < 3.0:
+        score += 2
+    elif potassium < 2.5:
+        score += 4
+
+    if creatinine >= 3.5 and acute_renal_failure:
+        score += 8
+    elif 2.0 <= creatinine < 3.5 and acute_renal_failure:
+        score += 6
+    elif creatinine >= 3.5 and chronic_renal_failure:
+        score += 4
+    elif 2.0 <= creatinine < 3.5 and chronic_renal_failure:
+        score += 3
+    elif 1.5 <= creatinine < 2.0 and acute_renal_failure:
+        score += 4
+    elif 1.5 <= creatinine < 2.0 and chronic_renal_failure:
+        score += 2
+
+    if not acute_renal_failure and not chronic_renal_failure:
+        if creatinine >= 3.5:
+            score += 4
+        elif 2.0 <= creatinine < 3.5:
+            score += 3
+        elif 1.5 <= creatinine < 2.0:
+            score += 2
+        elif 0.6 <= creatinine < 1.5:
+            pass
+        elif creatinine < 0.6:
+            score += 2
+
+    if hematocrit >= 60:
+        score += 4
+    elif 50 <= hematocrit < 60:
+        score += 2
+    elif 46 <= hematocrit < 50:
+        score += 1
+    elif 30 <= hematocrit < 46:
+        pass
+    elif 20 <= hematocrit < 30:
+        score += 2
+    elif hematocrit < 20:
+        score += 4
+
+    if wbc >= 40e9:
+        score += 4
+    elif 20e9 <= wbc < 40e9:
+        score += 2
+    elif 15e9 <= wbc < 20e9:
+        score += 1
+    elif 3e9 <= wbc < 15e9:
+        pass
+    elif 1e9 <= wbc < 3e9:
+        score += 2
+    elif wbc < 1e9:
+        score += 4
+
+    score += int(15 - gcs)
+
+    return score
@@ -0,0 +1,57 @@
+import numpy as np
+
+# Helpers for the compute_batch functions. A batch is a pandas DataFrame or a dict of equal-length arrays
+# with one column per python parameter name (e.g. "heart_rate"). The unit of a measured parameter is read
+# from an optional "<name>_unit" column, which may also be a single string shared by every row.
+
+
+def column_values(columns, name):
+    return np.asarray(columns[name], dtype=float)
+
+
+def column_units(columns, name, default_unit):
+
+    unit_column = name + "_unit"
+
+    if unit_column not in columns:
+        return default_unit
+
+    units = columns[unit_column]
+
+    if isinstance(units, str):
+        return units
+
+    return np.asarray(units, dtype=object)
+
+
+def column_strings(columns, name, length, default=None):
+
+    if name not in columns:
+        return np.full(length, default, dtype=object)
+
+    return np.asarray(columns[name], dtype=object)
+
+
+def convert_by_unit(values, units, convert):
+    """
+    Calls convert(values, unit) once for each distinct unit, passing the rows that use that unit.
+    The conversion helpers only branch on the unit, so they run unchanged on arrays of values.
+    Rows whose unit is missing, or that the conversion does not handle, come back as NaN.
+    """
+
+    if isinstance(units, str):
+        units = np.full(values.shape, units, dtype=object)
+
+    result = np.full(values.shape, np.nan)
+
+    for unit in set(units):
+        if not isinstance(unit, str):
+            continue
+
+        rows = units == unit
+        converted = convert(values[rows], unit)
+
+        if converted is not None:
+            result[rows] = converted
+
+    return result
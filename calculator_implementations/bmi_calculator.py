@@ -1,6 +1,8 @@
 import height_conversion
 import weight_conversion
 from rounding import round_number
+import numpy as np
+import batch_columns
 
 
 def bmi_calculator_explanation(input_variables):
@@ -16,4 +18,20 @@ def bmi_calculator_explanation(input_variables):
     output += f"The patient's bmi is therefore {weight} kg / ({height} m * {height} m) = {result} kg/m^2."
 
     return {"Explanation": output, "Answer": result}
-    
+
+
+def compute_bmi(input_variables, context):
+
+    height = height_conversion.height_conversion(input_variables["height"])
+    weight = context.weight(input_variables["weight"])
+    return round_number(weight/(height * height))
+
+
+def compute_batch(columns):
+    height = batch_columns.convert_by_unit(batch_columns.column_values(columns, "height"), batch_columns.column_units(columns, "height", "m"),
+                                           lambda value, unit: height_conversion.height_conversion([value, unit]))
+    weight = batch_columns.convert_by_unit(batch_columns.column_values(columns, "weight"), batch_columns.column_units(columns, "weight", "kg"),
+                                           lambda value, unit: weight_conversion.weight_conversion([value, unit]))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return round_number(weight/(height * height))
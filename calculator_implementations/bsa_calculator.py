@@ -18,3 +18,9 @@ def bsa_calculator_explaination(input_variables):
 
     return {"Explanation": output, "Answer": answer}
 
+
+def compute_bsa(input_variables, context):
+
+    height = height_conversion.height_conversion_cm(input_variables["height"])
+    weight = context.weight(input_variables["weight"])
+    return round_number(math.sqrt(weight * height/3600))
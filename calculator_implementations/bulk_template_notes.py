@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import steroid_conversion_calculator
+import height_conversion
+from rounding import round_number
+from calculator_registry import CalculatorRegistry
+from patient_context import PatientContext
+
+# the Parquet input parameters use the Relevant Entities layout of evaluation/dataset_io.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "evaluation"))
+
+from dataset_io import encode_entities, ENTITIES_TYPE
+
+# Bulk version of the template notes of synthesize_patient_note.py. Parameters for a whole shard of notes are
+# drawn at once from a NumPy generator seeded by (seed, calculator ID, shard number), so every shard is
+# reproducible on its own and the output does not depend on the number of workers. Notes are streamed to
+# JSONL or Parquet in shard order with their ground truth attached.
+
+STEROID_NAMES = ['Betamethasone IV', 'Cortisone PO', 'Dexamethasone IV', 'Dexamethasone PO', 'Hydrocortisone IV', 'Hydrocortisone PO',
+                 'MethylPrednisoLONE IV', 'MethylPrednisoLONE PO', 'PredniSONE PO', 'PrednisoLONE PO', 'Triamcinolone IV']
+
+MME_DRUGS = ["Codeine", "FentaNYL buccal", "HYDROcodone", "HYDROmorphone", "Methadone", "Morphine",
+             "OxyCODONE", "OxyMORphone", "Tapentadol", "TraMADol"]
+
+HEIGHT_UNITS = ["cm", "m", "in"]
+
+# February always has 28 days, as in synthesize_patient_note.random_date
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+RECORD_COLUMNS = ["Calculator ID", "Calculator Name", "Note ID", "Note Type", "Patient Note", "Input Parameters", "Ground Truth Answer", "Ground Truth Explanation"]
+
+PARQUET_SCHEMA = pa.schema([
+    ("Calculator ID", pa.string()), ("Calculator Name", pa.string()), ("Note ID", pa.string()), ("Note Type", pa.string()),
+    ("Patient Note", pa.string()), ("Input Parameters", ENTITIES_TYPE), ("Ground Truth Answer", pa.string()), ("Ground Truth Explanation", pa.string())
+])
+
+
+def sample_dates(rng, n):
+    month = rng.integers(1, 13, n)
+    year = rng.integers(2000, 2025, n)
+    day = rng.integers(1, DAYS_IN_MONTH[month - 1] + 1)
+
+    dates = (year - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (month - 1).astype("timedelta64[M]")
+    return dates.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+
+
+def format_dates(dates):
+    # datetime64 -> "MM/DD/YYYY"
+    return [f"{date[5:7]}/{date[8:10]}/{date[:4]}" for date in dates.astype(str)]
+
+
+def sample_qt_interval(rng, n):
+    heart_rates = np.round(rng.uniform(45, 180, n)).astype(int).tolist()
+    qt_intervals = np.round(rng.uniform(200, 500, n)).astype(int).tolist()
+
+    notes = [f"A patient has a heart rate of {heart_rate} bpm and a QT interval of {qt_interval} msec." for heart_rate, qt_interval in zip(heart_rates, qt_intervals)]
+    parameters = [{"heart_rate": [heart_rate, "beats per minute"], "qt_interval": [qt_interval, "msec"]} for heart_rate, qt_interval in zip(heart_rates, qt_intervals)]
+
+    return notes, parameters
+
+
+def sample_due_date(rng, n):
+    cycle_lengths = rng.integers(20, 31, n).tolist()
+    dates = format_dates(sample_dates(rng, n))
+
+    notes = [f"The patient's last menstrual period was on {date}. Her cycle length is {cycle_length} days." for date, cycle_length in zip(dates, cycle_lengths)]
+    parameters = [{"cycle_length": cycle_length, "menstrual_date": date} for date, cycle_length in zip(dates, cycle_lengths)]
+
+    return notes, parameters
+
+
+def sample_conception_date(rng, n):
+    dates = format_dates(sample_dates(rng, n))
+
+    notes = [f"The patient's last menstrual period was on {date}." for date in dates]
+    parameters = [{"menstrual_date": date} for date in dates]
+
+    return notes, parameters
+
+
+def sample_gestational_age(rng, n):
+    menstrual_dates = sample_dates(rng, n)
+    offsets = rng.integers(0, 38, n) * 7 + rng.integers(0, 7, n)
+
+    dates = format_dates(menstrual_dates)
+    current_dates = format_dates(menstrual_dates + offsets.astype("timedelta64[D]"))
+
+    notes = [f"The patient's last menstrual period was on {date}. Today's date is {current_date}." for date, current_date in zip(dates, current_dates)]
+    parameters = [{"current_date": current_date, "menstrual_date": date} for date, current_date in zip(dates, current_dates)]
+
+    return notes, parameters
+
+
+def sample_steroid_conversion(rng, n):
+    first = rng.integers(0, len(STEROID_NAMES), n)
+    # a different steroid as the target
+    second = (first + rng.integers(1, len(STEROID_NAMES), n)) % len(STEROID_NAMES)
+    values = np.round(rng.uniform(0.6, 9, n), 2).tolist()
+
+    notes, parameters = [], []
+
+    for value, input_index, target_index in zip(values, first.tolist(), second.tolist()):
+        input_steroid = STEROID_NAMES[input_index]
+        amount = round_number(steroid_conversion_calculator.compute_steroid_conversion({"input steroid": ['Betamethasone IV', value, "mg"], "target steroid": input_steroid}, PatientContext()))
+
+        notes.append(f"A patient has taken {amount} mg of {input_steroid}. ")
+        parameters.append({"input steroid": [input_steroid, round_number(amount), "mg"], "target steroid": STEROID_NAMES[target_index]})
+
+    return notes, parameters
+
+
+def sample_target_weight(rng, n):
+    heights = np.round(rng.uniform(1.4, 2.0, n), 2).tolist()
+    units = rng.integers(0, len(HEIGHT_UNITS), n).tolist()
+    bmis = np.round(rng.uniform(18, 25, n), 1).tolist()
+
+    notes, parameters = [], []
+
+    for height, unit_index, bmi in zip(heights, units, bmis):
+        height_unit = HEIGHT_UNITS[unit_index]
+
+        if height_unit == "in":
+            height_value = round(height_conversion.height_conversion_in([height, "m"]))
+        elif height_unit == "cm":
+            height_value = round(height_conversion.height_conversion_cm([height, "m"]))
+        else:
+            height_value = round(height_conversion.height_conversion([height, "m"]), 2)
+
+        notes.append(f"Patient has a height of {height_value} {height_unit} and their target BMI is {bmi} kg/m^2.")
+        parameters.append({"body_mass_index": [bmi, "kg/m^2"], "height": [height_value, height_unit]})
+
+    return notes, parameters
+
+
+def mme_note(drugs, amounts, doses):
+    # note text and parameters for the given drugs, worded as in synthesize_patient_note.mme_conversion
+    note = "A patient takes "
+    input_parameters = {}
+    num_instances = len(drugs)
+
+    for i, (drug, num_amount, num_doses) in enumerate(zip(drugs, amounts, doses)):
+        input_parameters[drug + " Dose"] = [num_amount, "µg" if drug == "FentaNYL buccal" else "mg"]
+        input_parameters[drug + " Dose Per Day"] = [num_doses, "per day"]
+
+        add_s = '' if num_doses == 1 else 's'
+
+        if num_instances in (2, 3) and i == num_instances - 1:
+            note += f"and {num_amount} mg of {drug} {num_doses} time{add_s} a day."
+        elif num_instances == 1:
+            note += f"{num_amount} mg of {drug} {num_doses} time{add_s} a day. "
+        elif num_instances == 3:
+            note += f"{num_amount} mg of {drug} {num_doses} time{add_s} a day, "
+        else:
+            note += f"{num_amount} mg of {drug} {num_doses} time{add_s} a day "
+
+    return note, input_parameters
+
+
+def sample_mme(rng, n):
+    counts = rng.integers(1, 4, n).tolist()
+    # the first three of a random permutation of the drugs: up to three different drugs per note
+    drugs = np.argsort(rng.random((n, len(MME_DRUGS))), axis=1)[:, :3].tolist()
+    doses = rng.integers(1, 4, (n, 3)).tolist()
+    amounts = (rng.integers(1, 4, (n, 3)) * 10).tolist()
+
+    notes, parameters = [], []
+
+    for count, drug_indices, row_doses, row_amounts in zip(counts, drugs, doses, amounts):
+        note, input_parameters = mme_note([MME_DRUGS[index] for index in drug_indices[:count]], row_amounts[:count], row_doses[:count])
+        notes.append(note)
+        parameters.append(input_parameters)
+
+    return notes, parameters
+
+
+SAMPLERS = {
+    "11": sample_qt_interval,
+    "13": sample_due_date,
+    "24": sample_steroid_conversion,
+    "49": sample_mme,
+    "56": sample_qt_interval,
+    "57": sample_qt_interval,
+    "58": sample_qt_interval,
+    "59": sample_qt_interval,
+    "61": sample_target_weight,
+    "68": sample_conception_date,
+    "69": sample_gestational_age
+}
+
+# set in each worker by init_worker
+REGISTRY = None
+
+
+def init_worker():
+    global REGISTRY
+    REGISTRY = CalculatorRegistry()
+
+    for calculator_id in SAMPLERS:
+        REGISTRY.load_module(calculator_id)
+
+
+def shard_rng(seed, calculator_id, shard_number):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(int(calculator_id), shard_number)))
+
+
+def generate_shard(task):
+    """
+    Generates the notes of one (calculator ID, shard number, first index, size, seed, explanations) shard
+    and returns them as records with their ground truth answer and, unless explanations is False, their
+    explanation.
+    """
+    calculator_id, shard_number, start, size, seed, explanations = task
+
+    notes, parameters = SAMPLERS[calculator_id](shard_rng(seed, calculator_id, shard_number), size)
+    calculator_name = REGISTRY.info(calculator_id)["calculator name"]
+
+    # the template calculators leave their input parameters unchanged, so they are passed without a copy
+    if explanations:
+        results = [REGISTRY.run(calculator_id, input_parameters) for input_parameters in parameters]
+        answers = [result["Answer"] for result in results]
+        explanation_texts = [result["Explanation"] for result in results]
+    else:
+        answers = [REGISTRY.compute(calculator_id, input_parameters) for input_parameters in parameters]
+        explanation_texts = [None] * size
+
+    return [
+        {
+            "Calculator ID": calculator_id,
+            "Calculator Name": calculator_name,
+            "Note ID": f"template_{calculator_id}_{start + offset + 1}",
+            "Note Type": "Template",
+            "Patient Note": note,
+            "Input Parameters": input_parameters,
+            "Ground Truth Answer": str(answer),
+            "Ground Truth Explanation": explanation
+        }
+        for offset, (note, input_parameters, answer, explanation) in enumerate(zip(notes, parameters, answers, explanation_texts))
+    ]
+
+
+def make_shards(calculator_ids, notes_per_calculator, shard_size, seed, explanations):
+    for calculator_id in calculator_ids:
+        for shard_number, start in enumerate(range(0, notes_per_calculator, shard_size)):
+            yield calculator_id, shard_number, start, min(shard_size, notes_per_calculator - start), seed, explanations
+
+
+class JsonlWriter:
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+
+    def write(self, records):
+        for record in records:
+            self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    # one row group per shard; Input Parameters are stored as a map of parameter name to JSON-encoded value
+
+    def __init__(self, path):
+        self.writer = pq.ParquetWriter(path, PARQUET_SCHEMA)
+
+    def write(self, records):
+        columns = {column: [record[column] for record in records] for column in RECORD_COLUMNS}
+        columns["Input Parameters"] = [encode_entities(input_parameters) for input_parameters in columns["Input Parameters"]]
+        self.writer.write_table(pa.Table.from_pydict(columns, schema=PARQUET_SCHEMA))
+
+    def close(self):
+        self.writer.close()
+
+
+def generate_template_notes(output_path, notes_per_calculator, calculator_ids=None, seed=0, workers=1, shard_size=10000, explanations=True):
+    """
+    Writes notes_per_calculator template notes for each calculator (all of SAMPLERS by default) to
+    output_path, as Parquet if it ends in .parquet and JSONL otherwise. The same seed and shard_size give
+    the same file for any number of workers. Returns the number of notes written.
+    """
+    calculator_ids = [str(calculator_id) for calculator_id in (calculator_ids or SAMPLERS)]
+    shards = make_shards(calculator_ids, notes_per_calculator, shard_size, seed, explanations)
+    writer = ParquetWriter(output_path) if output_path.endswith(".parquet") else JsonlWriter(output_path)
+    written = 0
+
+    try:
+        if workers == 1:
+            init_worker()
+            for shard in shards:
+                records = generate_shard(shard)
+                writer.write(records)
+                written += len(records)
+        else:
+            # imap keeps the shard order while only a few shards per worker are held in memory
+            with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+                for records in pool.imap(generate_shard, shards):
+                    writer.write(records)
+                    written += len(records)
+    finally:
+        writer.close()
+
+    return written
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Generate template patient notes with their ground truth in bulk')
+    parser.add_argument('--output', type=str, default="template_notes.parquet", help='Output file; .parquet for Parquet, anything else for JSONL.')
+    parser.add_argument('--n', type=int, default=1000, help='Number of notes per calculator.')
+    parser.add_argument('--calculators', type=str, nargs='+', default=None, help=f'Calculator IDs to generate notes for. Defaults to all template calculators: {", ".join(SAMPLERS)}.')
+    parser.add_argument('--seed', type=int, default=0, help='Root seed; each (calculator, shard) gets its own stream derived from it.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes.')
+    parser.add_argument('--shard_size', type=int, default=10000, help='Notes per shard. Changing it changes the notes generated for a seed.')
+    parser.add_argument('--no_explanations', action='store_true', help='Only attach the ground truth answer, without building the explanations.')
+
+    args = parser.parse_args()
+
+    written = generate_template_notes(args.output, args.n, args.calculators, args.seed, args.workers, args.shard_size, not args.no_explanations)
+    print(f"wrote {written} notes to {args.output}")
@@ -35,4 +35,15 @@ def calculate_corrected_calcium_explanation(params):
 
     return {"Explanation": output, "Answer": corrected_calcium}
 
-   
+
+def compute_corrected_calcium(params, context):
+
+    normal_albumin = 4.0
+
+    albumin = params.get('albumin')
+    calcium = params.get('calcium')
+
+    albumin = context.conversion(albumin[0], "albmumin", 66500, None, albumin[1], "g/dL")
+    calcium = context.conversion(calcium[0], "calcium", 40.08, 2, calcium[1], "mg/dL")
+
+    return round_number(0.8 * (normal_albumin - albumin) + calcium)
@@ -0,0 +1,175 @@
+import importlib.util
+import json
+import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Calculator modules import their helpers by bare name (e.g. `import unit_converter_new`).
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import patient_context
+from dependency_hashes import DependencyHasher
+
+
+class CalculatorRegistry:
+    """
+    Maps calculator IDs to their explanation and compute functions. Built once from name_to_python.json;
+    each calculator module is imported the first time it is needed and reused afterwards.
+    """
+
+    def __init__(self, calc_info_path=os.path.join(SCRIPT_DIR, "name_to_python.json")):
+        with open(calc_info_path) as file:
+            self.calc_info = json.load(file)
+
+        self._modules = {}
+        self._functions = {}
+        self._compute_functions = {}
+        self.hasher = DependencyHasher(SCRIPT_DIR)
+
+    def __contains__(self, calculator_id):
+        return str(calculator_id) in self.calc_info
+
+    def calculator_ids(self):
+        return list(self.calc_info.keys())
+
+    def info(self, calculator_id):
+        return self.calc_info[str(calculator_id)]
+
+    def module_path(self, calculator_id):
+        file_path = self.info(calculator_id)["file path"]
+
+        if not os.path.isabs(file_path):
+            return os.path.join(SCRIPT_DIR, file_path)
+
+        return file_path
+
+    def load_module(self, calculator_id):
+        file_path = self.info(calculator_id)["file path"]
+
+        if file_path not in self._modules:
+            full_path = self.module_path(calculator_id)
+
+            file_name = os.path.splitext(os.path.basename(full_path))[0]
+
+            spec = importlib.util.spec_from_file_location(file_name, full_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+
+            self._modules[file_path] = module
+
+        return self._modules[file_path]
+
+    def source_files(self, calculator_id):
+        """
+        The calculator's module and every helper module its explanation function uses (transitively), i.e.
+        the files its answers and explanations depend on.
+        """
+
+        return self.hasher.function_closure(self.module_path(calculator_id), self.info(calculator_id)["explanation function"])
+
+    def source_hash(self, calculator_id):
+        # hash of source_files together with the calculator's name_to_python.json entry
+
+        return self.hasher.files_hash(self.source_files(calculator_id), json.dumps(self.info(calculator_id), sort_keys=True))
+
+    def get(self, calculator_id):
+        calculator_id = str(calculator_id)
+
+        if calculator_id not in self._functions:
+            module = self.load_module(calculator_id)
+            self._functions[calculator_id] = getattr(module, self.info(calculator_id)["explanation function"])
+
+        return self._functions[calculator_id]
+
+    def get_compute(self, calculator_id):
+        calculator_id = str(calculator_id)
+
+        if calculator_id not in self._compute_functions:
+            module = self.load_module(calculator_id)
+            self._compute_functions[calculator_id] = getattr(module, self.info(calculator_id)["compute function"])
+
+        return self._compute_functions[calculator_id]
+
+    def input_parameters(self, calculator_id, relevant_entities):
+        """
+        Maps the dataset's Relevant Entities to the python parameter names the calculator expects.
+        "True"/"False" strings are converted to booleans in place, as the datasets store them either way.
+        """
+
+        if int(calculator_id) == 49:
+            return relevant_entities
+
+        calc_map = self.info(calculator_id)
+        input_parameters = {}
+
+        for entity in relevant_entities:
+            if relevant_entities[entity] == "False":
+                relevant_entities[entity] = False
+            elif relevant_entities[entity] == "True":
+                relevant_entities[entity] = True
+
+            input_parameters[calc_map[entity]] = relevant_entities[entity]
+
+        return input_parameters
+
+    def run(self, calculator_id, input_parameters):
+        return self.get(calculator_id)(input_parameters)
+
+    def compute(self, calculator_id, input_parameters, context=None):
+        """
+        Returns only the answer, without building the explanation. Gives the same value as
+        run(...)["Answer"] and does not modify input_parameters. A PatientContext can be passed to
+        share intermediate results with other calculators run on the same patient; otherwise each call
+        gets its own.
+        """
+
+        if context is None:
+            context = patient_context.PatientContext()
+
+        return self.get_compute(calculator_id)(input_parameters, context)
+
+    def required_parameters(self, calculator_id):
+        """
+        The parameters the calculator cannot be run without, from the "required parameters" list of its
+        name_to_python.json entry. Scoring criteria that default to absent, and inputs only some branches
+        read, are not listed.
+        """
+
+        return self.info(calculator_id)["required parameters"]
+
+    def compute_panel(self, input_parameters, calculator_ids=None):
+        """
+        Runs every calculator (or the given ones) on one patient's parameters with a shared PatientContext.
+        Calculators that are missing one of their required parameters are left out of the result, as are
+        those that look up a parameter the patient does not have (e.g. one only some branches need). Any
+        other error is raised.
+        """
+
+        context = patient_context.PatientContext()
+        answers = {}
+
+        for calculator_id in calculator_ids or self.calculator_ids():
+            if any(name not in input_parameters for name in self.required_parameters(calculator_id)):
+                continue
+
+            try:
+                answers[str(calculator_id)] = self.compute(calculator_id, input_parameters, context)
+            except KeyError as e:
+                if e.args and e.args[0] not in input_parameters:
+                    continue
+                raise
+
+        return answers
+
+    def has_batch(self, calculator_id):
+        return hasattr(self.load_module(calculator_id), "compute_batch")
+
+    def compute_batch(self, calculator_id, columns):
+        """
+        Computes the answers for a whole batch of patients at once (see batch_columns.py for the column layout).
+        Only the equation-based calculators that define compute_batch support this; check has_batch first.
+        """
+
+        return self.load_module(calculator_id).compute_batch(columns)
@@ -116,6 +116,34 @@ The total Caprini Score is calculated by summing the points for each criterion.
     return {"Explanation": explanation, "Answer": score}
 
 
+def compute_caprini_score(input_parameters, context):
 
+    score = 0
+
+    # caprini_score_explanation reports the patient's sex, so without it both paths fail
+    input_parameters["sex"]
+
+    age = context.age(input_parameters["age"])
+
+    if 41 <= age <= 60:
+        score += 1
+    elif 61 <= age <= 74:
+        score += 2
+    elif age >= 75:
+        score += 3
 
+    for param in param_full_name:
+
+        if param not in input_parameters:
+            continue
+        elif param == "mobility":
+            score += mobility[input_parameters[param]]
+        elif param == "surgery_type":
+            score += surgery_type[input_parameters[param]]
+        elif param == "bmi":
+            if input_parameters["bmi"][0] > 25:
+                score += 1
+        elif input_parameters[param]:
+            score += param_full_name[param][1]
 
+    return score
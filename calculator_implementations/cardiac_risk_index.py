@@ -64,3 +64,22 @@ The total score is calculated by summing the points for each criterion.
 
     return {"Explanation": output, "Answer": cri}
 
+
+def compute_cardiac_index(input_variables, context):
+
+    cri = 0
+
+    for param_name in ['elevated_risk_surgery', 'ischemetic_heart_disease', 'congestive_heart_failure',
+                       'cerebrovascular_disease', 'pre_operative_insulin_treatment']:
+        if input_variables.get(param_name):
+            cri += 1
+
+    creatinine = input_variables.get('pre_operative_creatinine')
+
+    if creatinine is not None:
+        creatinine = context.conversion(creatinine[0], "Pre-Operative Creatinine", 113.12, None, creatinine[1], "mg/dL")
+
+        if creatinine > 2:
+            cri += 1
+
+    return cri
@@ -154,3 +154,52 @@ The total score is calculated by summing the points for each criterion.
 
     return {"Explanation": explanation, "Answer": cci}
 
+
+def compute_cci(input_parameters, context):
+
+    one_point_params = ["mi", "chf", "peripheral_vascular_disease", "connective_tissue_disease", "dementia", "copd", "peptic_ucler_disease"]
+    two_point_params = ["hemiplegia", "moderate_to_severe_ckd", "leukemia", "lymphoma"]
+
+    # Graded conditions; any other truthy value falls back to a single point.
+    graded_params = {"solid_tumor": {"none": 0, "localized": 2, "metastatic": 6},
+                     "liver_disease": {"none": 0, "mild": 1, "moderate to severe": 3},
+                     "diabetes_mellitus": {"none or diet-controlled": 0, "uncomplicated": 1, "end-organ damage": 2}}
+
+    age = context.age(input_parameters["age"])
+    cci = 0
+
+    # same bands, checked in the same order, as cci_explanation
+    if age < 50:
+        pass
+    elif 49 < age < 60:
+        cci += 1
+    elif 59 < age < 70:
+        cci += 2
+    elif 69 < age < 80:
+        cci += 3
+    elif age >= 80:
+        cci += 4
+
+    for parameter in one_point_params:
+        if input_parameters.get(parameter):
+            cci += 1
+
+    if input_parameters.get("cva") or input_parameters.get("tia"):
+        cci += 1
+
+    for parameter, options in graded_params.items():
+        value = input_parameters.get(parameter)
+
+        if isinstance(value, str) and value in options:
+            cci += options[value]
+        elif value:
+            cci += 1
+
+    for parameter in two_point_params:
+        if input_parameters.get(parameter):
+            cci += 2
+
+    if input_parameters.get("aids"):
+        cci += 6
+
+    return cci
@@ -66,3 +66,31 @@ The Centor score is calculated by summing the points for each criterion.
     explanation += f"Hence, the Centor score for the patient is {centor_score}."
 
     return {"Explanation": explanation, "Answer": centor_score}
+
+
+def compute_centor_score(input_variables, context):
+
+    centor_score = 0
+
+    age = context.age(input_variables["age"])
+
+    if 3 <= age <= 14:
+        centor_score += 1
+    elif age >= 45:
+        centor_score -= 1
+
+    temp_val = convert_temperature.fahrenheit_to_celsius(input_variables["temperature"][0], input_variables["temperature"][1])
+
+    if temp_val > 38:
+        centor_score += 1
+
+    if input_variables.get("cough_absent", True):
+        centor_score += 1
+
+    if input_variables.get("tender_lymph_nodes"):
+        centor_score += 1
+
+    if input_variables.get("exudate_swelling_tonsils"):
+        centor_score += 1
+
+    return centor_score
@@ -133,3 +133,34 @@ The CHA2DS2-VASc score is calculated by summing the points for each criterion.
 
     return {"Explanation": output, "Answer": score}
 
+
+def compute_cha2ds2_vasc(params, context):
+
+    score = 0
+
+    age = context.age(params['age'])
+
+    if age >= 75:
+        score += 2
+    elif age >= 65:
+        score += 1
+
+    if params['sex'].lower() == 'female':
+        score += 1
+
+    if params.get('chf', False):
+        score += 1
+
+    if params.get('hypertension', False):
+        score += 1
+
+    if params.get('stroke', False) or params.get('tia', False) or params.get('thromboembolism', False):
+        score += 2
+
+    if params.get('vascular_disease', False):
+        score += 1
+
+    if params.get('diabetes', False):
+        score += 1
+
+    return score
@@ -0,0 +1,144 @@
+import os
+import sys
+import copy
+import argparse
+from calculator_registry import CalculatorRegistry
+
+# the dataset is read with evaluation/dataset_io.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "evaluation"))
+
+from dataset_io import load_dataset
+
+# Checks that the value-only compute path gives the same answer as the explanation path
+# (run(...)["Answer"]) on every row of a dataset, on each row with one of its parameters left out, and on inputs
+# where the two are easy to get out of step, such as the edges of scoring bands; and that compute_panel runs on
+# every patient of the dataset. Exits with a non-zero status if any check fails.
+
+# (calculator ID, input parameters) pairs at the edges of the bands a score is built from
+EDGE_CASES = [("32", {"age": [age, "years"]}) for age in [49, 49.2, 49.8, 50, 59, 59.5, 60, 69, 69.5, 70, 79, 79.5, 80]]
+
+
+def check_edge_cases(registry, cases=EDGE_CASES):
+    # returns a description of every case where compute and run disagree
+    failures = []
+
+    for calculator_id, input_parameters in cases:
+        # run may fill in defaults for missing criteria, so it gets its own copy
+        answer = registry.run(calculator_id, copy.deepcopy(input_parameters))["Answer"]
+        computed = registry.compute(calculator_id, input_parameters)
+
+        if computed != answer:
+            failures.append(f"calculator {calculator_id} on {input_parameters}: compute gave {computed}, run gave {answer}")
+
+    return failures
+
+
+def outcome(function, input_parameters):
+    # the answer, or the class of the exception raised; each call gets its own copy as run may fill in defaults
+    try:
+        return function(copy.deepcopy(input_parameters))
+    except Exception as e:
+        return type(e)
+
+
+def raised(result):
+    return isinstance(result, type) and issubclass(result, Exception)
+
+
+def describe(result):
+    return result.__name__ if raised(result) else result
+
+
+def check_rows(registry, dataset):
+    """
+    For every row of the dataset, compute must give the same answer as run, both on the row's parameters and
+    with each parameter left out in turn. Where run fails, compute must fail with the same exception type,
+    and run must fail without any of the calculator's "required parameters".
+    Returns the failures and the number of comparisons made.
+    """
+    failures = []
+    compared = 0
+
+    for row in load_dataset(dataset, columns=["Row Number", "Calculator ID", "Relevant Entities"]).to_dict("records"):
+        calculator_id = str(row["Calculator ID"])
+        input_parameters = registry.input_parameters(calculator_id, row["Relevant Entities"])
+
+        for left_out in [None] + list(input_parameters):
+            parameters = {key: value for key, value in input_parameters.items() if key != left_out}
+
+            answer = outcome(lambda params: registry.run(calculator_id, params)["Answer"], parameters)
+            computed = outcome(lambda params: registry.compute(calculator_id, params), parameters)
+            compared += 1
+
+            if computed != answer:
+                without = f" without {left_out}" if left_out is not None else ""
+                failures.append(f"row {row['Row Number']}{without}: compute gave {describe(computed)} for calculator {calculator_id}, run gave {describe(answer)}")
+
+            if left_out in registry.required_parameters(calculator_id) and not raised(answer):
+                failures.append(f"row {row['Row Number']}: calculator {calculator_id} lists {left_out} as required but runs without it")
+
+    return failures, compared
+
+
+def check_panels(registry, dataset):
+    """
+    For each row of the dataset, compute_panel on the row's parameters must include the row's calculator with
+    the same answer as run. With one of its required parameters removed, the panel must leave it out but keep
+    every other calculator that does not take that parameter.
+    """
+    failures = []
+
+    for row in load_dataset(dataset, columns=["Row Number", "Calculator ID", "Relevant Entities"]).to_dict("records"):
+        calculator_id = str(row["Calculator ID"])
+        input_parameters = registry.input_parameters(calculator_id, row["Relevant Entities"])
+
+        try:
+            panel = registry.compute_panel(input_parameters)
+        except Exception as e:
+            failures.append(f"row {row['Row Number']}: compute_panel raised {type(e).__name__}: {e}")
+            continue
+
+        answer = registry.run(calculator_id, copy.deepcopy(input_parameters))["Answer"]
+
+        if panel.get(calculator_id) != answer:
+            failures.append(f"row {row['Row Number']}: panel gave {panel.get(calculator_id)} for calculator {calculator_id}, run gave {answer}")
+
+        for name in registry.required_parameters(calculator_id)[:1]:
+            partial = {key: value for key, value in input_parameters.items() if key != name}
+            partial_panel = registry.compute_panel(partial)
+
+            if calculator_id in partial_panel:
+                failures.append(f"row {row['Row Number']}: calculator {calculator_id} is in the panel without {name}")
+            for other in panel:
+                if name not in registry.info(other).values() and other not in partial_panel:
+                    failures.append(f"row {row['Row Number']}: calculator {other} does not take {name} but is missing from the panel without it")
+
+    return failures
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Check that the value-only compute path agrees with the explanation path')
+    parser.add_argument('--dataset', type=str, default="datasets/one_shot_data.csv", help='Dataset whose rows compute is checked against run on, and whose patients compute_panel is checked on.')
+
+    args = parser.parse_args()
+
+    registry = CalculatorRegistry()
+    failures = check_edge_cases(registry)
+
+    print(f"{len(failures)} of {len(EDGE_CASES)} edge cases failed")
+
+    row_failures, compared = check_rows(registry, args.dataset)
+    print(f"{len(row_failures)} of {compared} row comparisons failed on {args.dataset}")
+
+    failures += row_failures
+
+    panel_failures = check_panels(registry, args.dataset)
+    print(f"{len(panel_failures)} panel checks failed on {args.dataset}")
+
+    failures += panel_failures
+
+    for failure in failures:
+        print(failure)
+
+    sys.exit(1 if failures else 0)
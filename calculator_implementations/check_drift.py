@@ -0,0 +1,174 @@
+import os
+import sys
+import copy
+import json
+import math
+import argparse
+import multiprocessing
+import numpy as np
+# generate_csv also puts evaluation/ (dataset_io) on the path
+import generate_csv
+from generate_csv import init_worker, ground_truth, DECIMAL_CATEGORIES
+from dataset_io import load_dataset
+
+# Recomputes the ground truth of every row of one or more dataset CSVs with the value-only compute path
+# (compute_batch where a calculator has it) and reports, per calculator, the rows whose stored answer no
+# longer matches, whose recomputed answer falls outside the stored limits, or whose explanation changed.
+
+CHECK_COLUMNS = ["Row Number", "Calculator ID", "Calculator Name", "Category", "Note ID", "Relevant Entities",
+                 "Ground Truth Answer", "Lower Limit", "Upper Limit", "Ground Truth Explanation"]
+
+
+def batch_input_columns(parameters):
+    # compute_batch columns (see batch_columns.py) from per-row input parameters; [value, unit] pairs are split into <name> and <name>_unit
+    columns = {}
+
+    for name in sorted(set().union(*parameters)):
+        values = [row.get(name) for row in parameters]
+
+        if any(isinstance(value, list) for value in values):
+            columns[name] = [value[0] if isinstance(value, list) else np.nan for value in values]
+            columns[name + "_unit"] = np.array([value[1] if isinstance(value, list) and len(value) > 1 else None for value in values], dtype=object)
+        else:
+            columns[name] = values
+
+    return columns
+
+
+def compute_answers(registry, calculator_id, parameters):
+    """
+    Answers of one calculator for a list of input parameters, with the exception in place of an answer
+    that could not be computed. Batched when the calculator supports it; rows the batch cannot handle
+    (NaN) are computed one at a time.
+    """
+    answers = [None] * len(parameters)
+
+    if registry.has_batch(calculator_id):
+        try:
+            with np.errstate(all="ignore"):
+                answers = list(registry.compute_batch(calculator_id, batch_input_columns(parameters)))
+        except Exception:
+            answers = [None] * len(parameters)
+
+    for index, answer in enumerate(answers):
+        if answer is None or (isinstance(answer, float) and math.isnan(answer)):
+            try:
+                answers[index] = registry.compute(calculator_id, parameters[index])
+            except Exception as e:
+                answers[index] = e
+
+    return answers
+
+
+def within_limits(answer, lower, upper):
+    try:
+        return float(lower) <= float(answer) <= float(upper)
+    except (TypeError, ValueError):
+        return str(answer) in (str(lower), str(upper))
+
+
+def check_rows(task):
+    """
+    Checks one (dataset, calculator ID, rows, check explanations) task and returns its findings, each a
+    list of row summaries.
+    """
+    dataset, calculator_id, rows, check_explanations = task
+    registry = generate_csv.REGISTRY
+
+    parameters = []
+    for row in rows:
+        # input_parameters converts "True"/"False" in place, so the dataset's entities are left untouched
+        parameters.append(registry.input_parameters(calculator_id, copy.deepcopy(row["Relevant Entities"])))
+
+    findings = {"rows": len(rows), "mismatches": [], "limit violations": [], "explanation changes": [], "errors": []}
+
+    for row, row_parameters, answer in zip(rows, parameters, compute_answers(registry, calculator_id, parameters)):
+        summary = {"dataset": dataset, "Row Number": row["Row Number"], "Note ID": row["Note ID"]}
+
+        if isinstance(answer, Exception):
+            findings["errors"].append({**summary, "error": f"{type(answer).__name__}: {answer}"})
+            continue
+
+        recomputed, _, _ = ground_truth(float(answer) if row["Category"] in DECIMAL_CATEGORIES else answer, row["Category"])
+
+        if str(recomputed) != str(row["Ground Truth Answer"]):
+            findings["mismatches"].append({**summary, "stored": str(row["Ground Truth Answer"]), "recomputed": str(recomputed)})
+
+        if not within_limits(recomputed, row["Lower Limit"], row["Upper Limit"]):
+            findings["limit violations"].append({**summary, "recomputed": str(recomputed), "Lower Limit": str(row["Lower Limit"]), "Upper Limit": str(row["Upper Limit"])})
+
+        if check_explanations:
+            try:
+                explanation = registry.run(calculator_id, copy.deepcopy(row_parameters))["Explanation"]
+            except Exception as e:
+                findings["errors"].append({**summary, "error": f"explanation: {type(e).__name__}: {e}"})
+                continue
+            if explanation != row["Ground Truth Explanation"]:
+                findings["explanation changes"].append(summary)
+
+    return calculator_id, findings
+
+
+def make_tasks(datasets, check_explanations, shard_size):
+    # one task per shard_size rows of a calculator, so each task can use the calculator's batch path
+    for dataset in datasets:
+        df = load_dataset(dataset, columns=CHECK_COLUMNS)
+
+        for calculator_id, group in df.groupby("Calculator ID", sort=True):
+            rows = group.to_dict("records")
+            for start in range(0, len(rows), shard_size):
+                yield dataset, str(calculator_id), rows[start:start + shard_size], check_explanations
+
+
+def check_drift(datasets, workers=1, shard_size=512, check_explanations=True):
+    """
+    Returns {Calculator ID: findings} over all rows of the given datasets, with the rows of each calculator
+    merged across datasets and shards.
+    """
+    tasks = list(make_tasks(datasets, check_explanations, shard_size))
+
+    if workers == 1 or len(tasks) <= 1:
+        init_worker()
+        results = [check_rows(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(min(workers, len(tasks)), initializer=init_worker) as pool:
+            results = pool.map(check_rows, tasks)
+
+    report = {}
+
+    for calculator_id, findings in results:
+        merged = report.setdefault(calculator_id, {"rows": 0, "mismatches": [], "limit violations": [], "explanation changes": [], "errors": []})
+        merged["rows"] += findings["rows"]
+        for key in ["mismatches", "limit violations", "explanation changes", "errors"]:
+            merged[key].extend(findings[key])
+
+    return dict(sorted(report.items(), key=lambda item: int(item[0])))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Recompute the ground truth of every dataset row and report the rows that drifted from the stored answers, limits and explanations')
+    parser.add_argument('datasets', type=str, nargs='*', default=["datasets/one_shot_data.csv"], help='Dataset CSVs to check, e.g. dataset/train_data.csv dataset/test_data.csv')
+    parser.add_argument('--report', type=str, default="drift_report.json", help='Where to write the JSON report.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes.')
+    parser.add_argument('--shard_size', type=int, default=512, help='Rows of one calculator checked per task.')
+    parser.add_argument('--skip_explanations', action='store_true', help='Only check answers and limits, without building the explanations.')
+
+    args = parser.parse_args()
+
+    report = check_drift(args.datasets, args.workers, args.shard_size, not args.skip_explanations)
+
+    with open(args.report, "w") as file:
+        json.dump(report, file, indent=4)
+
+    drifted = 0
+    for calculator_id, findings in report.items():
+        counts = {key: len(findings[key]) for key in ["mismatches", "limit violations", "explanation changes", "errors"]}
+        if any(counts.values()):
+            drifted += 1
+            print(f"{calculator_id}: {findings['rows']} rows, " + ", ".join(f"{count} {key}" for key, count in counts.items()))
+
+    print(f"{drifted} of {len(report)} calculators drifted; report written to {args.report}")
+
+    # a non-zero exit status lets this gate calculator changes
+    sys.exit(1 if drifted else 0)
@@ -0,0 +1,140 @@
+import os
+import re
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+from calculator_registry import CalculatorRegistry
+from dependency_hashes import DependencyHasher
+# generate_csv also puts evaluation/ (dataset_io) on the path
+from generate_csv import PIPELINE_FILES
+from dataset_io import load_dataset
+
+# Checks that generate_csv's incremental rebuild recomputes exactly the rows that depend on an edited helper.
+# Each helper is edited in its own copy of calculator_implementations/ and evaluation/dataset_io.py: after a
+# full build, a comment is appended to the helper and generate_csv is run again. The number of rows it reports
+# recomputing must be the number of rows whose calculator's explanation function uses the helper (all rows for
+# the PIPELINE_FILES), at least the number whose explanation is seen calling into it, and the output must be
+# unchanged. Exits with a non-zero status if any check fails.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPT_DIR)
+
+REGISTRY = CalculatorRegistry()
+
+# a helper most calculators' explanations use, one only their compute paths use, and one of the pipeline files
+HELPERS = ["age_conversion.py", "batch_columns.py", "rounding.py"]
+
+
+def generate(work_dir, dataset):
+    # runs generate_csv in the copy and returns how many rows it recomputed
+    result = subprocess.run([sys.executable, os.path.join("calculator_implementations", "generate_csv.py"), "--input", dataset, "--workers", "1"],
+                            cwd=work_dir, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+
+    match = re.search(r"recomputing (\d+) of \d+ rows", result.stdout)
+
+    return int(match.group(1)) if match else 0
+
+
+def dependent_rows(rows, helper, search_dir=SCRIPT_DIR):
+    # rows whose key depends on helper: all of them for the PIPELINE_FILES, else those whose calculator's source files include it
+    if helper in [os.path.basename(path) for path in PIPELINE_FILES]:
+        return len(rows)
+
+    hasher = DependencyHasher(search_dir)
+    files = {}
+
+    for calculator_id in set(rows):
+        info = REGISTRY.info(calculator_id)
+        files[calculator_id] = [os.path.basename(path) for path in hasher.function_closure(os.path.join(search_dir, info["file path"]), info["explanation function"])]
+
+    return sum(helper in files[calculator_id] for calculator_id in rows)
+
+
+def calling_rows(dataset, helper):
+    # rows whose explanation actually runs code from helper; each of them must be recomputed
+    count = 0
+    helper_path = os.path.join(SCRIPT_DIR, helper)
+
+    for row in load_dataset(dataset, columns=["Calculator ID", "Relevant Entities"]).to_dict("records"):
+        input_parameters = REGISTRY.input_parameters(row["Calculator ID"], row["Relevant Entities"])
+        files = set()
+
+        def record(frame, event, arg):
+            if event == "call":
+                files.add(os.path.abspath(frame.f_code.co_filename))
+
+        sys.setprofile(record)
+        try:
+            REGISTRY.run(row["Calculator ID"], input_parameters)
+        finally:
+            sys.setprofile(None)
+
+        count += helper_path in files
+
+    return count
+
+
+def check_helper(helper, dataset):
+    with tempfile.TemporaryDirectory() as work_dir:
+        shutil.copytree(SCRIPT_DIR, os.path.join(work_dir, "calculator_implementations"), ignore=shutil.ignore_patterns("__pycache__"))
+        os.makedirs(os.path.join(work_dir, "evaluation"))
+        shutil.copy(os.path.join(REPO_DIR, "evaluation", "dataset_io.py"), os.path.join(work_dir, "evaluation"))
+
+        copied = os.path.join(work_dir, "dataset.csv")
+        shutil.copy(dataset, copied)
+
+        generate(work_dir, copied)
+
+        with open(copied, "rb") as file:
+            built = file.read()
+
+        with open(os.path.join(work_dir, "calculator_implementations", helper), "a") as file:
+            file.write("\n# edited by check_incremental.py\n")
+
+        recomputed = generate(work_dir, copied)
+        calculator_ids = [str(int(float(calculator_id))) for calculator_id in load_dataset(copied, columns=["Calculator ID"])["Calculator ID"]]
+        expected = dependent_rows(calculator_ids, helper, os.path.join(work_dir, "calculator_implementations"))
+
+        with open(copied, "rb") as file:
+            unchanged = file.read() == built
+
+    failures = []
+
+    calling = calling_rows(dataset, helper)
+
+    if recomputed != expected:
+        failures.append(f"{helper}: recomputed {recomputed} rows, {expected} depend on it")
+    if recomputed < calling:
+        failures.append(f"{helper}: recomputed {recomputed} rows, but {calling} rows run code from it")
+    if not unchanged:
+        failures.append(f"{helper}: the output changed after a comment-only edit")
+
+    return failures, recomputed, calling
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Check that editing a helper module only recomputes the rows that depend on it')
+    parser.add_argument('--dataset', type=str, default="datasets/one_shot_data.csv", help='Dataset CSV to build (a copy of it is used).')
+    parser.add_argument('--helpers', type=str, nargs='+', default=HELPERS, help='Files in calculator_implementations/ to edit, one at a time.')
+
+    args = parser.parse_args()
+
+    failures = []
+
+    for helper in args.helpers:
+        helper_failures, recomputed, calling = check_helper(helper, args.dataset)
+        print(f"{helper}: recomputed {recomputed} rows, {calling} of which run code from it")
+        failures += helper_failures
+
+    for failure in failures:
+        print(failure)
+
+    print(f"{len(failures)} of {3 * len(args.helpers)} checks failed")
+
+    sys.exit(1 if failures else 0)
@@ -105,3 +105,39 @@ The Child-Pugh Score is calculated by summing the points for each criterion.
     return {"Explanation": explanation, "Answer": cp_score}
 
 
+def compute_child_pugh_score(input_variables, context):
+
+    cp_score = 0
+
+    inr = float(input_variables['inr'])
+    bilirubin = context.conversion(input_variables['bilirubin'][0], 'bilirubin', 548.66, None, input_variables['bilirubin'][1], "mg/dL")
+    albumin = context.conversion(input_variables['albumin'][0], 'albumin', 66500, None, input_variables['albumin'][1], "g/dL")
+
+    if inr < 1.7:
+        cp_score += 1
+    elif 1.7 <= inr <= 2.3:
+        cp_score += 2
+    elif inr > 2.3:
+        cp_score += 3
+
+    if bilirubin < 2:
+        cp_score += 1
+    elif 2 <= bilirubin <= 3:
+        cp_score += 2
+    elif bilirubin > 3:
+        cp_score += 3
+
+    if albumin > 3.5:
+        cp_score += 1
+    elif 2.8 <= albumin <= 3.5:
+        cp_score += 2
+    elif albumin < 2.8:
+        cp_score += 3
+
+    ascites_points = {'absent': 1, 'slight': 2, 'moderate': 3}
+    encephalopathy_points = {'No Encephalopathy': 1, 'Grade 1-2': 2, 'Grade 3-4': 3}
+
+    cp_score += ascites_points.get(input_variables.get('ascites', 'absent'), 0)
+    cp_score += encephalopathy_points.get(input_variables.get('encephalopathy', 'No Encephalopathy'), 0)
+
+    return cp_score
@@ -1,6 +1,8 @@
 import age_conversion
 import unit_converter_new
 from rounding import round_number
+import numpy as np
+import batch_columns
 
 
 def ckd_epi_2021_explanation(input_parameters):
@@ -57,4 +59,46 @@ def ckd_epi_2021_explanation(input_parameters):
     explanation += f"Hence, the GFR value is {result} ml/min/1.73 m²."
 
     return {"Explanation": explanation, "Answer": result}
- 
+
+
+def compute_ckd_epi_2021(input_parameters, context):
+
+    age = context.age(input_parameters["age"])
+    gender = input_parameters["sex"]
+    gender_coefficient = 1.012 if gender == "Female" else 1.000
+
+    creatinine_val = context.conversion(input_parameters["creatinine"][0], "Serum Creatinine", 113.12, None, input_parameters["creatinine"][1], "mg/dL")
+
+    if creatinine_val <= 0.7 and gender == "Female":
+        a, b = 0.7, -0.241
+    elif creatinine_val <= 0.9 and gender == "Male":
+        a, b = 0.7, -0.302
+    elif creatinine_val > 0.7 and gender == "Female":
+        a, b = 0.7, -1.2
+    elif creatinine_val > 0.9 and gender == "Male":
+        a, b = 0.9, -1.2
+
+    return round_number(142 * (creatinine_val/a)**b * 0.9938**age * gender_coefficient)
+
+
+def compute_batch(columns):
+
+    age = batch_columns.convert_by_unit(batch_columns.column_values(columns, "age"), batch_columns.column_units(columns, "age", "years"),
+                                        lambda value, unit: age_conversion.age_conversion([value, unit]))
+    gender = batch_columns.column_strings(columns, "sex", len(age))
+    gender_coefficient = np.where(gender == "Female", 1.012, 1.000)
+
+    creatinine_val = batch_columns.convert_by_unit(batch_columns.column_values(columns, "creatinine"), batch_columns.column_units(columns, "creatinine", "mg/dL"),
+                                                   lambda value, unit: unit_converter_new.conversion(value, "Serum Creatinine", 113.12, None, unit, "mg/dL"))
+
+    # Same branches as compute_ckd_epi_2021; rows matching none of them (unknown sex) come out as NaN.
+    branches = [(creatinine_val <= 0.7) & (gender == "Female"),
+                (creatinine_val <= 0.9) & (gender == "Male"),
+                (creatinine_val > 0.7) & (gender == "Female"),
+                (creatinine_val > 0.9) & (gender == "Male")]
+
+    a = np.select(branches, [0.7, 0.7, 0.7, 0.9], np.nan)
+    b = np.select(branches, [-0.241, -0.302, -1.2, -1.2], np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return round_number(142 * (creatinine_val/a)**b * 0.9938**age * gender_coefficient)
@@ -23,3 +23,11 @@ def compute_fena_explanation(input_variables):
     return {"Explanation": explanation, "Answer": result}
 
 
+def compute_fena(input_variables, context):
+
+    sodium = context.conversion(input_variables["sodium"][0], "sodium", 22.99, 1, input_variables["sodium"][1], "mEq/L")
+    creatinine = context.conversion(input_variables["creatinine"][0], "creatinine", 113.12, 1, input_variables["creatinine"][1], "mg/dL")
+    urine_sodium = context.conversion(input_variables["urine_sodium"][0], "urine sodium", 22.99, 1, input_variables["urine_sodium"][1], "mEq/L")
+    urine_creatinine = context.conversion(input_variables["urine_creatinine"][0], "urine creatinine", 113.12, 1, input_variables["urine_creatinine"][1], "mg/dL")
+
+    return round_number((creatinine * urine_sodium)/(sodium * urine_creatinine) * 100)
@@ -12,3 +12,11 @@ def fahrenheit_to_celsius_explanation(temperature, units):
     explanation += f"This means that the patient's temperature is 5/9 * {temperature - 32} = {celsius} degrees celsius. "
   
     return explanation, celsius
+
+
+def fahrenheit_to_celsius(temperature, units):
+
+    if units == "degrees celsius":
+        return temperature
+
+    return round_number((temperature - 32) * 5/9)
@@ -79,3 +79,21 @@ def generate_cockcroft_gault_explanation(params):
     return {"Explanation": output, "Answer": creatinine_clearance}
 
 
+def compute_cockcroft_gault(params, context):
+
+    weight = context.weight(params["weight"])
+    age = context.age(params["age"])
+    serum_creatinine = context.conversion(params['creatinine'][0], "creatinine", 113.12, None, params['creatinine'][1], "mg/dL")
+
+    bmi = float(bmi_calculator.compute_bmi(params, context))
+
+    if bmi < 18.5:
+        adjusted_weight = weight
+    elif 18.5 <= bmi <= 24.9:
+        adjusted_weight = min(context.ibw(params), weight)
+    else:
+        adjusted_weight = context.abw(params)
+
+    constant = 1 if params["sex"] == "Male" else 0.85
+
+    return round_number(((140 - age) * adjusted_weight * constant) / (serum_creatinine * 72))
@@ -70,3 +70,31 @@ The total CURB-65 score is calculated by summing the points for each criterion.
 
     return {"Explanation": explanation, "Answer": curb_65_score}
 
+
+def compute_curb_65(input_parameters, context):
+
+    curb_65_score = 0
+
+    bun = context.conversion(input_parameters["bun"][0], "BUN", 28.02, None, input_parameters["bun"][1], "mg/dL")
+
+    respiratory_rate = int(input_parameters["respiratory_rate"][0])
+    sys_bp = int(input_parameters["sys_bp"][0])
+    dia_bp = int(input_parameters["dia_bp"][0])
+    age = context.age(input_parameters["age"])
+
+    if age >= 65:
+        curb_65_score += 1
+
+    if input_parameters.get("confusion"):
+        curb_65_score += 1
+
+    if bun > 19:
+        curb_65_score += 1
+
+    if respiratory_rate >= 30:
+        curb_65_score += 1
+
+    if sys_bp < 90 or dia_bp <= 60:
+        curb_65_score += 1
+
+    return curb_65_score
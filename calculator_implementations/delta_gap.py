@@ -17,3 +17,8 @@ def compute_delta_gap_explanation(input_parameters):
     explanation += f"Hence, the patient's delta gap is {answer} mEq/L."
 
     return {"Explanation": explanation, "Answer": answer }
+
+
+def compute_delta_gap(input_parameters, context):
+
+    return round_number(context.anion_gap(input_parameters) - 12.0)
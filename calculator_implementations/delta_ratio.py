@@ -24,3 +24,9 @@ def compute_delta_ratio_explanation(input_parameters):
 
     return {"Explanation": explanation, "Answer": answer}
 
+
+def compute_delta_ratio(input_parameters, context):
+
+    delta_gap_val = delta_gap.compute_delta_gap(input_parameters, context)
+    bicarbonate_val = context.conversion(input_parameters["bicarbonate"][0], "bicarbonate", 61.02, 1, input_parameters["bicarbonate"][1], "mEq/L")
+    return round_number(delta_gap_val/(24 - bicarbonate_val))
@@ -0,0 +1,135 @@
+import ast
+import hashlib
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Content hashes of the modules a function depends on: the module it is defined in, and every helper module in
+# this folder whose definitions it uses, directly or through other helpers (e.g. a calculator's explanation
+# function -> unit_converter_new.conversion_explanation -> rounding.round_number). Modules that are imported but
+# only used by other functions (e.g. batch_columns for the batch path) are left out. Whole files are hashed, and
+# standard library and third-party imports are not followed.
+
+
+def file_hash(path):
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def module_definitions(path, search_dir=SCRIPT_DIR):
+    """
+    (definitions, imports) of a module: top-level name -> the function, class or assignment statements that
+    define it, and name -> (path of a module in search_dir, imported name, or None for the module itself) for
+    the imports anywhere in the module (including inside functions) of files in search_dir.
+    """
+    with open(path) as file:
+        tree = ast.parse(file.read(), filename=path)
+
+    definitions = {}
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            definitions.setdefault(node.name, []).append(node)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                for name in ast.walk(target):
+                    if isinstance(name, ast.Name):
+                        definitions.setdefault(name.id, []).append(node)
+
+    imports = {}
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                module_path = os.path.join(search_dir, alias.name.split(".")[0] + ".py")
+                if os.path.exists(module_path):
+                    imports[alias.asname or alias.name.split(".")[0]] = (module_path, None)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            module_path = os.path.join(search_dir, node.module.split(".")[0] + ".py")
+            if os.path.exists(module_path):
+                for alias in node.names:
+                    imports[alias.asname or alias.name] = (module_path, None if alias.name == "*" else alias.name)
+
+    return definitions, imports
+
+
+class DependencyHasher:
+    """
+    Hashes the modules in search_dir that a function depends on. Files are read and parsed once per hasher,
+    so one instance can hash every calculator without re-reading shared helpers.
+    """
+
+    def __init__(self, search_dir=SCRIPT_DIR):
+        self.search_dir = search_dir
+        self._file_hashes = {}
+        self._definitions = {}
+
+    def file_hash(self, path):
+        if path not in self._file_hashes:
+            self._file_hashes[path] = file_hash(path)
+        return self._file_hashes[path]
+
+    def definitions(self, path):
+        if path not in self._definitions:
+            self._definitions[path] = module_definitions(path, self.search_dir)
+        return self._definitions[path]
+
+    def function_closure(self, path, function_name):
+        """
+        Absolute paths of the module defining function_name and of every local module whose functions,
+        classes or constants it uses, directly or indirectly.
+        """
+        seen = set()
+        files = set()
+        stack = [(os.path.abspath(path), function_name)]
+
+        while stack:
+            current, name = stack.pop()
+            if (current, name) in seen:
+                continue
+            seen.add((current, name))
+            files.add(current)
+
+            definitions, imports = self.definitions(current)
+
+            if name is None:
+                # the whole module is used, e.g. passed around or star-imported
+                nodes = [node for statements in definitions.values() for node in statements]
+            elif name in definitions:
+                nodes = definitions[name]
+            else:
+                # an imported name (a re-export) or a builtin
+                if name in imports:
+                    stack.append(imports[name])
+                continue
+
+            for node in nodes:
+                # module.function attributes point into the module; other names are looked up in this module
+                attributes = [child for child in ast.walk(node) if isinstance(child, ast.Attribute) and isinstance(child.value, ast.Name) and child.value.id in imports and imports[child.value.id][1] is None]
+                bases = {id(child.value) for child in attributes}
+
+                for child in attributes:
+                    stack.append((imports[child.value.id][0], child.attr))
+
+                for child in ast.walk(node):
+                    if isinstance(child, ast.Name) and id(child) not in bases:
+                        stack.append((current, child.id))
+
+        return sorted(files)
+
+    def file_hashes(self, paths):
+        # file name -> content hash
+        return {os.path.basename(path): self.file_hash(path) for path in paths}
+
+    def files_hash(self, paths, extra=""):
+        """
+        One hash for the contents of paths; extra (e.g. the calculator's name_to_python.json entry) is
+        hashed along with the files.
+        """
+        digest = hashlib.sha256(extra.encode("utf-8"))
+
+        for name, content_hash in sorted(self.file_hashes(paths).items()):
+            digest.update(f"{name}:{content_hash}\n".encode("utf-8"))
+
+        return digest.hexdigest()
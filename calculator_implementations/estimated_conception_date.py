@@ -13,3 +13,8 @@ def add_2_weeks_explanation(input_data):
     explanation += f"Hence, the estimated date of conception after adding 2 weeks to the patient's last menstrual period date is {future_date.strftime('%m/%d/%Y')}."
 
     return {"Explanation": explanation, "Answer": future_date.strftime('%m/%d/%Y')}
+
+
+def compute_conception_date(input_data, context=None):
+    input_date = datetime.strptime(input_data["menstrual_date"], "%m/%d/%Y")
+    return (input_date + timedelta(weeks=2)).strftime('%m/%d/%Y')
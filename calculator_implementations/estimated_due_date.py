@@ -29,4 +29,14 @@ def add_40_weeks_explanation(input_data):
     return {"Explanation": explanation, "Answer": future_date.strftime('%m/%d/%Y')}
 
 
+def compute_due_date(input_data, context=None):
 
+    cycle_length = input_data["cycle_length"]
+
+    input_date = datetime.strptime(input_data["menstrual_date"], "%m/%d/%Y")
+    future_date = input_date + timedelta(weeks=40)
+
+    if cycle_length != 28:
+        future_date = future_date + timedelta(days=cycle_length - 28)
+
+    return future_date.strftime('%m/%d/%Y')
@@ -25,3 +25,13 @@ def compute_gestational_age_explanation(input_parameters):
 
 
     return {"Explanation": explanation, "Answer": (f"{weeks} weeks", f"{days} days")}
+
+
+def compute_gestational_age(input_parameters, context=None):
+
+    datetime1 = datetime.strptime(input_parameters["menstrual_date"], "%m/%d/%Y")
+    datetime2 = datetime.strptime(input_parameters["current_date"], "%m/%d/%Y")
+
+    delta = abs(datetime2 - datetime1)
+
+    return (f"{delta.days // 7} weeks", f"{delta.days % 7} days")
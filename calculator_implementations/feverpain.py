@@ -42,3 +42,16 @@ The FeverPAIN score is calculated by summing the points for each criterion.
 
     return {"Explanation": explanation, "Answer": fever_pain_score}
 
+
+def compute_fever_pain(input_parameters, context=None):
+
+    fever_pain_score = 0
+
+    if input_parameters.get("cough_coryza_absent", True):
+        fever_pain_score += 1
+
+    for parameter in ["fever_24_hours", "symptom_onset", "purulent_tonsils", "severe_tonsil_inflammation"]:
+        if input_parameters.get(parameter):
+            fever_pain_score += 1
+
+    return fever_pain_score
@@ -30,3 +30,14 @@ def compute_fib4_explanation(input_parameters):
     
     return {"Explanation": explanation, "Answer": result}
 
+
+def compute_fib4(input_parameters, context):
+
+    age = context.age(input_parameters["age"])
+    ast_value = input_parameters["ast"][0]
+    alt_value = input_parameters["alt"][0]
+
+    platelet_value = unit_converter_new.convert_to_units_per_liter(input_parameters["platelet_count"][0], input_parameters["platelet_count"][1], "L")
+    count_platelet_billions = platelet_value/(1e9)
+
+    return round_number((age * ast_value)/(count_platelet_billions * math.sqrt(alt_value)))
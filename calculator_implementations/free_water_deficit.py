@@ -54,3 +54,24 @@ def free_water_deficit_explanation(input_variables):
 
     return {"Explanation": explanation, "Answer": answer}
 
+
+def compute_free_water_deficit(input_variables, context):
+
+    age = context.age(input_variables["age"])
+    gender = input_variables["sex"]
+
+    if 0 <= age < 18:
+        tbw = 0.6
+    elif 18 <= age < 65 and gender == "Male":
+        tbw = 0.6
+    elif 18 <= age < 65 and gender == "Female":
+        tbw = 0.5
+    elif age >= 65 and gender == "Male":
+        tbw = 0.5
+    elif age >= 65 and gender == "Female":
+        tbw = 0.45
+
+    weight = context.weight(input_variables["weight"])
+    sodium = context.conversion(input_variables["sodium"][0], "sodium", 22.99, 1, input_variables["sodium"][1], "mmol/L")
+
+    return round_number(tbw * weight * (sodium/140 - 1))
@@ -1,33 +1,75 @@
 import pandas as pd
-import json 
-import os 
-from rounding import round_number
 import json
-import importlib.util
-import ast 
+import os
+import hashlib
+import sys
+import argparse
+import tempfile
+import multiprocessing
+from rounding import round_number
+from calculator_registry import CalculatorRegistry
+from dependency_hashes import file_hash
+
+# the dataset is read and exported with evaluation/dataset_io.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "evaluation"))
+
+from dataset_io import load_dataset, export_dataset, columnar_path
 
-with open("/Users/nikhilkhandekar/Documents/MedCalc-Bench-Verified/calculator_implementations/name_to_python.json") as file:
-    calc_info = json.load(file)
+SCRIPT_PATH = os.path.abspath(__file__)
 
-df_test = pd.read_csv("datasets/one_shot_data.csv")
+# the files other than the calculators that a row's outputs depend on: this script, the rounding of the limits and
+# the reading and writing of the CSV
+PIPELINE_FILES = [SCRIPT_PATH, os.path.join(os.path.dirname(SCRIPT_PATH), "rounding.py"), os.path.abspath(os.path.join(os.path.dirname(SCRIPT_PATH), "..", "evaluation", "dataset_io.py"))]
 
+CSV_COLUMNS = ["Row Number", "Calculator ID", "Calculator Name", "Category", "Output Type", "Note ID", "Note Type",
+               "Patient Note", "Question", "Relevant Entities", "Ground Truth Answer", "Lower Limit", "Upper Limit", "Ground Truth Explanation"]
 
-csv_props = {"Row Number": [], "Calculator ID": [], "Calculator Name": [], "Category": [], "Output Type": [], "Note ID": [], "Note Type": [], 
-             "Patient Note": [], "Question": [], "Relevant Entities": [], "Ground Truth Answer": [], "Lower Limit": [], "Upper Limit": [], "Ground Truth Explanation": []}
+# categories whose answers are rounded decimals graded within a margin
+DECIMAL_CATEGORIES = ["lab test", "physical", "dosage"]
+
+# the input columns a row's outputs are computed from
+INPUT_COLUMNS = ["Calculator ID", "Calculator Name", "Category", "Output Type", "Note ID", "Note Type", "Patient Note", "Relevant Entities"]
 
 
 #synthesized_calc_id = [17, 25, 32, 29, 15, 21, 27, 28, 43, 36]
 
 synthesized_calc_id = [21, 29, 28, 43, 36]
 
-for index, row in df_test.iterrows():
-    calculator_id = int(float(row["Calculator ID"]))  # Convert to float first in case of decimal format, then to int
+# set in each worker by init_worker, with every calculator module already imported
+REGISTRY = None
+
+
+def init_worker():
+    global REGISTRY
+    REGISTRY = CalculatorRegistry()
+
+    for calculator_id in REGISTRY.calculator_ids():
+        REGISTRY.load_module(calculator_id)
+
+
+def ground_truth(answer, category):
+    """
+    The Ground Truth Answer, Lower Limit and Upper Limit stored for a calculator answer: decimal categories
+    are rounded and get a 5% margin, all others must match exactly.
+    """
+    if category in DECIMAL_CATEGORIES:
+        # Calculate 5% margin for upper and lower limits properly handling negative values
+        answer_value = float(answer)
+
+        if answer_value < 0:
+            return str(round_number(answer_value)), str(round_number(answer_value * 1.05)), str(round_number(answer_value * 0.95))
+
+        return str(round_number(answer_value)), str(round_number(answer_value * 0.95)), str(round_number(answer_value * 1.05))
 
-    # Skip specific calculator IDs
-    
-    print(calculator_id, index + 1)
+    return answer, answer, answer
 
-    note_type = row["Note Type"]
+
+def process_row(index, row, registry):
+    """
+    Recomputes the question, ground truth answer, limits and explanation of one dataset row and returns the
+    new row as a dict of the CSV_COLUMNS.
+    """
+    calculator_id = int(float(row["Calculator ID"]))  # Convert to float first in case of decimal format, then to int
 
     if calculator_id == 68:
         row["Calculator Name"] = "Estimated Date of Conception"
@@ -35,136 +77,221 @@ for index, row in df_test.iterrows():
     if calculator_id == 23:
         row["Question"] = "What is the patient's MeldNa (UNOS/OPTN) score?"
 
-    csv_props["Row Number"].append(str(index + 1))
-    csv_props["Calculator ID"].append(str(calculator_id))  # Convert to string when adding to csv_props
-    csv_props["Calculator Name"].append(row["Calculator Name"])
-    csv_props["Category"].append(row["Category"])
-    csv_props["Output Type"].append(row["Output Type"])
-    csv_props["Note Type"].append(note_type)
-    csv_props["Patient Note"].append(row["Patient Note"])
-    csv_props["Note ID"].append(row["Note ID"])
-
-    
-    try:
-        relevant_entities = ast.literal_eval(row["Relevant Entities"])
-    except Exception as e:
-        print(f"Error in row {index}")
-        print(f"Relevant Entities content: {row['Relevant Entities']}")
-        print(f"Error: {e}")
-        raise
+    relevant_entities = row["Relevant Entities"]
 
     if row["Note Type"] == "Template":
 
         if row["Calculator ID"] != 24:
-            question = calc_info[str(calculator_id)]["question"]
-            csv_props["Question"].append(question)
+            question = registry.info(calculator_id)["question"]
         if row["Calculator ID"] == 24:
             question = f"Based on the patient's dose of {relevant_entities['input steroid'][0]}, what is the equivalent dosage in mg of {relevant_entities['target steroid']}?"
-            csv_props["Question"].append(question)
 
     else:
 
-        question = calc_info[str(calculator_id)]["question"]
+        question = registry.info(calculator_id)["question"]
         if str(calculator_id) not in ["43", "28"]:
             question = question + " " + "You should use the patient's medical values and health status when they were first admitted to the hospital prior to any treatment."
 
-        csv_props["Question"].append(question)
-    
-    input_parameters = {}
+    input_parameters = registry.input_parameters(calculator_id, relevant_entities)
 
-    patient_note = row["Patient Note"]
-    note_id = row["Note ID"]
+    func_output = registry.run(calculator_id, input_parameters)
 
-    if row["Calculator ID"] == 49:   
-        input_parameters = relevant_entities
-    else:
-        print(f"\nProcessing calculator_id: {calculator_id}")
-
-     
-        for entity in relevant_entities:
-           
-            calc_map = calc_info[str(calculator_id)]
-            python_name = calc_map[entity]
-
-            if relevant_entities[entity] == "False":
-                relevant_entities[entity] = False
-                input_parameters[python_name] = relevant_entities[entity]
-
-            elif relevant_entities[entity] == "True":
-                relevant_entities[entity] = True
-                input_parameters[python_name] = relevant_entities[entity]
-
-            else:
-                input_parameters[python_name] = relevant_entities[entity]
-
-
-        print(f"Relevant entities: {relevant_entities}")
-        print(f"calc_info entry: {input_parameters}")
-
-
-    # Get the file path and explanation function name
-    file_path = calc_info[str(calculator_id)]["file path"]
-    explanation_func_name = calc_info[str(calculator_id)]["explanation function"]
-    
-    # If file_path is relative, make it absolute by joining with calculator_implementations directory
-    if not os.path.isabs(file_path):
-        file_path = os.path.join(os.path.dirname(__file__), file_path)
-    
-    # Get just the filename without path and extension
-    file_name = os.path.splitext(os.path.basename(file_path))[0]
-    
-    # Import the module dynamically
-    spec = importlib.util.spec_from_file_location(file_name, file_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    
-    # Get the explanation function
-    explanation_func = getattr(module, explanation_func_name)
-    
-    # Call the explanation function with input parameters
-    func_output = explanation_func(input_parameters)
-  
-    csv_props["Relevant Entities"].append(relevant_entities)
-    csv_props["Ground Truth Explanation"].append(func_output["Explanation"])
-
-  
-    if row["Note Type"] == "Synthetic" and row["Ground Truth Answer"] != func_output["Answer"]:
-        print(row["Ground Truth Answer"], func_output["Answer"])
-
-    if row["Category"] in ["lab test", "physical", "dosage"]:
-        csv_props["Ground Truth Answer"].append(str(round_number(float(func_output["Answer"]))))
+    if row["Note Type"] == "Synthetic" and str(row["Ground Truth Answer"]) != str(func_output["Answer"]):
+        print(f"row {index + 1}: ground truth changed from {row['Ground Truth Answer']} to {func_output['Answer']}")
+
+    answer, lower_limit, upper_limit = ground_truth(func_output["Answer"], row["Category"])
+
+    return {
+        "Row Number": str(index + 1),
+        "Calculator ID": str(calculator_id),  # Convert to string when adding to csv_props
+        "Calculator Name": row["Calculator Name"],
+        "Category": row["Category"],
+        "Output Type": row["Output Type"],
+        "Note ID": row["Note ID"],
+        "Note Type": row["Note Type"],
+        "Patient Note": row["Patient Note"],
+        "Question": question,
+        "Relevant Entities": relevant_entities,
+        "Ground Truth Answer": answer,
+        "Lower Limit": lower_limit,
+        "Upper Limit": upper_limit,
+        "Ground Truth Explanation": func_output["Explanation"]
+    }
+
+
+def process_shard(shard):
+    """
+    Processes a (shard number, rows, shard directory) shard and writes its rows, without a header, to
+    shard_<number>.csv in the shard directory. rows holds (index, row, previous) entries; rows with a
+    previous output are written from it instead of being recomputed. Columns are kept as objects so every
+    value is written with str(), exactly as when all rows are written at once.
+    """
+    shard_number, rows, shard_dir = shard
+    records = [previous if previous is not None else process_row(index, row, REGISTRY) for index, row, previous in rows]
+
+    path = os.path.join(shard_dir, f"shard_{shard_number:06d}.csv")
+    pd.DataFrame(records, columns=CSV_COLUMNS, dtype=object).to_csv(path, index=False, header=False)
+
+    return path
+
+
+def make_shards(rows, previous, shard_size, shard_dir):
+    for shard_number, start in enumerate(range(0, len(rows), shard_size)):
+        entries = [(index, rows[index], previous[index]) for index in range(start, min(start + shard_size, len(rows)))]
+        yield shard_number, entries, shard_dir
+
+
+def merge_shards(paths, output_path):
+    # header, then the shards in row order
+    with open(output_path, "w") as output:
+        output.write(pd.DataFrame(columns=CSV_COLUMNS).to_csv(index=False))
+        for path in paths:
+            with open(path) as shard:
+                output.write(shard.read())
+
+
+def manifest_path(output_path):
+    return os.path.splitext(output_path)[0] + ".manifest.json"
+
+
+def row_keys(rows, registry):
+    """
+    One hash per row over the PIPELINE_FILES, the row's calculator source hash (see
+    CalculatorRegistry.source_hash) and the row's input columns. A row whose key is unchanged since the
+    last build has the same outputs.
+    """
+    pipeline_hash = registry.hasher.files_hash(PIPELINE_FILES)
+    calculator_hashes = {}
+    keys = []
+
+    for index, row in enumerate(rows):
+        calculator_id = str(int(float(row["Calculator ID"])))
+        if calculator_id not in calculator_hashes:
+            calculator_hashes[calculator_id] = registry.source_hash(calculator_id)
+
+        inputs = json.dumps([index] + [row[column] for column in INPUT_COLUMNS], sort_keys=True, default=str)
+        digest = hashlib.sha256(f"{pipeline_hash}:{calculator_hashes[calculator_id]}:".encode("utf-8"))
+        digest.update(inputs.encode("utf-8"))
+        keys.append(digest.hexdigest())
+
+    manifest = {
+        "pipeline": pipeline_hash,
+        "calculators": {calculator_id: {"hash": calculator_hashes[calculator_id], "files": registry.hasher.file_hashes(registry.source_files(calculator_id))} for calculator_id in sorted(calculator_hashes, key=int)},
+        "rows": keys
+    }
+
+    return keys, manifest
+
+
+def load_manifest(output_path):
+    if not os.path.exists(output_path) or not os.path.exists(manifest_path(output_path)):
+        return None
+
+    with open(manifest_path(output_path)) as file:
+        return json.load(file)
+
+
+def read_outputs(path, header=True):
+    # the records of an output CSV (or headerless shard) as the exact strings that were written, with a hash of each
+    if header:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
     else:
-        csv_props["Ground Truth Answer"].append(func_output["Answer"])
+        df = pd.read_csv(path, header=None, names=CSV_COLUMNS, dtype=str, keep_default_na=False)
 
+    if list(df.columns) != CSV_COLUMNS:
+        return [], []
 
-    if row["Category"] in ["lab test", "physical", "dosage"]:
-        # Calculate 5% margin for upper and lower limits properly handling negative values
-        answer_value = float(func_output["Answer"])
-    
+    records = df.to_dict("records")
+    hashes = [hashlib.sha256(json.dumps([record[column] for column in CSV_COLUMNS]).encode("utf-8")).hexdigest() for record in records]
+
+    return records, hashes
 
-        if answer_value < 0:
 
-            print(answer_value)
-            print("Lower Limit: ", round_number(answer_value * 1.05))
-            print("Upper Limit: ", round_number(answer_value * 0.95))
+def previous_outputs(output_path, manifest, keys):
+    """
+    For each row, its record in the existing output if both the row's key and the record itself are
+    unchanged since the manifest was written, else None. Checking the records means rows edited by hand
+    in the output are recomputed too.
+    """
+    previous = [None] * len(keys)
+    records, hashes = read_outputs(output_path)
 
-            csv_props["Lower Limit"].append(str(round_number(answer_value * 1.05)))
-            csv_props["Upper Limit"].append(str(round_number(answer_value * 0.95)))
+    for index, key in enumerate(keys):
+        if index < min(len(records), len(manifest["rows"])) and manifest["rows"][index] == key and manifest["outputs"][index] == hashes[index]:
+            previous[index] = records[index]
 
+    return previous, hashes
+
+
+def generate_csv(input_path, output_path, workers=1, shard_size=256, incremental=True):
+    """
+    Regenerates the dataset at input_path into output_path. Rows are split into shards of shard_size that a
+    pool of workers processes in parallel; with one worker the shards are processed in this process. The
+    output is the same either way.
+
+    A manifest with a key per row (see row_keys) is written next to the output. With incremental=True, rows
+    whose key matches the manifest of the existing output are copied from it, so after editing a calculator or
+    a helper module only the rows of the calculators whose explanation functions use it are recomputed.
+    """
+    # Relevant Entities comes back parsed, from the columnar copy when it is up to date
+    rows = load_dataset(input_path).to_dict("records")
+
+    keys, manifest = row_keys(rows, CalculatorRegistry())
+    built = load_manifest(output_path) if incremental else None
+
+    if built is not None and built["rows"] == keys and built["output"] == file_hash(output_path):
+        print(f"all {len(rows)} rows are up to date")
+        if columnar_path(output_path) is None:
+            export_dataset(output_path)
+        return
+
+    previous, output_hashes = previous_outputs(output_path, built, keys) if built is not None else ([None] * len(rows), [])
+
+    recompute = sum(record is None for record in previous)
+    print(f"recomputing {recompute} of {len(rows)} rows")
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as shard_dir:
+        shards = list(make_shards(rows, previous, shard_size, shard_dir))
+
+        # shards with every row copied need no calculators and are written here
+        paths = [process_shard(shard) if all(entry[2] is not None for entry in shard[1]) else None for shard in shards]
+        pending = [shard for shard, path in zip(shards, paths) if path is None]
+
+        # a pool only pays off once there is more than a shard of rows to compute
+        if workers == 1 or len(pending) <= 1 or recompute < shard_size:
+            if pending:
+                init_worker()
+            computed = [process_shard(shard) for shard in pending]
         else:
-            csv_props["Lower Limit"].append(str(round_number(answer_value * 0.95)))
-            csv_props["Upper Limit"].append(str(round_number(answer_value * 1.05)))
+            with multiprocessing.Pool(min(workers, len(pending)), initializer=init_worker) as pool:
+                computed = pool.map(process_shard, pending)
 
+        # output hashes of copied rows are known; those of the recomputed shards are read back from them
+        manifest["outputs"] = [output_hashes[index] if record is not None else None for index, record in enumerate(previous)]
+        for shard, path in zip(pending, computed):
+            for (index, _, _), output_hash in zip(shard[1], read_outputs(path, header=False)[1]):
+                manifest["outputs"][index] = output_hash
 
+        computed = iter(computed)
+        merge_shards([path if path is not None else next(computed) for path in paths], output_path)
+
+    manifest["output"] = file_hash(output_path)
+
+    with open(manifest_path(output_path), "w") as file:
+        json.dump(manifest, file, indent=4)
+
+    export_dataset(output_path)
 
-    else:
-        csv_props["Lower Limit"].append(func_output["Answer"])
-        csv_props["Upper Limit"].append(func_output["Answer"])
-  
 
-df_output = pd.DataFrame(csv_props)
-df_output.to_csv("datasets/one_shot_data.csv", index=False)
+if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description='Recompute the questions, ground truth answers, limits and explanations of a dataset CSV')
+    parser.add_argument('--input', type=str, default="datasets/one_shot_data.csv", help='Dataset CSV to regenerate.')
+    parser.add_argument('--output', type=str, default=None, help='Where to write the regenerated CSV. Defaults to overwriting --input.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes.')
+    parser.add_argument('--shard_size', type=int, default=256, help='Rows per shard.')
+    parser.add_argument('--full', action='store_true', help='Recompute every row, even those whose calculator sources and inputs have not changed since the last build.')
 
+    args = parser.parse_args()
 
- 
\ No newline at end of file
+    generate_csv(args.input, args.output or args.input, args.workers, args.shard_size, incremental=not args.full)
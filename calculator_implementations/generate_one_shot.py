@@ -1,7 +1,7 @@
-import importlib.util
 import json
 import os
 import copy
+from calculator_registry import CalculatorRegistry
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,30 +14,13 @@ with open(os.path.join(SCRIPT_DIR, "name_to_python.json"), "r") as f:
 with open(os.path.join(PROJECT_ROOT, "evaluation", "one_shot_finalized_explanation.json"), "r") as f:
     one_shot_finalized_explanation = json.load(f)
 
+registry = CalculatorRegistry()
+
 def get_explanation(calculator_id, input_parameters, calc_info):
     """
     Get explanation and answer for a calculator given its input parameters
     """
-    # Get the file path and explanation function name
-    relative_file_path = calc_info[str(calculator_id)]["file path"]
-    explanation_func_name = calc_info[str(calculator_id)]["explanation function"]
-    
-    # Construct the full path by joining with calculator_implementations directory
-    file_path = os.path.join(SCRIPT_DIR, relative_file_path)
-    
-    # Get just the filename without path and extension
-    file_name = os.path.splitext(os.path.basename(file_path))[0]
-    
-    # Import the module dynamically
-    spec = importlib.util.spec_from_file_location(file_name, file_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    
-    # Get the explanation function
-    explanation_func = getattr(module, explanation_func_name)
-    
-    # Call the explanation function with input parameters
-    return explanation_func(input_parameters)
+    return registry.run(calculator_id, input_parameters)
 
 
 # For each calculator in the synthetic instances:
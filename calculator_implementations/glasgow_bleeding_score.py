@@ -113,3 +113,54 @@ The total Glasgow-Blatchford Score is calculated by summing the points for each
     explanation += f"The patient's Glasgow Bleeding Score is {score}."
 
     return {"Explanation": explanation, "Answer": score}
+
+
+def compute_glasgow_bleeding_score(input_parameters, context):
+
+    score = 0
+
+    hemoglobin = context.conversion(input_parameters["hemoglobin"][0], "hemoglobin", 64500, None, input_parameters["hemoglobin"][1], "g/dL")
+    bun = context.conversion(input_parameters["bun"][0], "BUN", 28.08, None, input_parameters["bun"][1], "mg/dL")
+    systolic_bp = input_parameters["sys_bp"][0]
+    heart_rate = input_parameters["heart_rate"][0]
+
+    if input_parameters["sex"] == "Male":
+        if 12 <= hemoglobin < 13:
+            score += 1
+        elif 10 <= hemoglobin < 12:
+            score += 3
+        elif hemoglobin < 10:
+            score += 6
+    else:
+        if 10 <= hemoglobin < 12:
+            score += 1
+        elif hemoglobin < 10:
+            score += 6
+
+    if 18.2 <= bun < 22.4:
+        score += 2
+    elif 22.4 <= bun < 28:
+        score += 3
+    elif 28 <= bun <= 70:
+        score += 4
+    elif bun > 70:
+        score += 6
+
+    if 100 <= systolic_bp < 110:
+        score += 1
+    elif 90 <= systolic_bp < 100:
+        score += 2
+    elif systolic_bp < 90:
+        score += 3
+
+    if heart_rate >= 100:
+        score += 1
+
+    if input_parameters.get("melena_present"):
+        score += 1
+
+    for parameter in ["syncope", "hepatic_disease_history", "cardiac_failure"]:
+        if input_parameters.get(parameter):
+            score += 2
+
+    return score
@@ -50,3 +50,18 @@ For each criteria, if a patient's value is not mentioned/not testable in the not
     explanation += f"Hence, the patient's glasgow coma score is {glasgow_score}."
 
     return {"Explanation": explanation , "Answer": glasgow_score}
+
+
+def compute_glasgow_coma_score(input_variables, context=None):
+
+    glasgow_dictionary = {"best_eye_response": {"eyes open spontaneously": 4, "eye opening to verbal command": 3, "eye opening to pain": 2, "no eye opening": 1, 'not testable': 4},
+                          "best_verbal_response": {"oriented": 5, "confused": 4, "inappropriate words": 3, "incomprehensible sounds": 2, "no verbal response": 1, 'not testable': 4},
+                          "best_motor_response": {"obeys commands": 6, "localizes pain": 5, "withdrawal from pain": 4, "flexion to pain": 3, "extension to pain": 2, "no motor response": 1},
+                          }
+
+    glasgow_score = 0
+    glasgow_score += glasgow_dictionary["best_eye_response"][input_variables["best_eye_response"]]
+    glasgow_score += glasgow_dictionary["best_verbal_response"][input_variables["best_verbal_response"]]
+    glasgow_score += glasgow_dictionary["best_motor_response"][input_variables["best_motor_response"]]
+
+    return glasgow_score
@@ -54,3 +54,23 @@ The total HAS-BLED score is calculated by summing the points for each criterion.
     explanation += f"Hence, the patient's HAS-BLED score is {has_bled_score}."
 
     return {"Explanation": explanation, "Answer": has_bled_score}
+
+
+def compute_has_bled_score(input_variables, context):
+
+    has_bled_score = 0
+
+    num_alcolic_drinks = int(float(input_variables["alcoholic_drinks"]))
+    age_value = context.age(input_variables["age"])
+
+    if age_value > 65:
+        has_bled_score += 1
+
+    if num_alcolic_drinks >= 8:
+        has_bled_score += 1
+
+    for parameter in ["hypertension", "liver_disease_has_bled", "renal_disease_has_bled", "stroke", "prior_bleeding", "labile_inr", "medications_for_bleeding"]:
+        if input_variables.get(parameter):
+            has_bled_score += 1
+
+    return has_bled_score
@@ -127,4 +127,32 @@ The total score is calculated by summing the points for each criterion.
     explanation += f"Based on the patient's data, the HEART Score is {total_score}."
 
     return {"Explanation": explanation, "Answer": total_score}
-        
+
+
+def compute_heart_score(input_parameters, context):
+
+    history_points = {'Slightly suspicious': 0, 'Moderately suspicious': 1, 'Highly suspicious': 2}
+    electrocardiogram_points = {'Normal': 0, 'Non-specific repolarization disturbance': 1, 'Significant ST deviation': 2}
+    initial_troponin_points = {'less than or equal to normal limit': 0, 'between the normal limit or up to three times the normal limit': 1, 'greater than three times normal limit': 2}
+    risk_factors = ['hypertension', 'hypercholesterolemia', 'diabetes_mellitus', 'obesity', 'smoking', 'family_with_cvd', 'atherosclerotic_disease']
+
+    total_score = history_points[input_parameters.get('history', 'Slightly suspicious')]
+    total_score += electrocardiogram_points[input_parameters.get('electrocardiogram', 'Normal')]
+
+    age = context.age(input_parameters["age"])
+
+    if 45 <= age < 65:
+        total_score += 1
+    elif age >= 65:
+        total_score += 2
+
+    risk_factors_count = sum(1 for factor in risk_factors if input_parameters.get(factor))
+
+    if 1 <= risk_factors_count <= 2:
+        total_score += 1
+    elif risk_factors_count >= 3:
+        total_score += 2
+
+    total_score += initial_troponin_points[input_parameters.get('initial_troponin', 'less than or equal to normal limit')]
+
+    return total_score
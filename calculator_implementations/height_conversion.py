@@ -87,3 +87,45 @@ def height_conversion_explanation_in(height_info):
         height_in = height_info[0]
         explanation = f"The patient's height is {height_in} in. "
         return explanation, height_in
+
+
+def height_conversion(height_info):
+
+    if len(height_info) == 4:
+        return round_number((height_info[0] * 12 + height_info[2]) * 0.0254)
+    elif height_info[-1] == "m":
+        return height_info[0]
+    elif height_info[-1] == "cm":
+        return round_number(height_info[0] / 100)
+    elif height_info[-1] == "ft":
+        return round_number(height_info[0] * 0.3048)
+    elif height_info[-1] == "in":
+        return round_number(height_info[0] * 0.0254)
+
+
+def height_conversion_cm(height_info):
+
+    if len(height_info) == 4:
+        return round_number((height_info[0] * 12 + height_info[2]) * 2.54)
+    elif height_info[-1] == "m":
+        return round_number(height_info[0] * 100)
+    elif height_info[-1] == "cm":
+        return height_info[0]
+    elif height_info[-1] == "ft":
+        return round_number(height_info[0] * 30.48)
+    elif height_info[-1] == "in":
+        return round_number(height_info[0] * 2.54)
+
+
+def height_conversion_in(height_info):
+
+    if len(height_info) == 4:
+        return round_number(height_info[0] * 12 + height_info[2])
+    elif height_info[-1] == "m":
+        return round_number(height_info[0] * 39.3701)
+    elif height_info[-1] == "cm":
+        return round_number(height_info[0] * 0.393701)
+    elif height_info[-1] == "ft":
+        return round_number(height_info[0] * 12)
+    elif height_info[-1] == "in":
+        return height_info[0]
@@ -30,3 +30,15 @@ def compute_homa_ir_explanation(input_variables):
     return {"Explanation": explanation, "Answer": answer}
 
 
+def compute_homa_ir(input_variables, context):
+
+    insulin = input_variables["insulin"][0]
+
+    if input_variables["insulin"][1] == "pmol/L":
+        insulin = input_variables["insulin"][0] * 6
+    elif input_variables["insulin"][1] == "ng/mL":
+        insulin = input_variables["insulin"][0] * 24.8
+
+    glucose = context.conversion(input_variables["glucose"][0], "glucose", 180.16, None, input_variables["glucose"][1], "mg/dL")
+
+    return round_number((insulin * glucose)/405)
@@ -27,4 +27,12 @@ def ibw_explanation(input_variables):
     return {"Explanation": explanation, "Answer": ibw}
 
 
+def compute_ibw(input_variables, context=None):
 
+    height = height_conversion.height_conversion_in(input_variables["height"])
+    gender = input_variables["sex"]
+
+    if gender == "Male":
+        return round_number(50 + 2.3 * (height - 60))
+    elif gender == "Female":
+        return round_number(45.5 + 2.3 * (height - 60))
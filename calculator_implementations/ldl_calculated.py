@@ -1,5 +1,7 @@
 import unit_converter_new
 from rounding import round_number
+import numpy as np
+import batch_columns
 
 def compute_ldl_explanation(input_parameters):
 
@@ -21,3 +23,23 @@ def compute_ldl_explanation(input_parameters):
 
     return {"Explanation": explanation, "Answer": answer}
 
+
+def compute_ldl(input_parameters, context):
+
+    total_cholestrol = context.conversion(input_parameters["total_cholesterol"][0], "total cholesterol", 386.654, None, input_parameters["total_cholesterol"][1], "mg/dL")
+    hdl_cholestrol = context.conversion(input_parameters["hdl_cholesterol"][0], "hdl cholesterol", 386.654, None, input_parameters["hdl_cholesterol"][1], "mg/dL")
+    triglycerides = context.conversion(input_parameters["triglycerides"][0], "triglycerides", 861.338, None, input_parameters["triglycerides"][1], "mg/dL")
+
+    return round_number(total_cholestrol - hdl_cholestrol - (triglycerides/5))
+
+
+def compute_batch(columns):
+
+    total_cholestrol = batch_columns.convert_by_unit(batch_columns.column_values(columns, "total_cholesterol"), batch_columns.column_units(columns, "total_cholesterol", "mg/dL"),
+                                                     lambda value, unit: unit_converter_new.conversion(value, "total cholesterol", 386.654, None, unit, "mg/dL"))
+    hdl_cholestrol = batch_columns.convert_by_unit(batch_columns.column_values(columns, "hdl_cholesterol"), batch_columns.column_units(columns, "hdl_cholesterol", "mg/dL"),
+                                                   lambda value, unit: unit_converter_new.conversion(value, "hdl cholesterol", 386.654, None, unit, "mg/dL"))
+    triglycerides = batch_columns.convert_by_unit(batch_columns.column_values(columns, "triglycerides"), batch_columns.column_units(columns, "triglycerides", "mg/dL"),
+                                                  lambda value, unit: unit_converter_new.conversion(value, "triglycerides", 861.338, None, unit, "mg/dL"))
+
+    return round_number(total_cholestrol - hdl_cholestrol - (triglycerides/5))
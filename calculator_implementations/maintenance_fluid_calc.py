@@ -27,4 +27,13 @@ def maintenance_fluid_explanation(input_parameters):
     return {"Explanation": explanation, "Answer": answer}
 
 
+def compute_maintenance_fluid(input_parameters, context):
 
+    weight = context.weight(input_parameters["weight"])
+
+    if weight < 10:
+        return round_number(weight * 4)
+    elif 10 <= weight <= 20:
+        return round_number(40 + 2 * (weight - 10))
+    elif weight > 20:
+        return round_number(60 + (weight - 20))
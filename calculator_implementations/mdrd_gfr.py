@@ -2,6 +2,8 @@ import math
 import unit_converter_new
 import age_conversion
 from rounding import round_number
+import numpy as np
+import batch_columns
 
 def mrdr_gfr_explanation(input_variables):
     gender = input_variables["sex"]
@@ -43,3 +45,27 @@ def mrdr_gfr_explanation(input_variables):
 
     return {"Explanation": explanation, "Answer": gfr}
 
+
+def compute_mdrd_gfr(input_variables, context):
+
+    age = context.age(input_variables["age"])
+    creatinine_conc = context.conversion(input_variables["creatinine"][0], "Creatinine", 113.12, None, input_variables["creatinine"][1], "mg/dL")
+
+    race_coefficient = 1.212 if input_variables.get("race") == "Black" else 1
+    gender_coefficient = 0.742 if input_variables["sex"] == "Female" else 1
+
+    return round_number(175 * math.exp(math.log(creatinine_conc) * -1.154) * math.exp(math.log(age) * -0.203) * race_coefficient * gender_coefficient)
+
+
+def compute_batch(columns):
+
+    age = batch_columns.convert_by_unit(batch_columns.column_values(columns, "age"), batch_columns.column_units(columns, "age", "years"),
+                                        lambda value, unit: age_conversion.age_conversion([value, unit]))
+    creatinine_conc = batch_columns.convert_by_unit(batch_columns.column_values(columns, "creatinine"), batch_columns.column_units(columns, "creatinine", "mg/dL"),
+                                                    lambda value, unit: unit_converter_new.conversion(value, "Creatinine", 113.12, None, unit, "mg/dL"))
+
+    race_coefficient = np.where(batch_columns.column_strings(columns, "race", len(age)) == "Black", 1.212, 1)
+    gender_coefficient = np.where(batch_columns.column_strings(columns, "sex", len(age)) == "Female", 0.742, 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return round_number(175 * np.exp(np.log(creatinine_conc) * -1.154) * np.exp(np.log(age) * -0.203) * race_coefficient * gender_coefficient)
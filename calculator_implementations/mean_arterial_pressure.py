@@ -1,4 +1,6 @@
 from rounding import round_number
+import numpy as np
+import batch_columns
 
 def mean_arterial_pressure_explanation(variables):
 
@@ -13,3 +15,14 @@ def mean_arterial_pressure_explanation(variables):
     output += f"Hence, the patient's mean arterial pressure is {value} mm Hg."
 
     return {"Explanation": output, "Answer": value}
+
+
+def compute_mean_arterial_pressure(variables, context=None):
+    return round_number(variables['sys_bp'][0]/3 + 2*variables['dia_bp'][0]/3)
+
+
+def compute_batch(columns):
+    sys_bp = batch_columns.column_values(columns, "sys_bp")
+    dia_bp = batch_columns.column_values(columns, "dia_bp")
+
+    return round_number(sys_bp/3 + 2*dia_bp/3)
@@ -99,3 +99,41 @@ def compute_meldna_explanation(input_variables):
         explanation += f"The patient's MELD (i) score is less than 11, and so we do not apply the second equation, making the patient's MELD Na score, {round(meldna)} points."
 
     return {"Explanation": explanation, "Answer": round(meldna)}
+
+
+def compute_meldna(input_variables, context):
+
+    creatinine = context.conversion(input_variables["creatinine"][0], "creatinine", 113.12, None, input_variables["creatinine"][1], "mg/dL")
+
+    if creatinine < 1.0:
+        creatinine = 1.0
+    elif creatinine > 4.0:
+        creatinine = 4.0
+    elif input_variables.get("dialysis_twice", False) or input_variables.get("cvvhd", False):
+        creatinine = 4.0
+
+    bilirubin = context.conversion(input_variables["bilirubin"][0], "bilirubin", None, None, input_variables["bilirubin"][1], "mg/dL")
+
+    if bilirubin < 1.0:
+        bilirubin = 1.0
+
+    inr = input_variables["inr"]
+
+    if inr < 1.0:
+        inr = 1.0
+
+    sodium = context.conversion(input_variables["sodium"][0], "sodium", 22.99, 1, input_variables["sodium"][1], "mEq/L")
+
+    if sodium < 125:
+        sodium = 125
+    elif sodium > 137:
+        sodium = 137
+
+    meld_i = 0.957 * math.log(creatinine) + 0.378 * math.log(bilirubin) + 1.120 * math.log(inr) + 0.643
+    meld_10 = round(round(meld_i, 1) * 10)
+
+    if meld_10 > 11:
+        meld = round(meld_10 + 1.32 * (137 - sodium) - (0.033 * meld_10 * (137 - sodium)))
+        return 40 if meld > 40 else round(meld)
+
+    return round(meld_10)
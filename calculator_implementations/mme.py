@@ -84,3 +84,39 @@ def mme_explanation(input_parameters):
         
     return {"Explanation": explanation, "Answer": mme_equivalent}
 
+
+def compute_mme(input_parameters, context):
+
+    mme_drug = {"Codeine": 0.15,
+            "FentaNYL buccal": 0.13,
+            "FentANYL patch": 2.4,
+            "HYDROcodone": 1,
+            "HYDROmorphone": 5,
+            "Methadone": 4.7,
+            "Morphine": 1,
+            "OxyCODONE": 1.5,
+            "OxyMORphone": 3,
+            "Tapentadol": 0.4,
+            "TraMADol": 0.2,
+            "Buprenorphine": 10}
+
+    mme_equivalent = 0
+
+    for drug_name in input_parameters:
+        if "Day" in drug_name:
+            continue
+
+        name = drug_name.split(" Dose")[0]
+
+        units = input_parameters[name + " Dose"][1]
+        target_unit = "mg" if name != "FentaNYL buccal" and name != "FentaNYL patch" else "µg"
+
+        drug_mg = context.conversion(input_parameters[name + " Dose"][0], name, None, None, units, target_unit)
+
+        dose_per_day = input_parameters[name + " Dose Per Day"][0]
+
+        mme_equivalent += dose_per_day * mme_drug[name] * drug_mg
+
+        mme_equivalent = round_number(mme_equivalent)
+
+    return mme_equivalent
@@ -0,0 +1,62 @@
+import adjusted_body_weight
+import age_conversion
+import anion_gap
+import ideal_body_weight
+import unit_converter_new
+import weight_conversion
+
+
+def cache_key(value):
+    # The type is part of the key so that e.g. 140 and 140.0 are kept apart; some conversions return
+    # their input unchanged and the answers would otherwise print differently.
+    if isinstance(value, list):
+        return tuple(cache_key(item) for item in value)
+
+    return (type(value), value)
+
+
+class PatientContext:
+    """
+    Caches intermediate results (unit conversions, age, anion gap, IBW/ABW) while several calculators run on
+    the same patient's parameters, e.g. delta ratio -> delta gap -> anion gap. Pass the same context to each
+    compute function; results are keyed by the parameter values they were computed from.
+    """
+
+    def __init__(self):
+        self.results = {}
+
+    def cached(self, key, compute, *arguments):
+        try:
+            return self.results[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable parameter values are computed every time.
+            return compute(*arguments)
+
+        result = compute(*arguments)
+        self.results[key] = result
+
+        return result
+
+    def conversion(self, value, compound, molar_mass, valence, src_unit, tgt_unit):
+        key = ("conversion", cache_key(value), compound, molar_mass, valence, src_unit, tgt_unit)
+        return self.cached(key, unit_converter_new.conversion, value, compound, molar_mass, valence, src_unit, tgt_unit)
+
+    def age(self, age_info):
+        return self.cached(("age", cache_key(age_info)), age_conversion.age_conversion, age_info)
+
+    def weight(self, weight_info):
+        return self.cached(("weight", cache_key(weight_info)), weight_conversion.weight_conversion, weight_info)
+
+    def anion_gap(self, input_parameters):
+        key = ("anion_gap", cache_key(input_parameters["sodium"]), cache_key(input_parameters["chloride"]), cache_key(input_parameters["bicarbonate"]))
+        return self.cached(key, anion_gap.compute_anion_gap, input_parameters, self)
+
+    def ibw(self, input_parameters):
+        key = ("ibw", cache_key(input_parameters["sex"]), cache_key(input_parameters["height"]))
+        return self.cached(key, ideal_body_weight.compute_ibw, input_parameters, self)
+
+    def abw(self, input_parameters):
+        key = ("abw", cache_key(input_parameters["sex"]), cache_key(input_parameters["height"]), cache_key(input_parameters["weight"]))
+        return self.cached(key, adjusted_body_weight.compute_abw, input_parameters, self)
@@ -96,3 +96,30 @@ The total number of criteria met is taken by summing the points for each criteri
     explanation += f"Hence, the number of PERC rule criteria met by the patient is {perc_count}."
 
     return {"Explanation": explanation, "Answer": perc_count}
+
+
+def compute_perc_rule(input_parameters, context):
+
+    perc_count = 0
+
+    age = context.age(input_parameters["age"])
+    heart_rate = input_parameters["heart_rate"][0]
+    oxygen_sat = input_parameters["oxygen_sat"][0]
+
+    if age >= 50:
+        perc_count += 1
+
+    if heart_rate >= 100:
+        perc_count += 1
+
+    if oxygen_sat < 95:
+        perc_count += 1
+
+    for parameter in ["unilateral_leg_swelling", "hemoptysis", "recent_surgery_or_trauma", "hormonal_use"]:
+        if input_parameters.get(parameter):
+            perc_count += 1
+
+    if input_parameters.get("previous_dvt") or input_parameters.get("previous_pe"):
+        perc_count += 1
+
+    return perc_count
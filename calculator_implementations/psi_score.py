@@ -191,3 +191,61 @@ The total score is calculated by summing the points for each criterion.
 
     return {"Explanation": explanation, "Answer": psi_score}
 
+
+def compute_psi_score(input_variables, context):
+
+    temperature = convert_temperature.fahrenheit_to_celsius(input_variables["temperature"][0], input_variables["temperature"][1])
+    bun = context.conversion(input_variables["bun"][0], 'BUN', 28.02, None, input_variables["bun"][1], "mg/dL")
+    sodium = context.conversion(input_variables["sodium"][0], "sodium", 22.99, 1, input_variables["sodium"][1], "mmol/L")
+    glucose = context.conversion(input_variables["glucose"][0], "glucose", 180.16, None, input_variables["glucose"][1], "mg/dL")
+    partial_pressure_oxygen = input_variables.get("partial_pressure_oxygen")
+
+    psi_score = 0
+
+    psi_score += context.age(input_variables["age"])
+
+    if input_variables["sex"] == "Female":
+        psi_score -= 10
+
+    parameters = {"nursing_home_resident": 10, "neoplastic_disease": 30, "liver_disease": 20, "chf": 10,
+                  "cerebrovascular_disease": 10, "renal_disease": 10, "altered_mental_status": 20, "pleural_effusion": 10}
+
+    for parameter, points in parameters.items():
+        if input_variables.get(parameter):
+            psi_score += points
+
+    if input_variables["heart_rate"][0] >= 125:
+        psi_score += 10
+
+    if temperature < 35 or temperature > 39.9:
+        psi_score += 15
+
+    if input_variables["pH"] < 7.35:
+        psi_score += 30
+
+    if input_variables["respiratory_rate"][0] >= 30:
+        psi_score += 20
+
+    if input_variables["sys_bp"][0] < 90:
+        psi_score += 20
+
+    if bun >= 30:
+        psi_score += 20
+
+    if sodium < 130:
+        psi_score += 20
+
+    if glucose >= 250:
+        psi_score += 10
+
+    if input_variables["hematocrit"][0] < 30:
+        psi_score += 10
+
+    if partial_pressure_oxygen[1] == "mm Hg":
+        if partial_pressure_oxygen[0] < 60:
+            psi_score += 10
+    elif partial_pressure_oxygen[1] == "kPa":
+        if partial_pressure_oxygen[0] < 8:
+            psi_score += 10
+
+    return psi_score
@@ -1,4 +1,6 @@
 from rounding import round_number
+import numpy as np
+import batch_columns
 
 def bazett_calculator_explanation(input_variables):
     heart_rate = input_variables["heart_rate"][0]
@@ -18,3 +20,20 @@ def bazett_calculator_explanation(input_variables):
     explanation += f"The patient's corrected QT interval (QTc) is {qt_c} msec."
 
     return {"Explanation": explanation, "Answer": qt_c}
+
+
+def compute_bazett(input_variables, context=None):
+    heart_rate = input_variables["heart_rate"][0]
+    qt_interval = input_variables["qt_interval"][0]
+
+    rr_interval_sec = round_number(60 / heart_rate)
+    return round_number(qt_interval/(rr_interval_sec ** 0.5))
+
+
+def compute_batch(columns):
+    heart_rate = batch_columns.column_values(columns, "heart_rate")
+    qt_interval = batch_columns.column_values(columns, "qt_interval")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rr_interval_sec = round_number(60 / heart_rate)
+        return round_number(qt_interval/(rr_interval_sec ** 0.5))
@@ -20,3 +20,10 @@ def framingham_calculator_explanation(input_variables):
 
     return {"Explanation": explanation, "Answer": qt_c}
 
+
+def compute_framingham(input_variables, context=None):
+    heart_rate = input_variables["heart_rate"][0]
+    qt_interval = input_variables["qt_interval"][0]
+
+    rr_interval_sec = round_number(60 / heart_rate)
+    return round_number(qt_interval + (154 * (1 - rr_interval_sec)))
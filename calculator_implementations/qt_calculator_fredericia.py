@@ -20,3 +20,9 @@ def fredericia_calculator_explanation(input_variables):
     return {"Explanation": explanation, "Answer": qt_c}
 
 
+def compute_fredericia(input_variables, context=None):
+    heart_rate = input_variables["heart_rate"][0]
+    qt_interval = input_variables["qt_interval"][0]
+
+    rr_interval_sec = round_number(60 / heart_rate)
+    return round_number(qt_interval/(rr_interval_sec) ** (1/3))
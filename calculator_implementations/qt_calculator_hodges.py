@@ -18,3 +18,11 @@ def hodges_calculator_explanation(input_variables):
     explanation += f"The patient's corrected QT interval (QTc) is {qt_c} msec."
 
     return {"Explanation": explanation, "Answer": qt_c}
+
+
+def compute_hodges(input_variables, context=None):
+    heart_rate = input_variables["heart_rate"][0]
+    qt_interval = input_variables["qt_interval"][0]
+
+    rr_interval_sec = round_number(60 / heart_rate)
+    return round_number(qt_interval + 1.75 * ((60 /rr_interval_sec) - 60))
@@ -15,3 +15,10 @@ def rautaharju_calculator_explanation(input_variables):
     explanation += f"The patient's corrected QT interval (QTc) is {qt_c} msec."
 
     return {"Explanation": explanation, "Answer": qt_c}
+
+
+def compute_rautaharju(input_variables, context=None):
+    heart_rate = input_variables["heart_rate"][0]
+    qt_interval = input_variables["qt_interval"][0]
+
+    return round_number(qt_interval * (120 + heart_rate) / 180)
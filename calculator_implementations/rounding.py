@@ -1,4 +1,5 @@
 from math import log10, floor
+import numpy as np
 
 def round_number(num):
     """
@@ -8,7 +9,11 @@ def round_number(num):
     
     This ensures small numbers like 0.000085 or 0.000015 keep their precision.
     Works correctly with both positive and negative numbers.
+    NumPy arrays are rounded element-wise by round_numbers.
     """
+    if isinstance(num, np.ndarray):
+        return round_numbers(num)
+
     if num == 0:
         return 0
         
@@ -22,3 +27,32 @@ def round_number(num):
     else:
         # For smaller numbers, preserve appropriate significant digits
         return round(num, sig_digits)
+
+
+def round_numbers(nums):
+    """
+    Element-wise round_number for a NumPy array, giving the same floats as calling round_number on each value.
+    NaN and infinite values are passed through unchanged.
+
+    np.round rounds the binary value of num * 1e5, so it can disagree with round() when that product lies
+    on (or within rounding error of) a .5 boundary. Those values, and the ones below 1e-4 that keep
+    significant digits instead, are rounded one at a time with round_number.
+    """
+    nums = np.asarray(nums, dtype=float)
+
+    with np.errstate(invalid="ignore", over="ignore"):
+        scaled = nums * 1e5
+        rounded = np.round(scaled) / 1e5
+
+        tie_distance = np.abs(scaled - np.floor(scaled) - 0.5)
+        one_at_a_time = (np.abs(nums) < 1e-4) | (np.abs(scaled) >= 2**52) | (tie_distance < 1e-6 + np.abs(scaled) * 1e-15)
+
+    one_at_a_time &= np.isfinite(nums) & (nums != 0)
+
+    for i in np.flatnonzero(one_at_a_time):
+        rounded.flat[i] = round_number(float(nums.flat[i]))
+
+    rounded[nums == 0] = 0
+    rounded[~np.isfinite(nums)] = nums[~np.isfinite(nums)]
+
+    return rounded
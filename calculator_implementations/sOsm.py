@@ -20,3 +20,12 @@ def compute_serum_osmolality_explanation(input_parameters):
     explanation += f"The patient's calculated serum osmolality concentration is {serum_os} mmol/L. This is equalivalent to {serum_os} mOsm/kg."
 
     return {"Explanation": explanation, "Answer": serum_os}
+
+
+def compute_serum_osmolality(input_parameters, context):
+
+    sodium = context.conversion(input_parameters["sodium"][0], "sodium", 22.99, 1, input_parameters["sodium"][1], "mmol/L")
+    bun = context.conversion(input_parameters["bun"][0], "bun", 28.02, None, input_parameters["bun"][1], "mg/dL")
+    glucose = context.conversion(input_parameters["glucose"][0], "glucose", 180.16, None, input_parameters["glucose"][1], "mg/dL")
+
+    return round_number(2 * sodium + (bun / 2.8) + (glucose / 18))
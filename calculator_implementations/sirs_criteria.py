@@ -99,5 +99,40 @@ The total number of criteria met is taken by summing the score for each criteria
     explanation += f"Hence, the the number of SIRS criteria met by the patient is {criteria_met}."
 
     return {"Explanation": explanation, "Answer": criteria_met}
-     
 
+
+def compute_sirs_criteria(input_parameters, context=None):
+
+    temperature = input_parameters["temperature"]
+
+    temperature = convert_temperature.fahrenheit_to_celsius(temperature[0], temperature[1])
+    heart_rate = input_parameters["heart_rate"][0]
+    wbc = unit_converter_new.convert_to_units_per_liter(input_parameters["wbc"][0], input_parameters["wbc"][1], "mm^3")
+
+    criteria_met = 0
+
+    if temperature > 38 or temperature < 36:
+        criteria_met += 1
+
+    if heart_rate > 90:
+        criteria_met += 1
+
+    if wbc > 12000 or wbc < 4000:
+        criteria_met += 1
+
+    resp_met = 'respiratory_rate' in input_parameters and input_parameters['respiratory_rate'][0] > 20
+
+    if 'paco2' in input_parameters:
+        paco2 = input_parameters['paco2'][0]
+
+        if paco2 < 32:
+            paco2_met = True
+        elif paco2 > 32:
+            paco2_met = False
+    else:
+        paco2_met = False
+
+    if resp_met or paco2_met:
+        criteria_met += 1
+
+    return criteria_met
@@ -21,3 +21,11 @@ def compute_sodium_correction_hyperglycemia_explanation(input_variables):
     explanation += f"Hence, the patient's corrected concentration of sodium is {corrected_sodium} mEq/L."
 
     return {"Explanation": explanation, "Answer": corrected_sodium}
+
+
+def compute_sodium_correction_hyperglycemia(input_variables, context):
+
+    sodium = context.conversion(input_variables["sodium"][0], "sodium", 22.99, 1, input_variables["sodium"][1], "mEq/L")
+    glucose = context.conversion(input_variables["glucose"][0], "glucose", 180.16, None, input_variables["glucose"][1], "mg/dL")
+
+    return round_number(sodium + 0.024 * (glucose - 100))
@@ -180,3 +180,88 @@ The total SOFA Score is calculated by summing the points for each criterion.
     return {"Explanation": explanation, "Answer": sofa_score}
 
 
+def compute_sofa(input_parameters, context):
+
+    sofa_score = 0
+
+    pao2 = input_parameters["pao2"][0]
+    fio2 = input_parameters["fio2"][0]
+
+    dopamine = input_parameters.get("dopamine", [0])
+    dobutamine = input_parameters.get("dobutamine", [0])
+    epinephrine = input_parameters.get("epinephrine", [0])
+    norepinephrine = input_parameters.get("norepinephrine", [0])
+
+    mechanical_ventilation = input_parameters.get("mechanical_ventilation", False)
+    cpap = input_parameters.get("cpap", False)
+
+    ratio = round_number(pao2/(fio2/100))
+
+    if 300 <= ratio < 400:
+        sofa_score += 1
+    elif 200 <= ratio < 300:
+        sofa_score += 2
+    elif ratio <= 199 and not mechanical_ventilation and not cpap:
+        sofa_score += 2
+    elif 100 <= ratio < 199 and (mechanical_ventilation or cpap):
+        sofa_score += 3
+    elif ratio < 100 and (mechanical_ventilation or cpap):
+        sofa_score += 4
+
+    if (dopamine[0] > 15 or epinephrine[0] > 0.1 or norepinephrine[0] > 0.1):
+        sofa_score += 4
+    elif (dopamine[0] > 5 or 0 < epinephrine[0] <= 0.1 or 0 < norepinephrine[0] <= 0.1):
+        sofa_score += 3
+    elif 0 < dopamine[0] <= 5 or dobutamine[0]:
+        sofa_score += 2
+    elif ('sys_bp' in input_parameters and 'dia_bp' in input_parameters) and (1/3 * input_parameters['sys_bp'][0] + 2/3 * input_parameters['dia_bp'][0] < 70) and (not dobutamine[0] and not epinephrine[0] and not norepinephrine[0]):
+        sofa_score += 1
+
+    gcs = input_parameters.get("gcs", 15)
+
+    if gcs < 6:
+        sofa_score += 4
+    elif 6 <= gcs <= 9:
+        sofa_score += 3
+    elif 10 <= gcs <= 12:
+        sofa_score += 2
+    elif 13 <= gcs <= 14:
+        sofa_score += 1
+
+    bilirubin = context.conversion(input_parameters['bilirubin'][0], 'bilirubin', 584.66, None, input_parameters['bilirubin'][1], "mg/dL")
+
+    if 1.2 <= bilirubin < 2.0:
+        sofa_score += 1
+    elif 2.0 <= bilirubin < 6.0:
+        sofa_score += 2
+    elif 6.0 <= bilirubin < 12.0:
+        sofa_score += 3
+    elif bilirubin >= 12.0:
+        sofa_score += 4
+
+    platelet_count = unit_converter_new.convert_to_units_per_liter(input_parameters["platelet_count"][0], input_parameters["platelet_count"][1], "µL")
+
+    if 100000 <= platelet_count < 150000:
+        sofa_score += 1
+    elif 50000 <= platelet_count < 100000:
+        sofa_score += 2
+    elif 20000 <= platelet_count < 50000:
+        sofa_score += 3
+    elif platelet_count < 20000:
+        sofa_score += 4
+
+    creatinine = 0
+
+    if 'creatinine' in input_parameters:
+        creatinine = context.conversion(input_parameters['creatinine'][0], "creatinine", 113.12, None, input_parameters['creatinine'][1], "mg/dL")
+
+    if creatinine > 5.0 or ('urine_output' in input_parameters and input_parameters['urine_output'][0] < 200):
+        sofa_score += 4
+    elif 3.5 <= creatinine <= 5.0 or ('urine_output' in input_parameters and input_parameters['urine_output'][0] < 500):
+        sofa_score += 3
+    elif 2.0 <= creatinine < 3.5:
+        sofa_score += 2
+    elif 1.2 <= creatinine < 2.0:
+        sofa_score += 1
+
+    return sofa_score
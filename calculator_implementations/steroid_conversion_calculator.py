@@ -54,3 +54,25 @@ def compute_steroid_conversion_explanation(input_parameters):
 
     return {"Explanation": explanation, "Answer": converted_amount}
 
+
+def compute_steroid_conversion(input_parameters, context):
+
+    conversion_dict = {"Betamethasone IV": 1,
+                    "Cortisone PO": 33.33,
+                    "Dexamethasone IV": 1,
+                    "Dexamethasone PO": 1,
+                    "Hydrocortisone IV": 26.67,
+                    "Hydrocortisone PO": 26.67,
+                    "MethylPrednisoLONE IV": 5.33,
+                    "MethylPrednisoLONE PO": 5.33,
+                    "PrednisoLONE PO": 6.67,
+                    "PredniSONE PO": 6.67,
+                    "Triamcinolone IV": 5.33
+                }
+
+    input_drug_name, input_drug_mass, input_unit = input_parameters["input steroid"][0], input_parameters["input steroid"][1], input_parameters["input steroid"][2]
+    input_drug_mass = context.conversion(input_drug_mass, input_drug_name, None, None, input_unit, "mg")
+
+    conversion_factor = round_number(conversion_dict[input_parameters["target steroid"]] / conversion_dict[input_drug_name])
+
+    return round_number(input_drug_mass * conversion_factor)
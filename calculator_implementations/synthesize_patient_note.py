@@ -1,37 +1,38 @@
 import json
 import random
+import argparse
+import multiprocessing
+import numpy as np
 import steroid_conversion_calculator
 from datetime import datetime, timedelta
-import importlib.util
+from calculator_registry import CalculatorRegistry
+from patient_context import PatientContext
 import height_conversion
 from rounding import round_number
 
-#random.seed(42)
+def random_date(rng=random):
 
+    month = rng.randint(1, 12)
 
-def random_date():
-
-    month = random.randint(1, 12)
-
-    year = random.randint(2000, 2024)
+    year = rng.randint(2000, 2024)
 
     if month in set([1, 3, 5, 7, 8, 10, 12]):
-        day = random.randint(1, 31)
+        day = rng.randint(1, 31)
     elif month == 2:
         if month % 4 == 0:
-            day = random.randint(1, 29)
+            day = rng.randint(1, 29)
         else:
-            day = random.randint(1, 28)
+            day = rng.randint(1, 28)
     else:
-        day = random.randint(1,30)
+        day = rng.randint(1,30)
 
     return month, day, year
 
-def estimated_date_calculator():
+def estimated_date_calculator(rng=random):
 
-    cycle_length = random.randint(20, 30)
+    cycle_length = rng.randint(20, 30)
 
-    month, day, year = random_date()
+    month, day, year = random_date(rng)
 
     date_obj = datetime(year, month, day)
     
@@ -44,11 +45,11 @@ def estimated_date_calculator():
     return edd_note, input_parameters
 
 
-def estimated_date_of_conception():
+def estimated_date_of_conception(rng=random):
 
-    cycle_length = random.randint(20, 30)
+    cycle_length = rng.randint(20, 30)
 
-    month, day, year = random_date()
+    month, day, year = random_date(rng)
 
     date_obj = datetime(year, month, day)
 
@@ -61,13 +62,13 @@ def estimated_date_of_conception():
     return edc_note, input_parameters
 
 
-def estimated_gestational_age():
+def estimated_gestational_age(rng=random):
 
 
-    month, day, year = random_date()
+    month, day, year = random_date(rng)
 
-    week_to_add = random.randint(0, 37)
-    days_to_add = random.randint(0, 6)
+    week_to_add = rng.randint(0, 37)
+    days_to_add = rng.randint(0, 6)
 
     date_obj = datetime(year, month, day)
 
@@ -84,12 +85,12 @@ def estimated_gestational_age():
     return ega_note, input_parameters
 
 
-def qt_interval_patient_notes_bazett():
+def qt_interval_patient_notes_bazett(rng=random):
 
 
-    heart_rate = round(random.uniform(45, 180))
+    heart_rate = round(rng.uniform(45, 180))
 
-    qt_interval = round(random.uniform(200, 500))
+    qt_interval = round(rng.uniform(200, 500))
 
     note = f"A patient has a heart rate of {heart_rate} bpm and a QT interval of {qt_interval} msec."
 
@@ -98,22 +99,24 @@ def qt_interval_patient_notes_bazett():
     return note, input_parameters
 
 
-def qt_interval_patient_notes_framingham():
+def qt_interval_patient_notes_framingham(rng=random):
 
-    heart_rate = round(random.uniform(45, 180))
+    heart_rate = round(rng.uniform(45, 180))
 
-    qt_interval = round(random.uniform(200, 500))
+    qt_interval = round(rng.uniform(200, 500))
+
+    note = f"A patient has a heart rate of {heart_rate} bpm and a QT interval of {qt_interval} msec."
 
     input_parameters = {"heart_rate": [heart_rate, "beats per minute"], "qt_interval": [qt_interval, "msec"]}
     
     return note, input_parameters
 
 
-def qt_interval_patient_notes_fridericia():
+def qt_interval_patient_notes_fridericia(rng=random):
 
-    heart_rate = round(random.uniform(45, 180))
+    heart_rate = round(rng.uniform(45, 180))
 
-    qt_interval = round(random.uniform(200, 500))
+    qt_interval = round(rng.uniform(200, 500))
 
     note = f"A patient has a heart rate of {heart_rate} bpm and a QT interval of {qt_interval} msec."
 
@@ -122,11 +125,11 @@ def qt_interval_patient_notes_fridericia():
     return note, input_parameters
 
 
-def qt_interval_patient_notes_hodges():
+def qt_interval_patient_notes_hodges(rng=random):
 
-    heart_rate = round(random.uniform(45, 180))
+    heart_rate = round(rng.uniform(45, 180))
 
-    qt_interval = round(random.uniform(200, 500))
+    qt_interval = round(rng.uniform(200, 500))
 
     note = f"A patient has a heart rate of {heart_rate} bpm and a QT interval of {qt_interval} msec."
 
@@ -135,12 +138,12 @@ def qt_interval_patient_notes_hodges():
     return note, input_parameters
 
 
-def qt_interval_patient_notes_rautaharju():
+def qt_interval_patient_notes_rautaharju(rng=random):
 
 
-    heart_rate = round(random.uniform(45, 180))
+    heart_rate = round(rng.uniform(45, 180))
 
-    qt_interval = round(random.uniform(200, 500))
+    qt_interval = round(rng.uniform(200, 500))
 
     note = f"A patient has a heart rate of {heart_rate} bpm and a QT interval of {qt_interval} msec."
 
@@ -149,15 +152,15 @@ def qt_interval_patient_notes_rautaharju():
     return note, input_parameters
 
 
-def mme_conversion():
+def mme_conversion(rng=random):
     
     mme_drugs = ["Codeine", "FentaNYL buccal", "HYDROcodone", "HYDROmorphone", "Methadone", "Morphine", 
                  "OxyCODONE", "OxyMORphone", "Tapentadol", "TraMADol"]
     
 
-    num_instances = random.randint(1,3)
+    num_instances = rng.randint(1,3)
 
-    drugs = random.sample(mme_drugs, num_instances)
+    drugs = rng.sample(mme_drugs, num_instances)
 
     note = "A patient takes "
 
@@ -165,8 +168,8 @@ def mme_conversion():
 
     for i in range(num_instances):
 
-        num_doses = random.randint(1, 3)
-        num_amount = round(random.randint(1, 3)) * 10
+        num_doses = rng.randint(1, 3)
+        num_amount = round(rng.randint(1, 3)) * 10
 
         key_name_dose = drugs[i] + " Dose"
         key_name_dose_per_day = drugs[i] + " Dose Per Day"
@@ -194,18 +197,18 @@ def mme_conversion():
 
     return note, input_parameters
 
-def steroid_conversion():
+def steroid_conversion(rng=random):
 
   
     steroid_names = ['Betamethasone IV', 'Cortisone PO', 'Dexamethasone IV', 'Dexamethasone PO', 'Hydrocortisone IV', 'Hydrocortisone PO',  'MethylPrednisoLONE IV', 'MethylPrednisoLONE PO', 'PredniSONE PO', 'PrednisoLONE PO', 'Triamcinolone IV']
     
-    choices = random.sample(steroid_names, 2)
+    choices = rng.sample(steroid_names, 2)
 
-    random_value = round(random.uniform(0.6, 9), 2)
+    random_value = round(rng.uniform(0.6, 9), 2)
 
     input_parameters = {"input steroid": ['Betamethasone IV', random_value, "mg"], "target steroid": choices[0]}
     
-    amount = round_number(steroid_conversion_calculator.compute_steroid_conversion(input_parameters))
+    amount = round_number(steroid_conversion_calculator.compute_steroid_conversion(input_parameters, PatientContext()))
 
     note = f"A patient has taken {amount} mg of {choices[0]}. "
 
@@ -215,13 +218,13 @@ def steroid_conversion():
 
 # Have the functions for generating the values. Just ask the LLM to compute the value. 
 
-def target_weight():
+def target_weight(rng=random):
 
     height_units = ["cm", "m", "in"]
 
-    height_value = round(random.uniform(1.4, 2.0) , 2)
+    height_value = round(rng.uniform(1.4, 2.0) , 2)
 
-    height_unit = random.choice(height_units)
+    height_unit = rng.choice(height_units)
 
     if height_unit == "in":
         height_value = round(height_conversion.height_conversion_in([height_value, "m"]))
@@ -230,7 +233,7 @@ def target_weight():
     elif height_unit == "m":
         height_value = round(height_conversion.height_conversion([height_value, "m"]), 2)
 
-    bmi = round(random.uniform(18, 25) , 1)
+    bmi = round(rng.uniform(18, 25) , 1)
 
     note = f"Patient has a height of {height_value} {height_unit} and their target BMI is {bmi} kg/m^2."
 
@@ -239,11 +242,6 @@ def target_weight():
     return note, input_parameters
 
 
-with open("/Users/nikhilkhandekar/Documents/MedCalc-Bench-Verified/calculator_implementations/name_to_python.json") as file:
-    calc_info  = json.load(file)
-
-problems = {}
-
 calc_ids = ["11", "13", "24", "56", "57", "58", "59", "61", "49", "68", "69"]
 
 
@@ -261,47 +259,86 @@ calculator_id_to_name = {
                          "69": "estimated_gestational_age"
                         }
 
+# set in each worker by init_worker
+registry = None
 
-data = {}
 
-for calc_id in calc_ids:
+def init_worker():
+    global registry
+    registry = CalculatorRegistry()
 
-    calculator_name_formal = calc_info[calc_id]["calculator name"]
 
-    data[calc_id] = {}
+def stream(seed, calc_id, chunk):
+    """
+    random.Random for one chunk of a calculator's instances. Its state comes from a NumPy SeedSequence
+    spawned from the root seed by (calculator ID, chunk), so the streams are independent of each other and
+    of which worker uses them.
+    """
+    state = np.random.SeedSequence(seed, spawn_key=(int(calc_id), chunk)).generate_state(4)
+    return random.Random(int.from_bytes(state.tobytes(), "little"))
 
-    for i in range(0, 100):
 
-        function_name = calculator_id_to_name[calc_id]
+def generate_chunk(task):
+    # instances start + 1 ... start + size of one calculator, drawn from the chunk's own stream
+    calc_id, chunk, start, size, seed = task
 
-        if function_name in globals() and callable(globals()[function_name]):
-            note, input_parameters =  globals()[function_name]()
+    rng = stream(seed, calc_id, chunk)
+    function = globals()[calculator_id_to_name[calc_id]]
+    instances = {}
 
-    
-            key_name =  str(i + 1)
-            
-            spec = importlib.util.spec_from_file_location("my_module", calc_info[calc_id]["file path"])
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+    for i in range(start, start + size):
+        note, input_parameters = function(rng)
 
-            function = getattr(module, calc_info[calc_id]["explanation function"])
+        gt_result = registry.run(calc_id, input_parameters)
+
+        instances[str(i + 1)] = {
+            "explanation": gt_result["Explanation"],
+            "Ground Truth Answer": gt_result["Answer"],
+            "calculator name": registry.info(calc_id)["calculator name"],
+            "Patient Note": note,
+            "input_parameters": input_parameters
+        }
+
+    return calc_id, instances
+
+
+def generate_instances(seed, instances_per_calculator=100, calculator_ids=calc_ids, workers=1, chunk_size=25):
+    """
+    Returns {calculator ID: {"1": instance, ...}} with instances_per_calculator synthetic instances per
+    calculator. Each calculator's instances are split into chunks of chunk_size with their own random
+    stream (see stream), so the same seed and chunk_size give the same data for any number of workers.
+    """
+    tasks = [(calc_id, chunk, start, min(chunk_size, instances_per_calculator - start), seed)
+             for calc_id in calculator_ids for chunk, start in enumerate(range(0, instances_per_calculator, chunk_size))]
+
+    if workers == 1:
+        init_worker()
+        results = [generate_chunk(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+            results = pool.map(generate_chunk, tasks)
 
-            gt_result = function(input_parameters)
+    data = {calc_id: {} for calc_id in calculator_ids}
 
-            data[calc_id][key_name] = {}
-            data[calc_id][key_name]["explanation"] = gt_result["Explanation"]
-            data[calc_id][key_name]["Ground Truth Answer"] = gt_result["Answer"]
-            data[calc_id][key_name]["calculator name"] = calc_info[calc_id]["calculator name"]
-            data[calc_id][key_name]["Patient Note"] = note
-            data[calc_id][key_name]["input_parameters"] = input_parameters
-            
+    for calc_id, instances in results:
+        data[calc_id].update(instances)
 
+    return data
 
 
-print(data)
+if __name__ == "__main__":
 
-with open("synthetic_instances_train_2.json", "w") as file:
-    json.dump(data, file, indent=4)
+    parser = argparse.ArgumentParser(description='Synthesize template patient notes with their ground truth')
+    parser.add_argument('--seed', type=int, default=42, help='Root seed from which every calculator gets its own random streams.')
+    parser.add_argument('--n', type=int, default=100, help='Number of instances per calculator.')
+    parser.add_argument('--calculators', type=str, nargs='+', default=calc_ids, help='Calculator IDs to synthesize notes for.')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes. The output does not depend on it.')
+    parser.add_argument('--chunk_size', type=int, default=25, help='Instances per random stream. Changing it changes the instances generated for a seed.')
+    parser.add_argument('--output', type=str, default="synthetic_instances_train_2.json", help='Where to write the instances.')
 
+    args = parser.parse_args()
 
+    data = generate_instances(args.seed, args.n, args.calculators, args.workers, args.chunk_size)
 
+    with open(args.output, "w") as file:
+        json.dump(data, file, indent=4)
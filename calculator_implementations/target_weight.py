@@ -18,3 +18,10 @@ def targetweight_explanation(input_variables):
    
     return {"Explanation": explanation, "Answer": target_weight_val}
 
+
+def compute_target_weight(input_variables, context=None):
+
+    bmi = input_variables["body_mass_index"][0]
+    height = height_conversion.height_conversion(input_variables["height"])
+
+    return round_number(bmi * (height * height))
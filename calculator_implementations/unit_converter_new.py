@@ -1,181 +1,245 @@
 from rounding import round_number
 
-def vol_to_vol_explanation(value, src_unit, tgt_unit, compound="", conversion_factor=False):
-        
-        conversion_factors_L = {
-            'L': 1,
-            'dL': 0.1,
-            'mL': 0.001,
-            'µL': 0.000001,
-            'mm^3': 0.000001,
-            'cm^3': 0.001,
-            'm^3': 1000,
-        }
-
-        explanation = ""
-        
-        if src_unit == tgt_unit:
-            return f"The volume of {compound} is {value} {tgt_unit}. ", value
-        else:
+# A conversion is worked out once per (compound, molar_mass, valence, src_unit, tgt_unit) and stored as a
+# ConversionPlan in CONVERSION_PLANS. Converting a value then only replays the plan's arithmetic steps and,
+# for conversion_explanation, splices the intermediate values into the plan's explanation text.
 
-            if not conversion_factor:
-                answer = round_number(value * conversion_factor)
+CONVERSION_FACTORS_L = {
+    'L': 1,
+    'dL': 0.1,
+    'mL': 0.001,
+    'µL': 0.000001,
+    'mm^3': 0.000001,
+    'cm^3': 0.001,
+    'm^3': 1000,
+}
 
-                explanation += f"To convert {src_unit} {compound} to {tgt_unit}, multiply by the conversion factor {conversion_factor} {tgt_unit}/{src_unit}, resulting to {src_unit} {compound} * {conversion_factor} {tgt_unit}/{src_unit} = {answer} {tgt_unit} {compound}. "   
-            else:
-                conversion_factor = conversion_factors_L[src_unit]/conversion_factors_L[tgt_unit]
-                answer = round_number(conversion_factor)
-                explanation += f"The conversion factor is {answer} {tgt_unit} for every unit of {src_unit}. "
+CONVERSION_FACTORS_MOL = {
+    'mol': 1,
+    'mmol': 0.001,
+    'µmol': 0.000001,
+    'pmol': 0.000000001,
+}
 
-        return explanation, answer
+CONVERSION_FACTORS_G = {
+    'kg': 1000,
+    'g': 1,
+    'mg': 0.001,
+    'µg': 0.000001
+}
 
-def molg_to_molg_explanation(mass, compound, src_unit, tgt_unit):
 
- 
-    conversion_factors_mol = {
-        'mol': 1,
-        'mmol': 0.001,
-        'µmol': 0.000001,
-        'pmol': 0.000000001,
-    }
+def multiply(value, constant):
+    return value * constant
 
-    conversion_factors_g = {
-        'kg': 1000,
-        'g': 1,
-        'mg': 0.001,
-        'µg': 0.000001
-    }
+
+def divide(value, constant):
+    return value / constant
+
+
+def unchanged(value, constant):
+    return value
+
+
+class PlanValue:
+    """
+    Stands for the value at a given position of a plan while the plan is being built. Formatting it in an
+    f-string leaves a marker in the explanation text that is later replaced by the actual value.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __format__(self, format_spec):
+        return f"\x00{self.index}\x00"
+
+
+class ConversionPlan:
+    """
+    The steps of one unit conversion. Value 0 is the input, and every step computes
+    round_number(operation(values[index], constant)) from an earlier value, exactly as the conversion
+    functions below do by hand.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.explanation = ""
+
+    def step(self, operation, value, constant):
+        self.steps.append((value.index, operation, constant))
+        return PlanValue(len(self.steps))
+
+    def finish(self, result):
+        self.result = result.index
+
+        # Even positions are literal text and odd positions are indexes of the values that go between them.
+        pieces = self.explanation.split("\x00")
+        self.text = pieces[0::2]
+        self.value_indexes = [int(index) for index in pieces[1::2]]
+
+        return self
+
+    def values(self, value):
+        values = [value]
+
+        for index, operation, constant in self.steps:
+            values.append(round_number(operation(values[index], constant)))
+
+        return values
+
+    def convert(self, value):
+        return self.values(value)[self.result]
+
+    def convert_explanation(self, value):
+        values = self.values(value)
+
+        explanation = [self.text[0]]
+
+        for index, text in zip(self.value_indexes, self.text[1:]):
+            explanation.append(format(values[index], ""))
+            explanation.append(text)
+
+        return "".join(explanation), values[self.result]
+
+
+CONVERSION_PLANS = {}
+
+
+def molg_to_molg_plan(plan, mass, compound, src_unit, tgt_unit):
 
     if "mol" in src_unit and "mol" in tgt_unit:
-        conversion_factors_dict = conversion_factors_mol
+        conversion_factors_dict = CONVERSION_FACTORS_MOL
     elif "g" in src_unit and "g" in tgt_unit:
-        conversion_factors_dict = conversion_factors_g
-
-    explanation = ""
+        conversion_factors_dict = CONVERSION_FACTORS_G
 
     if src_unit == tgt_unit:
-        return f"The mass of {compound} is {mass} {tgt_unit}. ", mass
-    else:
+        plan.explanation += f"The mass of {compound} is {mass} {tgt_unit}. "
+        return mass
 
-        conversion_factor = round_number(conversion_factors_dict[src_unit]/conversion_factors_dict[tgt_unit])
-        
-        answer = round_number(mass * conversion_factor)
-         
-        explanation += f"To convert {mass} {src_unit} of {compound} to {tgt_unit}, multiply by the conversion factor {conversion_factor}, giving us {mass} {src_unit} {compound} * {conversion_factor} {tgt_unit}/{src_unit} = {answer} {tgt_unit} {compound}. "            
+    conversion_factor = round_number(conversion_factors_dict[src_unit]/conversion_factors_dict[tgt_unit])
 
-        return explanation, answer
-    
+    answer = plan.step(multiply, mass, conversion_factor)
 
-def mol_g_explanation(value, compound, molar_mass, src_unit, tgt_unit):
+    plan.explanation += f"To convert {mass} {src_unit} of {compound} to {tgt_unit}, multiply by the conversion factor {conversion_factor}, giving us {mass} {src_unit} {compound} * {conversion_factor} {tgt_unit}/{src_unit} = {answer} {tgt_unit} {compound}. "
 
-    explanation = ""
+    return answer
 
-    mol_explanation, mol = molg_to_molg_explanation(value, compound, src_unit, 'mol')
 
-    explanation += mol_explanation
+def mol_g_plan(plan, value, compound, molar_mass, src_unit, tgt_unit):
 
-    grams_value = round_number(mol * molar_mass)
-  
-    explanation += f"To convert from mol {compound} to grams, multiply by the molar mass {molar_mass} g/mol, which will give {mol} mol {compound} * {molar_mass} g/mol = {grams_value} g {compound}. "
-        
-    grams_explanation, grams = molg_to_molg_explanation(grams_value, compound, "g", tgt_unit)
+    mol = molg_to_molg_plan(plan, value, compound, src_unit, 'mol')
 
-    explanation += grams_explanation
+    grams_value = plan.step(multiply, mol, molar_mass)
 
-    return explanation, grams
+    plan.explanation += f"To convert from mol {compound} to grams, multiply by the molar mass {molar_mass} g/mol, which will give {mol} mol {compound} * {molar_mass} g/mol = {grams_value} g {compound}. "
 
+    return molg_to_molg_plan(plan, grams_value, compound, "g", tgt_unit)
 
-def g_to_mol_explanation(value, compound, molar_mass, src_unit, tgt_unit):
 
-    explanation = ""
+def g_to_mol_plan(plan, value, compound, molar_mass, src_unit, tgt_unit):
 
-    g_explanation, grams = molg_to_molg_explanation(value, compound, src_unit, 'g')
+    grams = molg_to_molg_plan(plan, value, compound, src_unit, 'g')
 
-    explanation += g_explanation
+    mol = plan.step(divide, grams, molar_mass)
 
-    mol = round_number(grams/molar_mass)
-   
-    explanation += f"To convert from grams of {compound} to moles, divide by the molar mass {molar_mass} g/mol, which will give {grams} g/({molar_mass} g {compound}/mol) = {mol} mol {compound}. "
+    plan.explanation += f"To convert from grams of {compound} to moles, divide by the molar mass {molar_mass} g/mol, which will give {grams} g/({molar_mass} g {compound}/mol) = {mol} mol {compound}. "
 
-    mol_explanation, answer = molg_to_molg_explanation(mol, compound, 'mol', tgt_unit)
+    return molg_to_molg_plan(plan, mol, compound, 'mol', tgt_unit)
 
-    explanation += mol_explanation
 
-    return explanation, answer
+def mEq_to_mol_plan(plan, value, compound, valence, tgt_unit):
 
-def mEq_to_mol_explanation(value, compound, valence, tgt_unit):
+    plan.explanation += f"To convert from {value} mEq to {tgt_unit}, convert from mEq to mmol. "
 
-    explanation = f"To convert from {value} mEq to {tgt_unit}, convert from mEq to mmol. "
+    mol = plan.step(divide, value, valence)
 
-    mol = round_number(value/valence)
+    plan.explanation += f"The compound {value} has a valence of {valence}, and so divide the valence by the value of mEq to get, {value} mEq/({valence} mEq/mmol) = {mol} mmol {compound}. "
 
-    explanation += f"The compound {value} has a valence of {valence}, and so divide the valence by the value of mEq to get, {value} mEq/({valence} mEq/mmol) = {mol} mmol {compound}. "
-    
     if tgt_unit != 'mmol':
-        mol_explanation, mol = molg_to_molg_explanation(mol, compound, 'mmol', tgt_unit)
+        mol = molg_to_molg_plan(plan, mol, compound, 'mmol', tgt_unit)
 
-        explanation += mol_explanation
+    return mol
 
-    return explanation, mol
 
+def mol_to_mEq_plan(plan, value, compound, valence, src_unit):
 
-def mol_to_mEq_explanation(value, compound, valence, src_unit):
+    mmol_value = value
 
-    mmol_value = value 
+    if src_unit != 'mmol':
+        plan.explanation += f"To convert from {value} {src_unit} to mEq, first convert from {src_unit} to mmol. "
+        mmol_value = molg_to_molg_plan(plan, value, compound, src_unit, 'mmol')
 
-    explanation = ""
+    mEq_val = plan.step(multiply, mmol_value, valence)
 
-    if src_unit != 'mmol':
+    plan.explanation += f"The compound, {compound}, has a valence of {valence}, and so multiply the valence by the value of mmol to get, {value} mmol * {valence} mEq/mmol = {mEq_val} mEq {compound}. "
 
-        explanation = f"To convert from {value} {src_unit} to mEq, first convert from {src_unit} to mmol. "
-        mmol_explanation, mmol_value = molg_to_molg_explanation(value, compound, src_unit, 'mmol')
-        explanation += mmol_explanation
+    return mEq_val
 
-    mEq_val = round_number(mmol_value * valence)
 
-    explanation += f"The compound, {compound}, has a valence of {valence}, and so multiply the valence by the value of mmol to get, {value} mmol * {valence} mEq/mmol = {mEq_val} mEq {compound}. "
+def mEq_to_g_plan(plan, value, compound, molar_mass, valence, tgt_unit):
 
-    return explanation, mEq_val
+    plan.explanation += f"To convert from {value} mEq to {tgt_unit} mmol, first convert from mEq to mmol. "
 
+    mmol_val = plan.step(divide, value, valence)
 
-def mEq_to_g_explanation(value, compound, molar_mass, valence, tgt_unit):
+    plan.explanation += f"The compound, {compound}, has a valence of {valence}, and so divide the valence by the value of mEq to get, {value} mEq/({valence} mEq/mmol) = {mmol_val} mmol {compound}. "
 
-    explanation = f"To convert from {value} mEq to {tgt_unit} mmol, first convert from mEq to mmol. "
+    mol_value = molg_to_molg_plan(plan, mmol_val, compound, 'mmol', 'mol')
 
-    mmol_val = round_number(value/valence)
+    return mol_g_plan(plan, mol_value, compound, molar_mass, 'mol', tgt_unit)
 
-    explanation += f"The compound, {compound}, has a valence of {valence}, and so divide the valence by the value of mEq to get, {value} mEq/({valence} mEq/mmol) = {mmol_val} mmol {compound}. "
 
-    mol_explanation, mol_value = molg_to_molg_explanation(mmol_val, compound, 'mmol', 'mol')
+def g_to_mEq_plan(plan, value, compound, molar_mass, valence, src_unit):
 
-    explanation += mol_explanation
+    plan.explanation += f"To convert from {value} {src_unit} to mEq, first convert from {src_unit} to mmol."
 
-    gram_explanation, answer = mol_g_explanation(mol_value, compound, molar_mass, 'mol', tgt_unit)
+    mol_value = g_to_mol_plan(plan, value, compound, molar_mass, src_unit, "mmol")
 
-    explanation += gram_explanation
+    answer = plan.step(multiply, mol_value, valence)
 
-    return explanation, answer 
+    plan.explanation += f"To convert from {mol_value} mmol {compound} to mEq, multiply the mmol amount by the valence, to get {mol_value} mmol * {valence} mEq/mmol = {answer} mEq {compound}. "
 
-def g_to_mEq_explanation(value, compound, molar_mass, valence, src_unit):
+    return answer
 
-    explanation = f"To convert from {value} {src_unit} to mEq, first convert from {src_unit} to mmol."
 
-    mol_explanation, mol_value = g_to_mol_explanation(value, compound, molar_mass, src_unit, "mmol")
+def mass_conversion_plan(plan, value, compound, valence, molar_mass, src_mass_unit, tgt_mass_unit):
+
+    plan.explanation += f"The mass of {compound} is {value} {src_mass_unit}. "
+
+    if ("g" in src_mass_unit and "g" in tgt_mass_unit) or ("mol" in src_mass_unit and "mol" in tgt_mass_unit):
+        mass_value = molg_to_molg_plan(plan, value, compound, src_mass_unit, tgt_mass_unit)
 
-    explanation += mol_explanation
+    elif ("mol" in src_mass_unit and "g" in tgt_mass_unit):
+        mass_value = mol_g_plan(plan, value, compound, molar_mass, src_mass_unit, tgt_mass_unit)
 
-    answer = round_number(mol_value * valence)
+    elif ("g" in src_mass_unit and "mol" in tgt_mass_unit):
+        mass_value = g_to_mol_plan(plan, value, compound, molar_mass, src_mass_unit, tgt_mass_unit)
 
-    explanation += f"To convert from {mol_value} mmol {compound} to mEq, multiply the mmol amount by the valence, to get {mol_value} mmol * {valence} mEq/mmol = {answer} mEq {compound}. "
+    elif ("mol" in src_mass_unit and "mEq" in tgt_mass_unit):
+        mass_value = mol_to_mEq_plan(plan, value, compound, valence, src_mass_unit)
 
-    return explanation, answer 
+    elif ("mEq" in src_mass_unit and "mol" in tgt_mass_unit):
+        mass_value = mEq_to_mol_plan(plan, value, compound, valence, tgt_mass_unit)
 
-def conversion_explanation(value, compound, molar_mass, valence, src_unit, tgt_unit):
+    elif ("mEq" in src_mass_unit and "g" in tgt_mass_unit):
+        mass_value = mEq_to_g_plan(plan, value, compound, molar_mass, valence, tgt_mass_unit)
+
+    elif ("g" in src_mass_unit and "mEq" in tgt_mass_unit):
+        mass_value = g_to_mEq_plan(plan, value, compound, molar_mass, valence, src_mass_unit)
+
+    return mass_value
+
+
+def build_conversion_plan(compound, molar_mass, valence, src_unit, tgt_unit):
+    """
+    Works out how to convert between two units. Returns None for unit pairs that cannot be converted.
+    """
 
     conversion_factors_mass = set(['mol', 'mmol', 'µmol', 'pmol', 'kg', 'g', 'mg', 'µg', 'mEq'])
     conversion_factors_volume = set(['L', 'dL', 'mL', 'µL', 'mm^3', 'cm^3', 'm^3'])
 
-    explanation = ""
+    plan = ConversionPlan()
+    value = PlanValue(0)
 
     if "/" in src_unit and "/" in tgt_unit:
 
@@ -186,93 +250,82 @@ def conversion_explanation(value, compound, molar_mass, valence, src_unit, tgt_u
         tgt_volume_unit = tgt_unit.split("/")[1]
 
         if src_mass_unit == tgt_mass_unit and src_volume_unit == tgt_volume_unit:
-            return f"The concentration of {compound} is {value} {src_mass_unit}/{src_volume_unit}. ", value
+            plan.explanation += f"The concentration of {compound} is {value} {src_mass_unit}/{src_volume_unit}. "
+            return plan.finish(value)
 
-        explanation += f"The concentration of {compound} is {value} {src_mass_unit}/{src_volume_unit}. We need to convert the concentration to {tgt_mass_unit}/{tgt_volume_unit}. "
+        plan.explanation += f"The concentration of {compound} is {value} {src_mass_unit}/{src_volume_unit}. We need to convert the concentration to {tgt_mass_unit}/{tgt_volume_unit}. "
 
         if src_mass_unit != tgt_mass_unit:
-            explanation += f"Let's first convert the mass of {compound} from {src_mass_unit} to {tgt_mass_unit}. "
-            mass_explanation, mass_value = mass_conversion_explanation(value, compound, valence, molar_mass, src_mass_unit, tgt_mass_unit)
-
+            plan.explanation += f"Let's first convert the mass of {compound} from {src_mass_unit} to {tgt_mass_unit}. "
+            mass_value = mass_conversion_plan(plan, value, compound, valence, molar_mass, src_mass_unit, tgt_mass_unit)
         else:
-            explanation += f"The mass units of the source and target are the same so no conversion is needed. "
+            plan.explanation += f"The mass units of the source and target are the same so no conversion is needed. "
             mass_value = value
 
-        if src_mass_unit != tgt_mass_unit:
-            explanation += mass_explanation
-
         if src_volume_unit == tgt_volume_unit:
-            volume_conversion_factor = 1
-            result = round_number(mass_value/volume_conversion_factor)
+            result = plan.step(divide, mass_value, 1)
 
-            explanation += f"The volume units is {tgt_volume_unit} so no volume conversion is needed. "
-            explanation += f"Hence, the concentration value of {value} {src_mass_unit} {compound}/{src_volume_unit} converts to {result} {tgt_mass_unit} {compound}/{tgt_volume_unit}. "
+            plan.explanation += f"The volume units is {tgt_volume_unit} so no volume conversion is needed. "
+            plan.explanation += f"Hence, the concentration value of {value} {src_mass_unit} {compound}/{src_volume_unit} converts to {result} {tgt_mass_unit} {compound}/{tgt_volume_unit}. "
 
-            return explanation, result
-        else:
-            explanation += f"The current volume unit is {src_volume_unit} and the target volume unit is {tgt_volume_unit}. "
-            explanation_volume, volume_conversion_factor = vol_to_vol_explanation(1, src_volume_unit, tgt_volume_unit, "water", True)
-            explanation += explanation_volume
+            return plan.finish(result)
 
-        result = round_number(mass_value/volume_conversion_factor)
+        plan.explanation += f"The current volume unit is {src_volume_unit} and the target volume unit is {tgt_volume_unit}. "
 
-        explanation += f"Our next step will be to divide the mass by the volume conversion factor of {volume_conversion_factor} to get the final concentration in terms of {tgt_mass_unit}/{tgt_volume_unit}. "
-        explanation += f"This will result to {mass_value} {tgt_mass_unit} {compound}/{volume_conversion_factor} {tgt_volume_unit} = {result} {tgt_mass_unit} {compound}/{tgt_volume_unit}. "
-        explanation += f"The concentration value of {value} {src_mass_unit} {compound}/{src_volume_unit} converts to {result} {tgt_mass_unit} {compound}/{tgt_volume_unit}. "
+        volume_conversion_factor = round_number(CONVERSION_FACTORS_L[src_volume_unit]/CONVERSION_FACTORS_L[tgt_volume_unit])
+        plan.explanation += f"The conversion factor is {volume_conversion_factor} {tgt_volume_unit} for every unit of {src_volume_unit}. "
 
-        return explanation, result 
+        result = plan.step(divide, mass_value, volume_conversion_factor)
 
+        plan.explanation += f"Our next step will be to divide the mass by the volume conversion factor of {volume_conversion_factor} to get the final concentration in terms of {tgt_mass_unit}/{tgt_volume_unit}. "
+        plan.explanation += f"This will result to {mass_value} {tgt_mass_unit} {compound}/{volume_conversion_factor} {tgt_volume_unit} = {result} {tgt_mass_unit} {compound}/{tgt_volume_unit}. "
+        plan.explanation += f"The concentration value of {value} {src_mass_unit} {compound}/{src_volume_unit} converts to {result} {tgt_mass_unit} {compound}/{tgt_volume_unit}. "
+
+        return plan.finish(result)
 
     elif ("/" not in src_unit and "/" not in tgt_unit) and src_unit in conversion_factors_mass and tgt_unit in conversion_factors_mass:
 
         if src_unit == tgt_unit:
-            return f"The mass of {compound} is {round_number(value)} {tgt_unit}. ", value
+            plan.explanation += f"The mass of {compound} is {plan.step(unchanged, value, None)} {tgt_unit}. "
+            return plan.finish(value)
 
-        explanation, result = mass_conversion_explanation(value, compound, valence, molar_mass, src_unit, tgt_unit)
-        return explanation, result
+        return plan.finish(mass_conversion_plan(plan, value, compound, valence, molar_mass, src_unit, tgt_unit))
 
     elif ("/" not in src_unit and "/" not in tgt_unit) and src_unit in conversion_factors_volume and tgt_unit in conversion_factors_volume:
 
         if src_unit == tgt_unit:
-            return f"The volume is {value} {tgt_unit}. ", value
+            plan.explanation += f"The volume is {value} {tgt_unit}. "
+            return plan.finish(value)
 
-        explanation, value = vol_to_vol_explanation(value, src_unit, tgt_unit)
-        return explanation, result
-       
+        conversion_factor = round_number(CONVERSION_FACTORS_L[src_unit]/CONVERSION_FACTORS_L[tgt_unit])
 
-def mass_conversion_explanation(value, compound, valence, molar_mass, src_mass_unit, tgt_mass_unit):
-        
-    explanation = f"The mass of {compound} is {value} {src_mass_unit}. "
+        result = plan.step(multiply, value, conversion_factor)
 
-    if ("g" in src_mass_unit and "g" in tgt_mass_unit) or ("mol" in src_mass_unit and "mol" in tgt_mass_unit):
-        conv_explanation, mass_value = molg_to_molg_explanation(value, compound, src_mass_unit, tgt_mass_unit)
-        explanation += conv_explanation
+        plan.explanation += f"To convert {value} {src_unit} to {tgt_unit}, multiply by the conversion factor {conversion_factor} {tgt_unit}/{src_unit}, resulting to {value} {src_unit} * {conversion_factor} {tgt_unit}/{src_unit} = {result} {tgt_unit}. "
 
-    elif ("mol" in src_mass_unit and "g" in tgt_mass_unit):
-        conv_explanation, mass_value = mol_g_explanation(value, compound, molar_mass, src_mass_unit, tgt_mass_unit)
-        explanation += conv_explanation
+        return plan.finish(result)
 
-    elif ("g" in src_mass_unit and "mol" in tgt_mass_unit):
-        conv_explanation, mass_value = g_to_mol_explanation(value, compound, molar_mass, src_mass_unit, tgt_mass_unit)
-        explanation += conv_explanation
+    return None
 
-    elif ("mol" in src_mass_unit and "mEq" in tgt_mass_unit):
-        conv_explanation, mass_value =  mol_to_mEq_explanation(value, compound, valence, src_mass_unit)
-        explanation += conv_explanation
 
-    elif ("mEq" in src_mass_unit and "mol" in tgt_mass_unit):
-        conv_explanation, mass_value = mEq_to_mol_explanation(value, compound, valence, tgt_mass_unit)
-        explanation += conv_explanation
+def conversion_plan(compound, molar_mass, valence, src_unit, tgt_unit):
 
-    elif ("mEq" in src_mass_unit and "g" in tgt_mass_unit):
-        conv_explanation, mass_value =  mEq_to_g_explanation(value, compound, molar_mass, valence, tgt_mass_unit)
-        explanation += conv_explanation
+    key = (compound, molar_mass, valence, src_unit, tgt_unit)
 
-    elif ("g" in src_mass_unit and "mEq" in tgt_mass_unit):
-        conv_explanation, mass_value =  g_to_mEq_explanation(value, compound, molar_mass, valence, src_mass_unit)
-        explanation += conv_explanation
+    if key not in CONVERSION_PLANS:
+        CONVERSION_PLANS[key] = build_conversion_plan(compound, molar_mass, valence, src_unit, tgt_unit)
+
+    return CONVERSION_PLANS[key]
 
-    return explanation, mass_value
+
+def conversion_explanation(value, compound, molar_mass, valence, src_unit, tgt_unit):
+
+    plan = conversion_plan(compound, molar_mass, valence, src_unit, tgt_unit)
+
+    if plan is None:
+        return None
+
+    return plan.convert_explanation(value)
 
 
 def convert_to_units_per_liter_explanation(value, unit, compound, target_unit):
@@ -316,3 +369,42 @@ def kPa_to_mmHg_explanation(kPa, compound):
     return explanation, answer
 
 
+# Value-only versions of the conversions above, for calculators that compute their answers without
+# building any text. conversion() replays the same plan as conversion_explanation().
+
+def conversion(value, compound, molar_mass, valence, src_unit, tgt_unit):
+
+    plan = conversion_plan(compound, molar_mass, valence, src_unit, tgt_unit)
+
+    if plan is None:
+        return None
+
+    return plan.convert(value)
+
+
+def convert_to_units_per_liter(value, unit, target_unit):
+
+    unit_to_liter = {
+        'L': 1,
+        'dL': 1e-1,
+        'mL': 1e-3,
+        'µL': 1e-6,
+        'mm^3': 1e-6,
+        'cm^3': 1e-3,
+        'm^3': 1e3,
+    }
+
+    if unit == target_unit:
+        return value
+
+    conversions_factor = round_number(unit_to_liter[target_unit]/unit_to_liter[unit])
+
+    return round_number(conversions_factor * value)
+
+
+def mmHg_to_kPa(mmHg):
+    return round_number(0.133322 * mmHg)
+
+
+def kPa_to_mmHg(kPa):
+    return round_number(7.50062 * kPa)
@@ -13,4 +13,16 @@ def weight_conversion_explanation(weight_info):
         return f"The patient's weight is {weight} g so this converts to {weight} lbs * kg/1000 g = {round_number(weight/1000)} kg. ", weight/1000
     else:
         return f"The patient's weight is {weight} kg. ", weight
-    
+
+
+def weight_conversion(weight_info):
+
+    weight = weight_info[0]
+    weight_label = weight_info[1]
+
+    if weight_label == "lbs":
+        return round_number(weight * 0.453592)
+    elif weight_label == "g":
+        return weight/1000
+    else:
+        return weight
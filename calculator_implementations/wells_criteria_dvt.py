@@ -86,3 +86,20 @@ The total score is calculated by summing the points for each criterion.
     return {"Explanation": output, "Answer": score}
 
 
+def compute_wells_criteria_dvt(input_parameters, context=None):
+
+    score = 0
+
+    for param_name in ['active_cancer', 'calf_swelling_3cm', 'collateral_superficial_veins', 'leg_swollen',
+                       'localized_tenderness_on_deep_venuous_system', 'pitting_edema_on_symptomatic_leg',
+                       'paralysis_paresis_immobilization_in_lower_extreme', 'previous_dvt_documented']:
+        if input_parameters.get(param_name):
+            score += 1
+
+    if input_parameters.get('bedridden_for_atleast_3_days') or input_parameters.get('major_surgery_in_last_12_weeks'):
+        score += 1
+
+    if input_parameters.get('alternative_to_dvt_diagnosis'):
+        score -= 2
+
+    return score
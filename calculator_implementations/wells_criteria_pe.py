@@ -109,3 +109,31 @@ The total score is calculated by summing the points for each criterion.
    explanation += f"The patient's Well's score for pulmonary embolism is {score}."
 
    return {"Explanation": explanation, "Answer": score}
+
+
+def compute_pe_wells(variables, context=None):
+
+   score = 0
+
+   if variables.get('clinical_dvt', False):
+      score += 3
+
+   if variables.get('pe_number_one', False):
+      score += 3
+
+   if variables['heart_rate'][0] > 100:
+      score += 1.5
+
+   if variables.get('immobilization_for_3days', False) or variables.get('surgery_in_past4weeks', False):
+      score += 1.5
+
+   if variables.get('previous_pe', False) or variables.get('previous_dvt', False):
+      score += 1.5
+
+   if variables.get('hemoptysis', False):
+      score += 1
+
+   if variables.get('malignancy_with_treatment', False):
+      score += 1
+
+   return score
@@ -0,0 +1,158 @@
+import os
+import re
+import json
+from safe_eval import safe_eval
+
+CALCULATOR_INFO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "calculator_implementations", "name_to_python.json")
+
+# answers that only repeat the placeholder from the prompt
+PLACEHOLDER_ANSWERS = {"str(short_and_direct_answer_of_the_question)", "str(value which is the answer to the question)", "X.XX"}
+
+# units and names removed from "str(...)" expressions before they are evaluated, in this order
+EXPRESSION_REPLACEMENTS = [
+    ("^", "**"), ("is odd", "% 2 == 1"), ("is even", "% 2 == 0"), ("sqrt", "math.sqrt"), (".math", ""),
+    ("weight", ""), ("height", ""), ("mg/dl", ""), ("g/dl", ""), ("mmol/L", ""), ("kg", ""), ("g", ""), ("mEq/L", "")
+]
+
+
+def load_output_types(path=CALCULATOR_INFO_PATH):
+    """
+    Calculator ID -> "output type" from name_to_python.json: "date", "weeks and days", "integer" or "decimal".
+    This is how answers are extracted and graded, which for some calculators differs from the dataset's
+    Output Type column.
+    """
+    with open(path) as file:
+        calc_info = json.load(file)
+
+    return {int(calculator_id): info["output type"] for calculator_id, info in calc_info.items()}
+
+
+class AnswerExtractor:
+    """
+    Pulls the final answer and the step-by-step explanation out of a model response, like run.extract_answer.
+    The regular expressions are compiled once and the output type is looked up in a table, so the same
+    extractor can be reused over many responses, e.g. through extract_many.
+    """
+
+    def __init__(self, output_types=None):
+        self.output_types = load_output_types() if output_types is None else output_types
+
+        self.answer = re.compile(r'[Aa]nswer":\s*(.*?)\}')
+        self.explanation = re.compile(r'"step_by_step_thinking":\s*"([^"]+)"\s*,\s*"[Aa]nswer"')
+        self.date = re.compile(r"^(0?[1-9]|1[0-2])\/(0?[1-9]|[12][0-9]|3[01])\/(\d{4})")
+        self.weeks_days = re.compile(r"\(?[\"\']?(\d+)\s*(weeks?)?[\"\']?,?\s*[\"\']?(\d+)\s*(days?)?[\"\']?\s*\)?")
+        self.out_of = re.compile(r"(\d+) out of")
+        self.listed = re.compile(r"-?\d+(, ?-?\d+)+")
+        self.number = re.compile(r"(-?\d+(\.\d+)?)")
+        self.expression = re.compile(r"str\((.*)\)")
+        self.gfr = re.compile(r"(-?\d+(\.\d+)?)\s*mL/min/1.73")
+        self.percent = re.compile(r"(-?\d+(\.\d+)?)\%")
+
+    def extract(self, answer, calid):
+
+        calid = int(calid)
+        extracted_answer = self.answer.findall(answer)
+        matches = self.explanation.findall(answer)
+
+        if matches:
+            # Select the last match
+            explanation = matches[-1]
+        else:
+            explanation = "No Explanation"
+
+        if len(extracted_answer) == 0:
+            extracted_answer = "Not Found"
+        else:
+            extracted_answer = extracted_answer[-1].strip().strip('"')
+            if extracted_answer in PLACEHOLDER_ANSWERS:
+                extracted_answer = "Not Found"
+
+        output_type = self.output_types.get(calid)
+
+        if output_type == "date":
+            match = self.date.search(extracted_answer)
+            if match:
+                month = int(match.group(1))
+                day = int(match.group(2))
+                year = match.group(3)
+                answer = f"{month:02}/{day:02}/{year}"
+            else:
+                answer = "N/A"
+
+        elif output_type == "weeks and days":
+            # Output Type: integer (A, B)
+            match = self.weeks_days.search(extracted_answer)
+            ground_truth = f"({match.group(1)}, {match.group(3)})"
+            extracted_answer = extracted_answer.replace("[", "(").replace("]", ")").replace("'", "").replace('"', "")
+            match = self.weeks_days.search(extracted_answer)
+            if match:
+                weeks = match.group(1)
+                days = match.group(3)
+                answer = f"({weeks}, {days})"
+            else:
+                answer = "N/A"
+
+        elif output_type == "integer":
+            match = self.out_of.search(extracted_answer)
+            if match: # cases like "3 out of 5"
+                answer = match.group(1)
+            else:
+                match = self.listed.search(extracted_answer)
+                if match: # cases like "3, 4, 5"
+                    answer = str(len(match.group(0).split(",")))
+                else:
+                    match = self.number.findall(extracted_answer)
+                    if len(match) > 0: # find the last integer
+                        answer = match[-1][0]
+                    else:
+                        answer = "N/A"
+
+        elif output_type == "decimal":
+            match = self.expression.search(extracted_answer)
+            if match: # cases like "str(round((140 * (3.15 - 136) / 1400) * 72.36)"
+                expression = match.group(1)
+                for old, new in EXPRESSION_REPLACEMENTS:
+                    expression = expression.replace(old, new)
+                expression = expression.split('#')[0] # cases like round(45.5 * 166 - 45.3 + 0.4 * (75 - (45.5 * 166 - 45.3))))) # Calculation: ...
+                if expression.count('(') > expression.count(')'): # add missing ')
+                    expression += ')' * (expression.count('(') - expression.count(')'))
+                elif expression.count(')') > expression.count('('): # add missing (
+                    expression = '(' * (expression.count(')') - expression.count('(')) + expression
+                try:
+                    answer = safe_eval(expression)
+                except:
+                    print(f"Error in evaluating expression: {expression}")
+                    answer = "N/A"
+            else:
+                match = self.gfr.search(extracted_answer)
+                if match: # cases like "8.1 mL/min/1.73 m²"
+                    answer = safe_eval(match.group(1))
+                else:
+                    match = self.percent.findall(extracted_answer)
+                    if len(match) > 0: # cases like "53.1%"
+                        answer = safe_eval(match[-1][0]) / 100
+                    else:
+                        match = self.number.findall(extracted_answer)
+                        if len(match) > 0: # cases like "8.1 mL/min/1.73 m²" or "11.1"
+                            answer = safe_eval(match[-1][0])
+                        else:
+                            answer = "N/A"
+            if answer != "N/A":
+                answer = str(answer)
+
+        return answer, explanation
+
+    def extract_many(self, responses, calc_ids):
+        """
+        Extracts (answer, explanation) for each response with the matching calculator ID. A response that
+        cannot be parsed gives the exception in place of its result instead of stopping the batch.
+        """
+        results = []
+
+        for response, calid in zip(responses, calc_ids):
+            try:
+                results.append(self.extract(response, calid))
+            except Exception as e:
+                results.append(e)
+
+        return results
@@ -0,0 +1,67 @@
+import sys
+import math
+import argparse
+import numpy as np
+from safe_eval import safe_eval
+
+# Checks safe_eval against eval() with the namespace extraction used to give it, on the expression forms model
+# answers use, and checks that the forms safe_eval is documented to reject raise ValueError. Exits with a
+# non-zero status if any check fails.
+
+EVAL_NAMES = {"min": min, "pow": pow, "round": round, "abs": abs, "int": int, "float": float, "math": math, "np": np, "numpy": np}
+
+# expressions whose result must be the same as eval's
+MATCHING = [
+    "140", "-3.5", "(4, 3)", "round((140 - 65) * 72 / (72 * 1.2))", "round(45.5 * 166 - 45.3, 2)",
+    "3 if 1 else 2", "(3 if 1 > 2 else 2.5) * 4", "1 / 0 if 0 else 7", "round(10 if 5 % 2 == 1 else 20, 1)",
+    "10**2000", "float((3 ** 4697) % 98)", "pow(10, 1200) // 10 ** 1199", "2 ** -3", "1 ** 10 ** 6", "(-1) ** 999999",
+    "pow(3, 5000, 7)", "math.sqrt(2) ** 0.5", "math.pow(2, 10)", "np.power(2.0, 3)", "min(3, 4.5) and 0 or 8",
+    "not 0", "1 < 2 < 3", "math.log(math.e)", "np.round(2.345, 2)", "211.36 + (4 // 76.105 - 245.73) ** 1.5",
+]
+
+# expressions that must raise the same exception type as eval
+RAISING = ["1 / 0", "1.5 ** 5000", "math.pow(10, 2000)", "math.sqrt(-1)", "(1 +"]
+
+# expressions eval evaluates but safe_eval is documented to reject with ValueError
+REJECTED = ["7 ** 100000", "math.cos(0)", "np.mean((1, 2))", "'a' * 3", "(1, 2) * 3", "abs.__class__"]
+
+
+def outcome(function, expression):
+    try:
+        return function(expression)
+    except Exception as e:
+        return type(e)
+
+
+def check():
+    failures = []
+
+    for expression in MATCHING + RAISING:
+        expected = outcome(lambda text: eval(text, {"__builtins__": None}, EVAL_NAMES), expression)
+        result = outcome(safe_eval, expression)
+
+        # compare values together with their types, so 10 and 10.0 are kept apart
+        if (type(result), result) != (type(expected), expected) and not (isinstance(expected, float) and math.isnan(expected) and math.isnan(result)):
+            failures.append(f"{expression}: safe_eval gave {str(result)[:40]}, eval gave {str(expected)[:40]}")
+
+    for expression in REJECTED:
+        result = outcome(safe_eval, expression)
+        if result is not ValueError:
+            failures.append(f"{expression}: safe_eval gave {str(result)[:40]} instead of raising ValueError")
+
+    return failures
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Check safe_eval against eval on the expression forms model answers use')
+    parser.parse_args()
+
+    failures = check()
+
+    for failure in failures:
+        print(failure)
+
+    print(f"{len(failures)} of {len(MATCHING) + len(RAISING) + len(REJECTED)} checks failed")
+
+    sys.exit(1 if failures else 0)
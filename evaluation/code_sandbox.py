@@ -0,0 +1,150 @@
+import io
+import os
+import queue
+import resource
+import contextlib
+import traceback
+import multiprocessing
+
+
+def capture_exec_output_and_errors(code):
+    """
+    Executes the given code and captures its printed output and any error messages.
+
+    Parameters:
+    code (str): The Python code to execute.
+
+    Returns:
+    str: The captured output and error messages of the executed code.
+    """
+    globals = {}
+
+    with io.StringIO() as buffer, contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        try:
+            exec(code, globals)
+        except Exception as e:
+            # Print the error to the buffer
+            traceback.print_exc()
+
+        return buffer.getvalue()
+
+
+def worker_main(connection, memory_mb, cpu_seconds, max_output_chars):
+    """
+    Loop of a sandbox worker process: receives code, runs it with capture_exec_output_and_errors and sends
+    back the output. The address space is capped at memory_mb, and every snippet gets cpu_seconds of CPU time
+    after which the kernel kills the process.
+    """
+    # one BLAS thread per worker, set before numpy is imported
+    os.environ["OPENBLAS_NUM_THREADS"] = "1"
+    os.environ["OMP_NUM_THREADS"] = "1"
+
+    # modules the model's code usually imports, loaded once per worker
+    import math
+    import datetime
+    import numpy
+
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if memory_mb is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_mb * 1024 * 1024, hard))
+
+    while True:
+        code = connection.recv()
+        if code is None:
+            break
+
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (int(usage.ru_utime + usage.ru_stime) + cpu_seconds + 1, hard))
+
+        output = capture_exec_output_and_errors(code)
+        if len(output) > max_output_chars:
+            output = output[:max_output_chars] + f"\n... output truncated after {max_output_chars} characters"
+
+        connection.send(output)
+
+
+class SandboxWorker:
+
+    def __init__(self, context, memory_mb, cpu_seconds, max_output_chars):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_connection, memory_mb, cpu_seconds, max_output_chars), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.executions = 0
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class CodeSandbox:
+    """
+    Pool of pre-started worker processes that run model-written code (see generate_code_prompt.py) instead of
+    exec-ing it in the evaluation process. Each snippet has a wall-clock timeout and CPU limit of `timeout`
+    seconds and runs under a memory cap; a worker that times out or dies is replaced, and every worker is
+    replaced after max_executions snippets so leaked state does not build up. run() is thread-safe, so up to
+    `workers` snippets execute in parallel.
+    """
+
+    def __init__(self, workers=4, timeout=10, memory_mb=2048, max_executions=50, max_output_chars=20000):
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.max_executions = max_executions
+        self.max_output_chars = max_output_chars
+        # spawn rather than fork, as the evaluation may be running threads
+        self.context = multiprocessing.get_context("spawn")
+        self.idle = queue.Queue()
+
+        for _ in range(workers):
+            self.idle.put(self.start_worker())
+
+    def start_worker(self):
+        return SandboxWorker(self.context, self.memory_mb, self.timeout, self.max_output_chars)
+
+    def run(self, code):
+        worker = self.idle.get()
+
+        try:
+            worker.connection.send(code)
+            if worker.connection.poll(self.timeout):
+                output = worker.connection.recv()
+                worker.executions += 1
+            else:
+                output = f"TimeoutError: the code did not finish within {self.timeout} seconds"
+                worker.kill()
+                worker = None
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            output = "Error: the process running the code was terminated (CPU time or memory limit exceeded, or the code exited)"
+            worker.kill()
+            worker = None
+
+        if worker is not None and worker.executions >= self.max_executions:
+            worker.stop()
+            worker = None
+
+        self.idle.put(worker if worker is not None else self.start_worker())
+
+        return output
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get().stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,105 @@
+import os
+import ast
+import json
+import argparse
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# Columnar copies of the dataset CSVs. export_dataset writes an uncompressed Arrow (Feather v2) file, which
+# load_dataset memory-maps so that only the requested columns are ever read, or a Parquet file. Relevant
+# Entities is stored already parsed, as a map from entity name to its JSON-encoded value.
+
+ENTITIES_COLUMN = "Relevant Entities"
+ENTITIES_TYPE = pa.map_(pa.string(), pa.string())
+
+COLUMNAR_EXTENSIONS = (".arrow", ".feather", ".parquet")
+
+
+def encode_entities(entities):
+    if isinstance(entities, str):
+        entities = ast.literal_eval(entities)
+    return [(name, json.dumps(value)) for name, value in entities.items()]
+
+
+def decode_entities(pairs):
+    return {name: json.loads(value) for name, value in pairs}
+
+
+def export_dataset(csv_path, output_path=None):
+    """
+    Writes the dataset CSV at csv_path as a columnar file, by default next to it with an .arrow extension.
+    The other columns keep the types pd.read_csv gives them, so rows look the same to run.py either way.
+    """
+    if output_path is None:
+        output_path = os.path.splitext(csv_path)[0] + ".arrow"
+
+    df = pd.read_csv(csv_path)
+    entities = pa.array([encode_entities(value) for value in df[ENTITIES_COLUMN]], type=ENTITIES_TYPE)
+    table = pa.Table.from_pandas(df.drop(columns=[ENTITIES_COLUMN]), preserve_index=False)
+    table = table.add_column(list(df.columns).index(ENTITIES_COLUMN), ENTITIES_COLUMN, entities)
+
+    if output_path.endswith(".parquet"):
+        pq.write_table(table, output_path)
+    else:
+        feather.write_feather(table, output_path, compression="uncompressed")
+
+    return output_path
+
+
+def columnar_path(csv_path):
+    # an .arrow or .parquet copy next to the CSV that is at least as new as it, if there is one
+    stem = os.path.splitext(csv_path)[0]
+
+    for extension in COLUMNAR_EXTENSIONS:
+        path = stem + extension
+        if os.path.exists(path) and (not os.path.exists(csv_path) or os.path.getmtime(path) >= os.path.getmtime(csv_path)):
+            return path
+
+    return None
+
+
+def load_dataset(path, columns=None, parse_entities=True):
+    """
+    Loads a dataset as a DataFrame with only the given columns (all by default). For a CSV path, an up to
+    date columnar copy (see export_dataset) is used when there is one. Arrow files are memory-mapped and
+    Parquet files read only the requested column chunks. Relevant Entities, if requested, comes back as a
+    dict per row, or as the stored (name, JSON value) pairs with parse_entities=False.
+    """
+    if path.endswith(".csv"):
+        path = columnar_path(path) or path
+
+    if path.endswith(".csv"):
+        df = pd.read_csv(path, usecols=columns)
+        if columns is not None:
+            df = df[columns]
+        if ENTITIES_COLUMN in df.columns:
+            df[ENTITIES_COLUMN] = [ast.literal_eval(value) if parse_entities else encode_entities(value) for value in df[ENTITIES_COLUMN]]
+        return df
+
+    if path.endswith(".parquet"):
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    else:
+        table = feather.read_table(path, columns=columns, memory_map=True)
+
+    if ENTITIES_COLUMN not in table.column_names:
+        return table.to_pandas()
+
+    position = table.column_names.index(ENTITIES_COLUMN)
+    entities = table.column(ENTITIES_COLUMN).to_pylist()
+    df = table.drop_columns([ENTITIES_COLUMN]).to_pandas()
+    df.insert(position, ENTITIES_COLUMN, [decode_entities(pairs) for pairs in entities] if parse_entities else entities)
+
+    return df
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Write a columnar (Arrow or Parquet) copy of a dataset CSV')
+    parser.add_argument('csv_path', type=str, help='Dataset CSV, e.g. ../dataset/test_data.csv')
+    parser.add_argument('--output', type=str, default=None, help='Output file. By default the CSV path with an .arrow extension; use a .parquet extension for Parquet.')
+
+    args = parser.parse_args()
+
+    print(export_dataset(args.csv_path, args.output))
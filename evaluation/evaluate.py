@@ -4,6 +4,7 @@ import argparse
 import numpy as np
 import pandas as pd
 from datetime import datetime
+from safe_eval import safe_eval, parse_limit
 
 
 categories = ['lab test', 'physical', 'date', 'dosage', 'risk', 'severity', 'diagnosis']
@@ -28,7 +29,7 @@ def check_correctness(answer: str, ground_truth, calid, upper_limit, lower_limit
             weeks = match.group(1)
             days = match.group(3)
             answer = f"({weeks}, {days})"
-            if eval(answer) == eval(ground_truth):
+            if safe_eval(answer) == parse_limit(ground_truth):
                 correctness = 1
             else:
                 correctness = 0
@@ -36,15 +37,15 @@ def check_correctness(answer: str, ground_truth, calid, upper_limit, lower_limit
             correctness = 0
     elif calid in [4, 15, 16, 17, 18, 20, 21, 25, 27, 28, 29, 32, 33, 36, 43, 45, 48, 51, 69]:
         # Output Type: integer A
-        answer = round(eval(answer))
-        if answer == eval(ground_truth):
+        answer = round(safe_eval(answer))
+        if answer == parse_limit(ground_truth):
             correctness = 1
         else:
             correctness = 0
     elif calid in [2,  3,  5,  6,  7,  8,  9, 10, 11, 19, 22, 23, 24, 26, 30, 31, 38, 39, 40, 44, 46, 49, 56, 57, 58, 59, 60, 61, 62, 63, 64, 65, 66, 67]:
         # Output Type: decimal
-        answer = eval(answer)
-        if answer >= eval(lower_limit) and answer <= eval(upper_limit):
+        answer = safe_eval(answer)
+        if answer >= parse_limit(lower_limit) and answer <= parse_limit(upper_limit):
             correctness = 1
         else:
             correctness = 0
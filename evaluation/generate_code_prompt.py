@@ -9,47 +9,28 @@ import traceback
 import sys
 import pandas as pd
 import argparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import tqdm
+import asyncio
 import os
 import openai
-from run import extract_answer
+from run import extract_answer, load_completed, write_outputs, DATASET_COLUMNS
+from dataset_io import load_dataset
 from evaluate import check_correctness
 import numpy as np
-from table_stats import compute_overall_accuracy
+from table_stats import AccuracyAggregator
+from code_sandbox import CodeSandbox, capture_exec_output_and_errors
 
 
 openai.api_key = os.getenv("OPENAI_API_KEY") 
 
 
-def capture_exec_output_and_errors(code):
-    """
-    Executes the given code and captures its printed output and any error messages.
-
-    Parameters:
-    code (str): The Python code to execute.
-
-    Returns:
-    str: The captured output and error messages of the executed code.
-    """
-    globals = {}
-
-    with io.StringIO() as buffer, contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
-        try:
-            exec(code, globals)
-        except Exception as e:
-            # Print the error to the buffer
-            traceback.print_exc()
-
-        return buffer.getvalue()
-
-
 def extract_python_code(text):
     pattern = r"```python\n(.*?)```"
     matches = re.findall(pattern, text, re.DOTALL)
     return "\n".join(matches)
 
 
-def apply_calc(question, patient_note, model_name):
+async def apply_calc(question, patient_note, llm, sandbox=None):
     system = f"You are a helpful assistant. Your task is to read a patient note and compute a medical value based on the following the question: {question}.\n"
     system += "If there are multiple values for a given measurement or attribute, then please use the value recorded based on when the patient note was written. You should not be using values that the patient had post-treatment or values from a patient's history in the past. "
     system += "Additionally, if the problem doesn't directly imply or provide information regarding a particular patient attribute, assume the patient does not have it."
@@ -71,12 +52,8 @@ def apply_calc(question, patient_note, model_name):
     n = 0
 
     while True:
-        response = openai.ChatCompletion.create(
-                    model=model_name,
-                    messages=messages
-        )
-
-        output = response.choices[0].message.content
+        # waits for the rate limits and retries rate-limited or failed requests with backoff
+        output = await llm.agenerate(messages)
 
         n += 1
         print(f"Round {n}\n")
@@ -111,7 +88,11 @@ def apply_calc(question, patient_note, model_name):
                 return "N/A", messages
             else:
 
-                console_output = capture_exec_output_and_errors(message_code)
+                # the code runs in a thread so the other conversations keep going meanwhile
+                if sandbox is not None:
+                    console_output = await asyncio.to_thread(sandbox.run, message_code)
+                else:
+                    console_output = await asyncio.to_thread(capture_exec_output_and_errors, message_code)
                 
                 new_output = f"""I have executed your code, and the output is:
 
@@ -146,12 +127,91 @@ def apply_calc(question, patient_note, model_name):
             return None, messages
 
 
-def process_row(row, model_name):
-    return apply_calc(row["Question"], row["Patient Note"], model_name)
+def make_outputs(row, answer, messages):
+    calc_id = str(row["Calculator ID"])
+    note_id = str(row["Note ID"])
+
+    if not answer:
+        extracted_answer = "None"
+        result = "Incorrect"
+    else:
+        try:
+            extracted_answer = extract_answer(f"{{'answer': {answer}}}")
+        except:
+            extracted_answer = answer
+
+        try:
+            status = check_correctness(extracted_answer, row["Ground Truth Answer"], calc_id, row["Upper Limit"], row["Lower Limit"])
+
+            if status:
+                result = "Correct"
+            else:
+                result = "Incorrect"
+
+        except:
+            result = "Incorrect"
+
+    outputs = {
+        "Row Number": int(row["Row Number"]),
+        "Calculator Name": row["Calculator Name"],
+        "Calculator ID": calc_id,
+        "Category": row["Category"],
+        "Note Type": row["Note Type"],
+        "Note ID": note_id,
+        "Patient Note": row["Patient Note"],
+        "Question": row["Question"],
+        "LLM Answer": extracted_answer,
+        "LLM Chat History": messages,
+        "Ground Truth Answer": row["Ground Truth Answer"],
+        "Ground Truth Explanation": row["Ground Truth Explanation"],
+        "Result": result
+    }
+
+    return outputs
+
+async def run_conversations(rows, llm, sandbox, workers, output_file, completed, aggregator):
+    """
+    Runs up to `workers` conversations at a time; their model calls go through llm.agenerate, which keeps to the
+    request and token limits. Results are appended as conversations finish, so an interrupted run only repeats
+    the ones still in flight.
+    """
+    semaphore = asyncio.Semaphore(workers)
+
+    async def process(row):
+        async with semaphore:
+            try:
+                return row, await apply_calc(row["Question"], row["Patient Note"], llm, sandbox)
+            except Exception as e:
+                print(f"error in {row['Calculator ID']} {row['Note ID']}: {e}")
+                return row, None
+
+    tasks = [asyncio.create_task(process(row)) for row in rows]
+
+    progress = tqdm.tqdm(asyncio.as_completed(tasks), total=len(tasks))
+
+    for task in progress:
+        row, result = await task
+
+        if result is None:
+            continue
+
+        answer, messages = result
+        outputs = make_outputs(row, answer, messages)
+
+        write_outputs(output_file, outputs, completed, aggregator)
+        progress.set_postfix_str(aggregator.postfix())
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Parse arguments')
     parser.add_argument('--gpt', type=float, help='Specify GPT version')
+    parser.add_argument('--workers', type=int, default=8, help='Number of conversations run at the same time.')
+    parser.add_argument('--rpm', type=int, default=None, help='Limit on OpenAI requests per minute.')
+    parser.add_argument('--tpm', type=int, default=None, help='Limit on OpenAI prompt tokens per minute.')
+    parser.add_argument('--max_retries', type=int, default=6, help='Retries with exponential backoff for rate-limited or failed OpenAI requests.')
+    parser.add_argument('--exec_workers', type=int, default=4, help='Number of sandbox processes that run the generated code.')
+    parser.add_argument('--exec_timeout', type=int, default=10, help='Seconds of wall-clock and CPU time each code snippet may use.')
+    parser.add_argument('--exec_memory_mb', type=int, default=2048, help='Memory limit of each sandbox process in MB.')
+    parser.add_argument('--exec_recycle', type=int, default=50, help='Replace a sandbox process after it has run this many snippets.')
 
     args = parser.parse_args()
 
@@ -166,20 +226,15 @@ if __name__ == "__main__":
 
     evaluations = {}
 
-    df = pd.read_csv("../dataset/test_data.csv")
+    df = load_dataset("../dataset/test_data.csv", columns=DATASET_COLUMNS)
 
     if not os.path.exists("outputs"):
         os.makedirs("outputs")
 
     output_path = f"code_exec_{model_name}.jsonl" 
 
-    if os.path.exists("outputs/" + output_path):
-        existing = pd.read_json(output_path, lines=True)
-        existing["Calculator ID"] = existing["Calculator ID"].astype(str)
-        existing["Note ID"] = existing["Note ID"].astype(str)
-
-    else:
-        existing = None
+    completed = load_completed(os.path.join("outputs", output_path))
+    aggregator = AccuracyAggregator.from_file(os.path.join("outputs", output_path))
 
     count = 0    
 
@@ -193,57 +248,21 @@ if __name__ == "__main__":
         calc_id = str(row["Calculator ID"])
         note_id = str(row["Note ID"])
 
-        if existing is not None:
-            if existing[(existing["Calculator ID"] == calc_id) & (existing["Note ID"] == str(row["Note ID"]))].shape[0] > 0:
-                continue
+        if (calc_id, note_id) in completed:
+            continue
         
         row_list.append(row)
 
-    for row in row_list:
+    sandbox = CodeSandbox(workers=args.exec_workers, timeout=args.exec_timeout, memory_mb=args.exec_memory_mb, max_executions=args.exec_recycle)
 
-        answer, messages = process_row(row, gpt_model)
-        calc_id = str(row["Calculator ID"])
-        note_id = str(row["Note ID"])
+    # the OpenAI client with its request slots, rate limits and retries
+    from llm_inference import LLMInference
 
-        if not answer: 
-            extracted_answer = "None"
-            result = "Incorrect"
-        else:
-       
-            try:
-                extracted_answer = extract_answer(f"{{'answer': {answer}}}")
-            except:
-                extracted_answer = answer
+    llm = LLMInference(llm_name=f"OpenAI/{gpt_model}", max_concurrency=args.workers, requests_per_minute=args.rpm, tokens_per_minute=args.tpm, max_retries=args.max_retries)
 
-            try:
-                status = check_correctness(extracted_answer, row["Ground Truth Answer"], calc_id, row["Upper Limit"], row["Lower Limit"])
+    asyncio.run(run_conversations(row_list, llm, sandbox, args.workers, f"outputs/{output_path}", completed, aggregator))
 
-                if status:
-                    result = "Correct"
-                else:
-                    result = "Incorrect"
+    sandbox.close()
 
-            except:
-                result = "Incorrect"
-                
-            
-        outputs = {
-            "Row Number": int(row["Row Number"]),
-            "Calculator Name": row["Calculator Name"],
-            "Calculator ID": calc_id,
-            "Category": row["Category"],
-            "Note ID": note_id,
-            "Patient Note": row["Patient Note"],
-            "Question": row["Question"], 
-            "LLM Answer": extracted_answer,
-            "LLM Chat History": messages,
-            "Ground Truth Answer": row["Ground Truth Answer"],
-            "Ground Truth Explanation": row["Ground Truth Explanation"],
-            "Result": result
-        }
-
-        with open(f"outputs/{output_path}", "a") as f:
-            f.write(json.dumps(outputs) + "\n")
-
-    compute_overall_accuracy(output_path, model_name, "code_augmented")
+    aggregator.write_results(model_name, "code_augmented")
 
@@ -8,26 +8,75 @@ import re
 import json
 import tqdm
 import torch
+import copy
 import time
+import random
+import asyncio
 import argparse
 import transformers
 from transformers import AutoTokenizer
 import openai
-from transformers import StoppingCriteria, StoppingCriteriaList
+from transformers import StoppingCriteria, StoppingCriteriaList, DynamicCache
 import tiktoken
 import openai
 import sys
 from huggingface_hub import login
+from truncation import TextTruncator
 
 login(token=os.getenv("HUGGINGFACE_TOKEN"))
 
 openai.api_key = os.getenv("OPENAI_API_KEY") 
 
+# OpenAI errors that are worth retrying after a pause.
+RETRYABLE_OPENAI_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIError,
+    openai.error.Timeout,
+    openai.error.ServiceUnavailableError,
+    openai.error.APIConnectionError,
+    openai.error.TryAgain,
+)
+
+# strings that end a meditron response
+MEDITRON_STOP_WORDS = ["###", "User:", "\n\n\n"]
+
+
+class TokenBucket:
+    """
+    Rate limiter for asyncio code. The bucket refills at `rate` tokens per second up to `capacity`, and
+    acquire(amount) waits until `amount` tokens are available. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
 class LLMInference:
 
-    def __init__(self, llm_name="OpenAI/gpt-3.5-turbo", cache_dir="../../huggingface/hub"):
+    def __init__(self, llm_name="OpenAI/gpt-3.5-turbo", cache_dir="../../huggingface/hub", max_concurrency=8, requests_per_minute=None, tokens_per_minute=None, max_retries=6, response_cache=None):
         self.llm_name = llm_name
         self.cache_dir = cache_dir
+        # optional ResponseCache consulted by answer, answer_async and answer_batch before generating
+        self.response_cache = response_cache
         if self.llm_name.split('/')[0].lower() == "openai":
             self.model = self.llm_name.split('/')[-1]
             if "gpt-3.5" in self.model or "gpt-35" in self.model:
@@ -35,9 +84,17 @@ class LLMInference:
             elif "gpt-4" in self.model:
                 self.max_length = 8192
             self.tokenizer = tiktoken.get_encoding("cl100k_base")
+            # used by answer_async: at most max_concurrency requests in flight, optionally limited to
+            # requests_per_minute and tokens_per_minute (prompt tokens), each allowing a one-second burst
+            self.semaphore = asyncio.Semaphore(max_concurrency)
+            self.request_bucket = TokenBucket(requests_per_minute / 60, max(1, requests_per_minute / 60)) if requests_per_minute else None
+            self.token_bucket = TokenBucket(tokens_per_minute / 60, max(self.max_length, tokens_per_minute / 60)) if tokens_per_minute else None
+            self.max_retries = max_retries
         else:
             self.type = torch.bfloat16
             self.tokenizer = AutoTokenizer.from_pretrained(self.llm_name, cache_dir=self.cache_dir, legacy=False)
+            # shortens notes and one-shot examples for the models with small context windows
+            self.truncator = TextTruncator(self.tokenizer)
             if "mixtral" in llm_name.lower() or "mistral" in llm_name.lower():
                 self.tokenizer.chat_template = open('../templates/mistral-instruct.jinja').read().replace('    ', '').replace('\n', '')
                 self.max_length = 32768
@@ -59,22 +116,103 @@ class LLMInference:
                 device_map="auto",
                 model_kwargs={"cache_dir":self.cache_dir},
             )
+            # key and token ids of the last prefix seen by generate(prefix_key=...), and its past_key_values
+            self.prefix_key = None
+            self.prefix_ids = None
+            self.prefix_past = None
+            # generate_batch pads prompts on the left so that every row ends where generation starts
+            self.model.tokenizer.padding_side = "left"
+            if self.model.tokenizer.pad_token is None:
+                self.model.tokenizer.pad_token = self.model.tokenizer.eos_token
 
-    def answer(self, messages):
+    def answer(self, messages, prefix_key=None):
         # generate answers
 
-        ans = self.generate(messages)
+        key, ans = self.cached_response(messages)
+        if ans is None:
+            ans = self.generate(messages, prefix_key=prefix_key)
+            self.cache_response(key, ans)
         ans = re.sub("\s+", " ", ans)
         
         return ans
 
+    async def answer_async(self, messages):
+        # generate answers concurrently (OpenAI models only)
+
+        key, ans = self.cached_response(messages)
+        if ans is None:
+            ans = await self.agenerate(messages)
+            self.cache_response(key, ans)
+        ans = re.sub("\s+", " ", ans)
+
+        return ans
+
+    def decoding_params(self):
+        # everything besides the model and prompt that changes the response; part of the response cache key
+        if "openai" in self.llm_name.lower():
+            return {}
+        params = {"do_sample": False, "max_new_tokens": 4096, "max_length": self.max_length}
+        if "meditron" in self.llm_name.lower():
+            params["stop"] = MEDITRON_STOP_WORDS
+        return params
+
+    def cached_response(self, messages):
+        '''
+        returns (cache key, raw response), with a response of None when there is no cache or the prompt is not in it
+        '''
+        if self.response_cache is None:
+            return None, None
+
+        if "openai" in self.llm_name.lower():
+            prompt = messages
+        else:
+            prompt = self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+
+        key = self.response_cache.key(self.llm_name, prompt, self.decoding_params())
+
+        return key, self.response_cache.get(key)
+
+    def cache_response(self, key, ans):
+        if self.response_cache is not None:
+            self.response_cache.put(key, self.llm_name, ans)
+
+    def num_prompt_tokens(self, messages):
+        # roughly 4 tokens of chat formatting per message
+        return sum(len(self.tokenizer.encode(message["content"])) + 4 for message in messages)
+
+    async def agenerate(self, messages):
+        '''
+        asyncio version of generate for OpenAI models. Waits for a free request slot and for the rate limits,
+        and retries rate-limit, timeout and server errors with exponential backoff and jitter.
+        '''
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                if self.request_bucket is not None:
+                    await self.request_bucket.acquire()
+                if self.token_bucket is not None:
+                    await self.token_bucket.acquire(self.num_prompt_tokens(messages))
+
+                try:
+                    response = await openai.ChatCompletion.acreate(
+                            model=self.model,
+                            messages=messages
+                    )
+                    return response.choices[0].message.content
+                except RETRYABLE_OPENAI_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = min(60, 2 ** attempt) * random.uniform(0.5, 1.5)
+                    print(f"{type(e).__name__} from OpenAI, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
     def custom_stop(self, stop_str, input_len=0):
         stopping_criteria = StoppingCriteriaList([CustomStoppingCriteria(stop_str, self.tokenizer, input_len)])
         return stopping_criteria
 
-    def generate(self, messages, prompt=None):
+    def generate(self, messages, prompt=None, prefix_key=None):
         '''
-        generate response given messages
+        generate response given messages. For the HuggingFace models, consecutive calls with the same prefix_key
+        (e.g. one-shot prompts of one calculator) reuse the past_key_values of their shared prompt prefix
         '''
         if "openai" in self.llm_name.lower():
             response = openai.ChatCompletion.create(
@@ -89,32 +227,170 @@ class LLMInference:
             if prompt is None:
                 prompt = self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
             if "meditron" in self.llm_name.lower():
-                stopping_criteria = self.custom_stop(["###", "User:", "\n\n\n"], input_len=len(self.tokenizer.encode(prompt, add_special_tokens=True)))
-            if "llama-3" in self.llm_name.lower():
-                response = self.model(
-                    prompt,
-                    do_sample=False,
-                    eos_token_id=[self.tokenizer.eos_token_id, self.tokenizer.convert_tokens_to_ids("<|eot_id|>")],
-                    pad_token_id=self.tokenizer.eos_token_id,
-                    max_length=min(self.max_length, len(self.tokenizer.encode(prompt, add_special_tokens=True)) + 4096),
-                    truncation=True,
-                    stopping_criteria=stopping_criteria,
-                    temperature=0.0
-                )
+                stopping_criteria = self.custom_stop(MEDITRON_STOP_WORDS, input_len=len(self.tokenizer.encode(prompt, add_special_tokens=True)))
+            if prefix_key is not None:
+                response = self.generate_with_prefix(prompt, prefix_key, stopping_criteria)
             else:
                 response = self.model(
                     prompt,
-                    do_sample=False,
-                    eos_token_id=self.tokenizer.eos_token_id,
-                    pad_token_id=self.tokenizer.eos_token_id,
-                    max_length=min(self.max_length, len(self.tokenizer.encode(prompt, add_special_tokens=True)) + 4096),
-                    truncation=True,
-                    stopping_criteria=stopping_criteria,
-                    temperature=0.0
+                    **self.generation_kwargs(len(self.tokenizer.encode(prompt, add_special_tokens=True)), stopping_criteria)
                 )
             ans = response[0]["generated_text"]
         return ans
 
+    def prefix_past_key_values(self, prefix_key, input_ids):
+        '''
+        past_key_values for the start of input_ids that it shares with the previous prompt of the same prefix_key.
+        The first prompt of a key only records its tokens; the second one computes the cache for the common
+        prefix, which is then copied for every following prompt of that key. Returns None when there is no cache.
+        '''
+        if prefix_key != self.prefix_key:
+            self.prefix_key = prefix_key
+            self.prefix_ids = input_ids
+            self.prefix_past = None
+            return None
+
+        if self.prefix_past is None:
+            # at least one token of the prompt is left for generate to process
+            limit = min(len(self.prefix_ids), len(input_ids) - 1)
+            common = 0
+            while common < limit and self.prefix_ids[common] == input_ids[common]:
+                common += 1
+
+            if common == 0:
+                return None
+
+            self.prefix_ids = input_ids[:common]
+            with torch.no_grad():
+                self.prefix_past = self.model.model(
+                    torch.tensor([self.prefix_ids], device=self.model.device),
+                    past_key_values=DynamicCache(),
+                    use_cache=True
+                ).past_key_values
+
+        elif len(input_ids) <= len(self.prefix_ids) or input_ids[:len(self.prefix_ids)] != self.prefix_ids:
+            return None
+
+        return copy.deepcopy(self.prefix_past)
+
+    def generate_with_prefix(self, prompt, prefix_key, stopping_criteria=None):
+        '''
+        same as calling the pipeline on prompt, but starts generation from the cached prefix of prefix_key
+        '''
+        tokenizer = self.model.tokenizer
+        input_ids = tokenizer(prompt, add_special_tokens=False)["input_ids"]
+        past_key_values = self.prefix_past_key_values(prefix_key, input_ids)
+
+        generation_kwargs = self.generation_kwargs(len(self.tokenizer.encode(prompt, add_special_tokens=True)), stopping_criteria)
+        del generation_kwargs["truncation"]
+        if past_key_values is not None:
+            generation_kwargs["past_key_values"] = past_key_values
+
+        inputs = torch.tensor([input_ids], device=self.model.device)
+        with torch.no_grad():
+            sequence = self.model.model.generate(
+                input_ids=inputs,
+                attention_mask=torch.ones_like(inputs),
+                **generation_kwargs
+            )[0]
+
+        # the pipeline returns the prompt followed by the decoded new text
+        text = tokenizer.decode(sequence, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+        prompt_length = len(tokenizer.decode(inputs[0], skip_special_tokens=True, clean_up_tokenization_spaces=True))
+
+        return [{"generated_text": prompt + text[prompt_length:]}]
+
+    def generation_kwargs(self, prompt_len, stopping_criteria=None):
+        '''
+        greedy decoding arguments for the HuggingFace pipeline; prompt_len is the (padded) prompt length in tokens
+        '''
+        if "llama-3" in self.llm_name.lower():
+            eos_token_id = [self.tokenizer.eos_token_id, self.tokenizer.convert_tokens_to_ids("<|eot_id|>")]
+        else:
+            eos_token_id = self.tokenizer.eos_token_id
+
+        return dict(
+            do_sample=False,
+            eos_token_id=eos_token_id,
+            pad_token_id=self.tokenizer.eos_token_id,
+            max_length=min(self.max_length, prompt_len + 4096),
+            truncation=True,
+            stopping_criteria=stopping_criteria,
+            temperature=0.0
+        )
+
+    def auto_batch_size(self, seq_len, max_batch_size=32):
+        '''
+        largest batch whose key/value cache for seq_len tokens per row fits in the free GPU memory (host memory
+        without a GPU), keeping 20% of it for activations
+        '''
+        config = self.model.model.config
+        num_heads = config.num_attention_heads
+        num_kv_heads = getattr(config, "num_key_value_heads", None) or num_heads
+        head_dim = config.hidden_size // num_heads
+        bytes_per_token = 2 * config.num_hidden_layers * num_kv_heads * head_dim * torch.finfo(self.type).bits // 8
+
+        if torch.cuda.is_available():
+            free = sum(torch.cuda.mem_get_info(device)[0] for device in range(torch.cuda.device_count()))
+        else:
+            free = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+        return max(1, min(max_batch_size, int(0.8 * free // (bytes_per_token * seq_len))))
+
+    def generate_batch(self, list_of_messages, batch_size=None):
+        '''
+        generate responses for many conversations with the HuggingFace models. Prompts are sorted by length and
+        generated in left-padded batches of similar length, longest first; batch_size=None picks the size of each
+        batch from the available memory. Yields (index into list_of_messages, response) as each batch finishes.
+        '''
+        prompts = [self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True) for messages in list_of_messages]
+        lengths = [len(self.tokenizer.encode(prompt, add_special_tokens=True)) for prompt in prompts]
+        order = sorted(range(len(prompts)), key=lambda index: lengths[index], reverse=True)
+
+        start = 0
+        while start < len(order):
+            prompt_len = lengths[order[start]]
+
+            if batch_size is None:
+                size = self.auto_batch_size(min(self.max_length, prompt_len + 4096))
+            else:
+                size = batch_size
+
+            batch = order[start:start + size]
+            start += size
+
+            stopping_criteria = None
+            if "meditron" in self.llm_name.lower():
+                stopping_criteria = self.custom_stop(MEDITRON_STOP_WORDS, input_len=prompt_len)
+
+            responses = self.model(
+                [prompts[index] for index in batch],
+                batch_size=len(batch),
+                **self.generation_kwargs(prompt_len, stopping_criteria)
+            )
+
+            for index, response in zip(batch, responses):
+                yield index, response[0]["generated_text"]
+
+    def answer_batch(self, list_of_messages, batch_size=None):
+        # generate answers in batches (HuggingFace models only), yielding (index, answer) as they finish
+
+        keys = {}
+        missing = []
+
+        for index, messages in enumerate(list_of_messages):
+            key, ans = self.cached_response(messages)
+            if ans is None:
+                keys[index] = key
+                missing.append(index)
+            else:
+                yield index, re.sub("\s+", " ", ans)
+
+        for position, ans in self.generate_batch([list_of_messages[index] for index in missing], batch_size=batch_size):
+            index = missing[position]
+            self.cache_response(keys[index], ans)
+            yield index, re.sub("\s+", " ", ans)
+
 
 class CustomStoppingCriteria(StoppingCriteria):
     def __init__(self, stop_words, tokenizer, input_len=0):
@@ -122,7 +398,22 @@ class CustomStoppingCriteria(StoppingCriteria):
         self.tokenizer = tokenizer
         self.stops_words = stop_words
         self.input_len = input_len
+        # A stop word is found on the step that completes it, so only the last few tokens need to be decoded
+        # each step. Every token decodes to at least part of a character, which bounds how many tokens a stop
+        # word can span.
+        self.window = 2 * max(len(stop) for stop in stop_words) + 2
+        self.stopped = None
 
     def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor):
-        tokens = self.tokenizer.decode(input_ids[0][self.input_len:])
-        return any(stop in tokens for stop in self.stops_words)    
\ No newline at end of file
+        # one flag per row, so batched generation stops each row separately
+        if self.stopped is None or self.stopped.shape[0] != input_ids.shape[0]:
+            self.stopped = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+        start = max(self.input_len, input_ids.shape[1] - self.window)
+
+        for row in range(input_ids.shape[0]):
+            if not self.stopped[row]:
+                tokens = self.tokenizer.decode(input_ids[row][start:])
+                self.stopped[row] = any(stop in tokens for stop in self.stops_words)
+
+        return self.stopped.clone()
@@ -0,0 +1,129 @@
+import io
+import os
+import json
+import argparse
+import contextlib
+import multiprocessing
+from run import make_outputs
+from evaluate import check_correctness
+from table_stats import AccuracyAggregator
+from dataset_io import load_dataset
+
+# set in each worker: (Calculator ID, Note ID) -> current ground truth and limits from the dataset, and the
+# prompt style of the outputs being re-graded
+DATASET_ROWS = {}
+PROMPT_STYLE = None
+
+
+def init_worker(dataset_rows, prompt_style):
+    global PROMPT_STYLE
+    DATASET_ROWS.update(dataset_rows)
+    PROMPT_STYLE = prompt_style
+
+
+def regrade_line(line):
+    """
+    Re-extracts and re-grades one saved output record. Records with the raw model response
+    ("LLM Raw Response") go through extract_answer and check_correctness again; older records without it
+    keep their extracted answer and are only graded again. Returns None for a record whose
+    (Calculator ID, Note ID) is not in the dataset.
+    """
+    record = json.loads(line)
+    key = (str(record["Calculator ID"]), str(record["Note ID"]))
+
+    if key not in DATASET_ROWS:
+        return None
+
+    row = dict(record)
+    row.update(DATASET_ROWS[key])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if "LLM Raw Response" in record:
+            return make_outputs(row, record["Patient Note"], record["LLM Raw Response"], PROMPT_STYLE)
+
+        try:
+            correctness = check_correctness(record["LLM Answer"], row["Ground Truth Answer"], row["Calculator ID"], row["Upper Limit"], row["Lower Limit"])
+            record["Result"] = "Correct" if correctness else "Incorrect"
+        except Exception:
+            record["Result"] = "Incorrect"
+
+    record["Ground Truth Answer"] = row["Ground Truth Answer"]
+    record["Ground Truth Explanation"] = row["Ground Truth Explanation"]
+    record["Note Type"] = row["Note Type"]
+
+    return record
+
+
+def regrade_lines(lines):
+    # (re-graded records, (Calculator ID, Note ID) of the records not in the dataset)
+    records, missing = [], []
+
+    for line in lines:
+        record = regrade_line(line)
+        if record is None:
+            record = json.loads(line)
+            missing.append((str(record["Calculator ID"]), str(record["Note ID"])))
+        else:
+            records.append(record)
+
+    return records, missing
+
+
+def read_chunks(input_file, chunk_size):
+    chunk = []
+
+    with open(input_file) as file:
+        for line in file:
+            if line.strip():
+                chunk.append(line)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+
+    if chunk:
+        yield chunk
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Re-extract and re-grade saved model outputs without running the model again')
+    parser.add_argument('--output_file', type=str, help='Name of the file in outputs/ to re-grade, e.g. OpenAI_gpt-4_zero_shot.jsonl')
+    parser.add_argument('--prompt', type=str, default=None, help='Prompt style the outputs were generated with. By default it is read from the end of the file name.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of grading processes.')
+    parser.add_argument('--chunk_size', type=int, default=64, help='Records sent to a worker at a time.')
+
+    args = parser.parse_args()
+
+    name = args.output_file[:-len(".jsonl")] if args.output_file.endswith(".jsonl") else args.output_file
+    prompt_style = args.prompt
+
+    if prompt_style is None:
+        prompt_style = next((style for style in ["direct_answer", "zero_shot", "one_shot"] if name.endswith(style)), "zero_shot")
+
+    df = load_dataset("../dataset/test_data.csv", columns=["Calculator ID", "Note ID", "Note Type", "Ground Truth Answer", "Ground Truth Explanation", "Upper Limit", "Lower Limit"])
+    dataset_rows = {
+        (str(row["Calculator ID"]), str(row["Note ID"])): {
+            "Ground Truth Answer": row["Ground Truth Answer"],
+            "Ground Truth Explanation": row["Ground Truth Explanation"],
+            "Upper Limit": row["Upper Limit"],
+            "Lower Limit": row["Lower Limit"],
+            "Note Type": row["Note Type"]
+        }
+        for _, row in df.iterrows()
+    }
+
+    regraded_path = f"{name}_regraded.jsonl"
+    aggregator = AccuracyAggregator()
+    missing = []
+
+    with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(dataset_rows, prompt_style)) as pool, open(f"outputs/{regraded_path}", "w") as file:
+        for outputs, chunk_missing in pool.imap(regrade_lines, read_chunks(f"outputs/{args.output_file}", args.chunk_size)):
+            for record in outputs:
+                file.write(json.dumps(record) + "\n")
+                aggregator.update(record)
+            missing.extend(chunk_missing)
+
+    if missing:
+        print(f"skipped {len(missing)} records not in the dataset (Calculator ID, Note ID): {', '.join(map(str, missing[:10]))}{' ...' if len(missing) > 10 else ''}")
+
+    print(aggregator.write_results(name, "regraded"))
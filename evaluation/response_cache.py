@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "response_cache.sqlite")
+
+# hits whose last-used times are kept in memory before they are written in one transaction
+FLUSH_EVERY = 1000
+
+
+class ResponseCache:
+    """
+    On-disk cache of raw LLM responses, stored in SQLite. Entries are keyed by a SHA-256 hash of the model
+    name, the prompt text and the decoding parameters, so a rerun of run.py sends only prompts it has not
+    seen before. Counts hits and misses for the current session.
+
+    Hits only read the database. Their last-used times, which evict uses, are written in batches: with the
+    next put, every FLUSH_EVERY hits, and on evict and close.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.last_used = {}
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, response TEXT, created REAL, last_used REAL)"
+        )
+        self.connection.commit()
+
+    def key(self, model, prompt, decoding_params):
+        # prompt is the prompt text, or the list of chat messages for the OpenAI models
+        content = json.dumps({"model": model, "prompt": prompt, "decoding": decoding_params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        row = self.connection.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.last_used[key] = time.time()
+
+        if len(self.last_used) >= FLUSH_EVERY:
+            self.flush()
+
+        return row[0]
+
+    def write_last_used(self):
+        self.connection.executemany("UPDATE responses SET last_used = ? WHERE key = ?", [(used, key) for key, used in self.last_used.items()])
+        self.last_used = {}
+
+    def flush(self):
+        # writes the last-used times of the hits since the previous flush
+        if self.last_used:
+            self.write_last_used()
+            self.connection.commit()
+
+    def put(self, key, model, response):
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (key, model, response, created, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, model, response, now, now)
+        )
+        # pending last-used times go in the same transaction
+        self.write_last_used()
+        self.connection.commit()
+
+    def size(self):
+        # number of entries and bytes of stored responses
+        count, num_bytes = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(response AS BLOB))), 0) FROM responses"
+        ).fetchone()
+        return count, num_bytes
+
+    def evict(self, max_age_days=None, max_size_mb=None):
+        """
+        Removes entries created more than max_age_days ago, then the least recently used entries until the
+        stored responses take at most max_size_mb. Returns the number of entries removed.
+        """
+        self.flush()
+        removed = 0
+
+        if max_age_days is not None:
+            cursor = self.connection.execute("DELETE FROM responses WHERE created < ?", (time.time() - max_age_days * 86400,))
+            removed += cursor.rowcount
+
+        if max_size_mb is not None:
+            _, num_bytes = self.size()
+            excess = num_bytes - max_size_mb * 1024 * 1024
+            rows = self.connection.execute("SELECT key, LENGTH(CAST(response AS BLOB)) FROM responses ORDER BY last_used").fetchall()
+            keys = []
+
+            for key, length in rows:
+                if excess <= 0:
+                    break
+                keys.append((key,))
+                excess -= length
+
+            self.connection.executemany("DELETE FROM responses WHERE key = ?", keys)
+            removed += len(keys)
+
+        self.connection.commit()
+
+        if removed:
+            self.connection.execute("VACUUM")
+
+        return removed
+
+    def stats(self):
+        count, num_bytes = self.size()
+        return f"response cache: {self.hits} hits, {self.misses} misses, {count} entries ({num_bytes / 1024 / 1024:.1f} MB)"
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Inspect or shrink the LLM response cache')
+    parser.add_argument('--path', type=str, default=DEFAULT_CACHE_PATH, help='Path of the SQLite cache file.')
+    parser.add_argument('--max_age_days', type=float, default=None, help='Remove responses older than this many days.')
+    parser.add_argument('--max_size_mb', type=float, default=None, help='Remove the least recently used responses until the cache is at most this size.')
+
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.path)
+
+    if args.max_age_days is not None or args.max_size_mb is not None:
+        print(f"removed {cache.evict(args.max_age_days, args.max_size_mb)} entries")
+
+    count, num_bytes = cache.size()
+    print(f"{count} entries ({num_bytes / 1024 / 1024:.1f} MB) in {args.path}")
+    cache.close()
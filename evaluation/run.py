@@ -5,12 +5,23 @@ import tqdm
 import argparse
 import pandas as pd
 import sys
-from llm_inference import LLMInference
+from response_cache import ResponseCache, DEFAULT_CACHE_PATH
 from evaluate import check_correctness
 import math
 import numpy as np
 import ast
-from table_stats import compute_overall_accuracy
+import asyncio
+from table_stats import AccuracyAggregator
+from answer_extractor import AnswerExtractor
+from dataset_io import load_dataset
+
+
+# shared by extract_answer and regrade.py; output types come from name_to_python.json
+EXTRACTOR = AnswerExtractor()
+
+# dataset columns used to prompt and grade; Output Type and Relevant Entities are not read
+DATASET_COLUMNS = ["Row Number", "Calculator ID", "Calculator Name", "Category", "Note ID", "Note Type", "Patient Note", "Question",
+                   "Ground Truth Answer", "Lower Limit", "Upper Limit", "Ground Truth Explanation"]
 
 
 def zero_shot(note, question):
@@ -50,107 +61,170 @@ def one_shot_meditron(note, question, one_shot_question, example_note, example_o
     return system_msg, user_temp
 
 def extract_answer(answer, calid):
+    return EXTRACTOR.extract(answer, calid)
+
+def load_completed(output_file):
+    """
+    Returns the set of (Calculator ID, Note ID) pairs that already have a record in output_file, so that an
+    interrupted run can skip them when it is restarted.
+    """
+    completed = set()
+
+    if not os.path.exists(output_file):
+        return completed
+
+    with open(output_file) as file:
+        for line in file:
+            record = json.loads(line)
+            completed.add((str(record["Calculator ID"]), str(record["Note ID"])))
+
+    return completed
+
+def build_messages(row, prompt_style, model_name, llm, one_shot_json):
+
+    patient_note = row["Patient Note"]
+    question = row["Question"] 
+    calculator_id = str(row["Calculator ID"])
+
+    if "pmc_llama" in model_name.lower():
+        patient_note = llm.truncator.truncate(patient_note, 256)
+    if prompt_style == "zero_shot":
+        system, user = zero_shot(patient_note, question)
+    elif prompt_style == "one_shot":
+        if calculator_id == "24":
+            one_shot_question = "Based on the patient's dose of Hydrocortisone IV, what is the equivalent dosage in mg of Dexamethasone PO?"
+        else:
+            one_shot_question = question
+    
+        example = one_shot_json[calculator_id]
+        example_note = example["Patient Note"]
+        example_thinking = example["Response"]["step_by_step_thinking"]
+        if "meditron" in model_name.lower():
+            example_note, example_thinking = llm.truncator.truncate_many([example_note, example_thinking], 512)
+        elif "pmc_llama" in model_name.lower():
+            example_note, example_thinking = llm.truncator.truncate_many([example_note, example_thinking], 256)
+        system, user = one_shot(patient_note, question, one_shot_question, example_note, {"step_by_step_thinking": example_thinking, "answer": example["Response"]["answer"]})
+    elif prompt_style == "direct_answer":
+        system, user = direct_answer(patient_note, question)
+
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user}
+    ]
+
+    return patient_note, messages
+
+def make_outputs(row, patient_note, answer, prompt_style):
+
+    question = row["Question"] 
+    calculator_id = str(row["Calculator ID"])
+    note_id = str(row["Note ID"])
+
+    try:
+        answer_value, explanation = extract_answer(answer, int(calculator_id))
+
+        print(answer_value)
+        print(explanation)
+        
+        correctness = check_correctness(answer_value, row["Ground Truth Answer"], calculator_id, row["Upper Limit"], row["Lower Limit"])
+
+        status = "Correct" if correctness else "Incorrect"
+
+        outputs = {
+            "Row Number": int(row["Row Number"]),
+            "Calculator Name": row["Calculator Name"],
+            "Calculator ID": calculator_id,
+            "Category": row["Category"],
+            "Note Type": row["Note Type"],
+            "Note ID": note_id,
+            "Patient Note": patient_note,
+            "Question": question,
+            "LLM Answer": answer_value, 
+            "LLM Explanation": explanation,
+            "LLM Raw Response": answer,
+            "Ground Truth Answer": row["Ground Truth Answer"],
+            "Ground Truth Explanation": row["Ground Truth Explanation"],
+            "Result": status
+        }
+
+        if prompt_style == "direct_answer":
+            outputs["LLM Explanation"] = "N/A"
+    
+    
+    except Exception as e:
+        outputs = {
+            "Row Number": int(row["Row Number"]),
+            "Calculator Name": row["Calculator Name"],
+            "Calculator ID": calculator_id,
+            "Category": row["Category"],
+            "Note Type": row["Note Type"],
+            "Note ID": note_id,
+            "Patient Note": patient_note,
+            "Question": question,
+            "LLM Answer": str(e), 
+            "LLM Explanation": str(e),
+            "LLM Raw Response": answer,
+            "Ground Truth Answer": row["Ground Truth Answer"],
+            "Ground Truth Explanation": row["Ground Truth Explanation"],
+            "Result": "Incorrect"
+        }
+        print(f"error in {calculator_id} {note_id}: "  + str(e))
+
+        if prompt_style == "direct_answer":
+            outputs["LLM Explanation"] = "N/A"
+
+    return outputs
+
+def write_outputs(output_file, outputs, completed, aggregator=None):
+    with open(output_file, "a") as f:
+        f.write(json.dumps(outputs) + "\n")
+
+    completed.add((outputs["Calculator ID"], outputs["Note ID"]))
+
+    if aggregator is not None:
+        aggregator.update(outputs)
+
+async def run_concurrently(rows, prompt_style, model_name, llm, one_shot_json, output_file, completed, aggregator=None):
+    """
+    Sends all rows to the (OpenAI) model at once; LLMInference limits how many requests are in flight.
+    Records are appended in the order the responses arrive, so an interrupted run only repeats the rows that
+    were still waiting.
+    """
+
+    async def process(row):
+        patient_note, messages = build_messages(row, prompt_style, model_name, llm, one_shot_json)
+        try:
+            answer = await llm.answer_async(messages)
+        except Exception as e:
+            print(f"request failed for {row['Calculator ID']} {row['Note ID']}: {e}")
+            return None
+        return make_outputs(row, patient_note, answer, prompt_style)
 
-    calid = int(calid)
-    extracted_answer = re.findall(r'[Aa]nswer":\s*(.*?)\}', answer)
-    matches = re.findall(r'"step_by_step_thinking":\s*"([^"]+)"\s*,\s*"[Aa]nswer"', answer)
-
+    tasks = [asyncio.create_task(process(row)) for row in rows]
 
-    if matches:
-    # Select the last match
-        last_match = matches[-1]
-        explanation = last_match    
-    else:
-        explanation = "No Explanation"
+    progress = tqdm.tqdm(asyncio.as_completed(tasks), total=len(tasks))
 
+    for task in progress:
+        outputs = await task
 
-    if len(extracted_answer) == 0:
-        extracted_answer = "Not Found"
-    else:
-        extracted_answer = extracted_answer[-1].strip().strip('"')
-        if extracted_answer == "str(short_and_direct_answer_of_the_question)" or extracted_answer == "str(value which is the answer to the question)" or extracted_answer == "X.XX":
-            extracted_answer = "Not Found"
-    
-    if calid in [13, 68]:
-        # Output Type: date
-        match = re.search(r"^(0?[1-9]|1[0-2])\/(0?[1-9]|[12][0-9]|3[01])\/(\d{4})", extracted_answer)
-        if match:
-            month = int(match.group(1))
-            day = int(match.group(2))
-            year = match.group(3)
-            answer = f"{month:02}/{day:02}/{year}"
-        else:
-            answer = "N/A"
-
-    elif calid in [69]:
-        # Output Type: integer (A, B)
-        match = re.search(r"\(?[\"\']?(\d+)\s*(weeks?)?[\"\']?,?\s*[\"\']?(\d+)\s*(days?)?[\"\']?\s*\)?", extracted_answer)
-        ground_truth = f"({match.group(1)}, {match.group(3)})"
-        extracted_answer = extracted_answer.replace("[", "(").replace("]", ")").replace("'", "").replace('"', "")
-        match = re.search(r"\(?[\"\']?(\d+)\s*(weeks?)?[\"\']?,?\s*[\"\']?(\d+)\s*(days?)?[\"\']?\s*\)?", extracted_answer)
-        if match:
-            weeks = match.group(1)
-            days = match.group(3)
-            answer = f"({weeks}, {days})"
-        else:
-            answer = "N/A"
-    elif calid in [4, 15, 16, 17, 18, 20, 21, 25, 27, 28, 29, 32, 33, 36, 43, 45, 48, 51, 69]:
-        # Output Type: integer A
-        match = re.search(r"(\d+) out of", extracted_answer)
-        if match: # cases like "3 out of 5"
-            answer = match.group(1)
-        else:
-            match = re.search(r"-?\d+(, ?-?\d+)+", extracted_answer)
-            if match: # cases like "3, 4, 5"
-                answer = str(len(match.group(0).split(",")))
-            else:
-                # match = re.findall(r"(?<!-)\d+", extracted_answer)
-                match = re.findall(r"(-?\d+(\.\d+)?)", extracted_answer)
-                # match = re.findall(r"-?\d+", extracted_answer)
-                if len(match) > 0: # find the last integer
-                    answer = match[-1][0]
-                    # answer = match[-1].lstrip("0")
-                else:
-                    answer = "N/A"
-    elif calid in [2,  3,  5,  6,  7,  8,  9, 10, 11, 19, 22, 23, 24, 26, 30, 31, 38, 39, 40, 44, 46, 49, 56, 57, 58, 59, 60, 61, 62, 63, 64, 65, 66, 67]:
-        # Output Type: decimal
-        match = re.search(r"str\((.*)\)", extracted_answer)
-        if match: # cases like "str(round((140 * (3.15 - 136) / 1400) * 72.36)"
-            expression = match.group(1).replace("^", "**").replace("is odd", "% 2 == 1").replace("is even", "% 2 == 0").replace("sqrt", "math.sqrt").replace(".math", "").replace("weight", "").replace("height", "").replace("mg/dl", "").replace("g/dl", "").replace("mmol/L", "").replace("kg", "").replace("g", "").replace("mEq/L", "")
-            expression = expression.split('#')[0] # cases like round(45.5 * 166 - 45.3 + 0.4 * (75 - (45.5 * 166 - 45.3))))) # Calculation: ...
-            if expression.count('(') > expression.count(')'): # add missing ')
-                expression += ')' * (expression.count('(') - expression.count(')'))
-            elif expression.count(')') > expression.count('('): # add missing (
-                expression = '(' * (expression.count(')') - expression.count('(')) + expression
-            try:
-                answer = eval(expression, {"__builtins__": None}, {"min": min, "pow": pow, "round": round, "abs": abs, "int": int, "float": float, "math": math, "np": np, "numpy": np})
-            except:
-                print(f"Error in evaluating expression: {expression}")
-                answer = "N/A"
-        else:
-            match = re.search(r"(-?\d+(\.\d+)?)\s*mL/min/1.73", extracted_answer)
-            if match: # cases like "8.1 mL/min/1.73 m\u00b2"
-                answer = eval(match.group(1))
-            else:
-                match = re.findall(r"(-?\d+(\.\d+)?)\%", extracted_answer)
-                if len(match) > 0: # cases like "53.1%"
-                    answer = eval(match[-1][0]) / 100
-                else:
-                    match = re.findall(r"(-?\d+(\.\d+)?)", extracted_answer)
-                    if len(match) > 0: # cases like "8.1 mL/min/1.73 m\u00b2" or "11.1"
-                        answer = eval(match[-1][0])
-                    else:
-                        answer = "N/A"
-        if answer != "N/A":
-            answer = str(answer)          
- 
-    return answer, explanation 
+        if outputs is not None:
+            write_outputs(output_file, outputs, completed, aggregator)
+            if aggregator is not None:
+                progress.set_postfix_str(aggregator.postfix())
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description='Parse arguments')
     parser.add_argument('--model', type=str, help='Specify which model you are using. Options are OpenAI/GPT-4, OpenAI/GPT-3.5-turbo, mistralai/Mistral-7B-Instruct-v0.2, mistralai/Mixtral-8x7B-Instruct-v0.1, meta-llama/Meta-Llama-3-8B-Instruct, meta-llama/Meta-Llama-3-70B-Instruct, epfl-llm/meditron-70b, axiong/PMC_LLaMA_13B')
     parser.add_argument('--prompt', type=str, help='Specify prompt type. Options are direct_answer, zero_shot, one_shot')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of OpenAI requests to run at the same time. With the default of 1, rows are run one after the other.')
+    parser.add_argument('--rpm', type=int, default=None, help='Limit on OpenAI requests per minute when --concurrency is above 1.')
+    parser.add_argument('--tpm', type=int, default=None, help='Limit on OpenAI prompt tokens per minute when --concurrency is above 1.')
+    parser.add_argument('--batch_size', type=int, default=None, help='Number of prompts generated together by the HuggingFace models. By default it is chosen from the available memory.')
+    parser.add_argument('--prefix_cache', action='store_true', help='For one_shot runs of the HuggingFace models, generate the rows of each calculator one after the other, reusing the cached keys/values of their shared one-shot example instead of batching.')
+    parser.add_argument('--cache_path', type=str, default=DEFAULT_CACHE_PATH, help='SQLite file in which model responses are cached, so reruns do not repeat inference.')
+    parser.add_argument('--no_cache', action='store_true', help='Always query the model, without reading or writing the response cache.')
+    parser.add_argument('--max_retries', type=int, default=6, help='Retries with exponential backoff for rate-limited or failed OpenAI requests when --concurrency is above 1.')
 
     args = parser.parse_args()
 
@@ -162,130 +236,82 @@ if __name__ == "__main__":
     if not os.path.exists("outputs"):
         os.makedirs("outputs")
 
-    if not os.path.exists(os.path.join("outputs", output_path)):
-        existing = None
-    else:
-        existing = pd.read_json(os.path.join("outputs", output_path), lines=True)
-        existing["Calculator ID"] = existing["Calculator ID"].astype(str)
-        existing["Note ID"] = existing["Note ID"].astype(str)
+    completed = load_completed(os.path.join("outputs", output_path))
+
+    # counts of the rows already written, updated as new rows are written and shown in the progress bar
+    aggregator = AccuracyAggregator.from_file(os.path.join("outputs", output_path))
+
+    # imported here so that regrade.py and generate_code_prompt.py can use this module without torch/transformers
+    from llm_inference import LLMInference
 
     if "meditron" in model_name.lower():
         zero_shot = zero_shot_meditron
         direct_answer = direct_answer_meditron
         one_shot = one_shot_meditron
 
-    llm = LLMInference(llm_name=model_name)
+    response_cache = None if args.no_cache else ResponseCache(args.cache_path)
+
+    llm = LLMInference(llm_name=model_name, max_concurrency=args.concurrency, requests_per_minute=args.rpm, tokens_per_minute=args.tpm, max_retries=args.max_retries, response_cache=response_cache)
 
     with open("one_shot_finalized_explanation.json", "r") as file:
         one_shot_json = json.load(file)
 
-    df = pd.read_csv("../dataset/test_data.csv")
+    df = load_dataset("../dataset/test_data.csv", columns=DATASET_COLUMNS)
 
-    for index in tqdm.tqdm(range(len(df))):
+    rows = [row for _, row in df.iterrows() if (str(row["Calculator ID"]), str(row["Note ID"])) not in completed]
 
-        row = df.iloc[index]
+    # tokenize the texts that get shortened in one batch up front; build_messages then reads them from the cache
+    if "pmc_llama" in model_name.lower():
+        llm.truncator.truncate_many([row["Patient Note"] for row in rows], 256)
+        if prompt_style == "one_shot":
+            llm.truncator.truncate_many([text for example in one_shot_json.values() for text in (example["Patient Note"], example["Response"]["step_by_step_thinking"])], 256)
+    elif "meditron" in model_name.lower() and prompt_style == "one_shot":
+        llm.truncator.truncate_many([text for example in one_shot_json.values() for text in (example["Patient Note"], example["Response"]["step_by_step_thinking"])], 512)
 
-        patient_note = row["Patient Note"]
-        question = row["Question"] 
-        calculator_id = str(row["Calculator ID"])
-        note_id = str(row["Note ID"])
+    use_prefix_cache = args.prefix_cache and prompt_style == "one_shot" and "openai" not in model_name.lower()
 
-        if existing is not None:
-            if existing[(existing["Calculator ID"] == calculator_id) & (existing["Note ID"] == str(row["Note ID"]))].shape[0] > 0:
-                continue
+    if use_prefix_cache:
+        # the one-shot example is the same for every row of a calculator, so its rows are run together
+        rows.sort(key=lambda row: int(row["Calculator ID"]))
 
-        if "pmc_llama" in model_name.lower():
-            patient_note = llm.tokenizer.decode(llm.tokenizer.encode(patient_note, add_special_tokens=False)[:256])
-        if prompt_style == "zero_shot":
-            system, user = zero_shot(patient_note, question)
-        elif prompt_style == "one_shot":
-            if calculator_id == "24":
-                one_shot_question = "Based on the patient's dose of Hydrocortisone IV, what is the equivalent dosage in mg of Dexamethasone PO?"
-            else:
-                one_shot_question = question
-        
-            example = one_shot_json[calculator_id]
-            if "meditron" in model_name.lower():
-                example["Patient Note"] = llm.tokenizer.decode(llm.tokenizer.encode(example["Patient Note"], add_special_tokens=False)[:512])
-                example["Response"]["step_by_step_thinking"] = llm.tokenizer.decode(llm.tokenizer.encode(example["Response"]["step_by_step_thinking"], add_special_tokens=False)[:512])
-            elif "pmc_llama" in model_name.lower():
-                example["Patient Note"] = llm.tokenizer.decode(llm.tokenizer.encode(example["Patient Note"], add_special_tokens=False)[:256])
-                example["Response"]["step_by_step_thinking"] = llm.tokenizer.decode(llm.tokenizer.encode(example["Response"]["step_by_step_thinking"], add_special_tokens=False)[:256])
-            system, user = one_shot(patient_note, question, one_shot_question, example["Patient Note"], {"step_by_step_thinking": example["Response"]["step_by_step_thinking"], "answer": example["Response"]["answer"]})
-        elif prompt_style == "direct_answer":
-            system, user = direct_answer(patient_note, question)
-
-        print("System:\n", system)
-        print("User:\n", user)
-
-        messages = [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user}
-        ]
-
-        answer = llm.answer(messages)
-        print(answer)
-       
-        try:
-            answer_value, explanation = extract_answer(answer, int(calculator_id))
-
-            print(answer_value)
-            print(explanation)
-            
-            correctness = check_correctness(answer_value, row["Ground Truth Answer"], calculator_id, row["Upper Limit"], row["Lower Limit"])
-
-            status = "Correct" if correctness else "Incorrect"
-
-            outputs = {
-                "Row Number": int(row["Row Number"]),
-                "Calculator Name": row["Calculator Name"],
-                "Calculator ID": calculator_id,
-                "Category": row["Category"],
-                "Note ID": note_id,
-                "Patient Note": patient_note,
-                "Question": question,
-                "LLM Answer": answer_value, 
-                "LLM Explanation": explanation,
-                "Ground Truth Answer": row["Ground Truth Answer"],
-                "Ground Truth Explanation": row["Ground Truth Explanation"],
-                "Result": status
-            }
-
-            if prompt_style == "direct_answer":
-                outputs["LLM Explanation"] = "N/A"
-        
-        
-        except Exception as e:
-            outputs = {
-                "Row Number": int(row["Row Number"]),
-                "Calculator Name": row["Calculator Name"],
-                "Calculator ID": calculator_id,
-                "Category": row["Category"],
-                "Note ID": note_id,
-                "Patient Note": patient_note,
-                "Question": question,
-                "LLM Answer": str(e), 
-                "LLM Explanation": str(e),
-                "Ground Truth Answer": row["Ground Truth Answer"],
-                "Ground Truth Explanation": row["Ground Truth Explanation"],
-                "Result": "Incorrect"
-            }
-            print(f"error in {calculator_id} {note_id}: "  + str(e))
-
-            if prompt_style == "direct_answer":
-                outputs["LLM Explanation"] = "N/A"
-
-        print(outputs)
-        
-        with open(f"outputs/{output_path}", "a") as f:
-            f.write(json.dumps(outputs) + "\n")
+    if args.concurrency > 1 and "openai" in model_name.lower():
+        asyncio.run(run_concurrently(rows, prompt_style, model_name, llm, one_shot_json, f"outputs/{output_path}", completed, aggregator))
+    elif "openai" not in model_name.lower() and not use_prefix_cache:
+        prompts = [build_messages(row, prompt_style, model_name, llm, one_shot_json) for row in rows]
 
-    compute_overall_accuracy(output_path, model_name, prompt_style)
+        progress = tqdm.tqdm(llm.answer_batch([messages for _, messages in prompts], batch_size=args.batch_size), total=len(rows))
 
+        for index, answer in progress:
+            print(answer)
 
+            outputs = make_outputs(rows[index], prompts[index][0], answer, prompt_style)
 
-    
+            print(outputs)
 
+            write_outputs(f"outputs/{output_path}", outputs, completed, aggregator)
+            progress.set_postfix_str(aggregator.postfix())
+    else:
+        progress = tqdm.tqdm(rows)
 
+        for row in progress:
 
-        
+            patient_note, messages = build_messages(row, prompt_style, model_name, llm, one_shot_json)
+
+            print("System:\n", messages[0]["content"])
+            print("User:\n", messages[1]["content"])
+
+            answer = llm.answer(messages, prefix_key=str(row["Calculator ID"]) if use_prefix_cache else None)
+            print(answer)
+
+            outputs = make_outputs(row, patient_note, answer, prompt_style)
+
+            print(outputs)
+
+            write_outputs(f"outputs/{output_path}", outputs, completed, aggregator)
+            progress.set_postfix_str(aggregator.postfix())
+
+    if response_cache is not None:
+        print(response_cache.stats())
+        response_cache.close()
+
+    aggregator.write_results(model_name, prompt_style)
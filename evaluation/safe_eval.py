@@ -0,0 +1,155 @@
+import re
+import ast
+import math
+import operator
+import functools
+import numpy as np
+
+# Arithmetic evaluator used instead of eval() on model answers and dataset limits. Only numbers, tuples,
+# arithmetic/comparison/boolean operators, conditional expressions and a fixed set of functions are allowed,
+# so hostile model output cannot reach builtins, attributes or huge allocations. Plain numeric literals skip
+# parsing altogether.
+#
+# Where eval() with the old namespace (min, pow, round, abs, int, float and the math and numpy modules) gave a
+# result, safe_eval gives the same one, except that it raises ValueError for:
+# - math and numpy functions outside MATH_NAMES and NUMPY_NAMES, e.g. math.cos or np.mean
+# - constants other than int and float, e.g. strings
+# - arithmetic on anything but numbers, e.g. (1, 2) * 3
+# - integer powers whose result would have more than MAX_INTEGER_BITS bits, which eval would build
+
+# integers without leading zeros (eval rejects those) and decimals
+NUMBER = re.compile(r"-?(?:0|[1-9]\d*)|-?\d+\.\d+")
+
+# largest integer result of ** and pow, in bits; float powers overflow on their own, as with eval
+MAX_INTEGER_BITS = 100000
+
+NUMBER_TYPES = (int, float, complex, np.number)
+
+
+def safe_pow(base, exponent):
+    # |base| ** exponent has at most bit_length(base) * exponent bits; 0 and ±1 never grow
+    if isinstance(base, int) and isinstance(exponent, int) and abs(base) > 1 and abs(base).bit_length() * exponent > MAX_INTEGER_BITS:
+        raise ValueError("result is too large")
+    return operator.pow(base, exponent)
+
+
+def checked_pow(base, exponent, modulo=None):
+    if modulo is not None:
+        return pow(base, exponent, modulo)
+    return safe_pow(base, exponent)
+
+
+MATH_NAMES = {
+    "sqrt": math.sqrt, "exp": math.exp, "log": math.log, "log10": math.log10, "log2": math.log2,
+    "floor": math.floor, "ceil": math.ceil, "fabs": math.fabs, "trunc": math.trunc, "pow": math.pow,
+    "pi": math.pi, "e": math.e
+}
+
+NUMPY_NAMES = {
+    "sqrt": np.sqrt, "exp": np.exp, "log": np.log, "log10": np.log10, "log2": np.log2,
+    "floor": np.floor, "ceil": np.ceil, "abs": np.abs, "round": np.round, "power": np.power,
+    "maximum": np.maximum, "minimum": np.minimum, "pi": np.pi, "e": np.e
+}
+
+# names available to expressions; modules are dicts of their allowed attributes
+DEFAULT_NAMES = {
+    "min": min, "pow": checked_pow, "round": round, "abs": abs, "int": int, "float": float,
+    "math": MATH_NAMES, "np": NUMPY_NAMES, "numpy": NUMPY_NAMES
+}
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: safe_pow
+}
+
+UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg, ast.Not: operator.not_}
+
+COMPARISONS = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge
+}
+
+
+def evaluate_node(node, names):
+
+    if isinstance(node, ast.Expression):
+        return evaluate_node(node.body, names)
+
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, (int, float)):
+            return node.value
+        raise ValueError(f"unsupported constant: {node.value!r}")
+
+    if isinstance(node, ast.Tuple):
+        return tuple(evaluate_node(element, names) for element in node.elts)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left = evaluate_node(node.left, names)
+        right = evaluate_node(node.right, names)
+        if not isinstance(left, NUMBER_TYPES) or not isinstance(right, NUMBER_TYPES):
+            raise ValueError("arithmetic is only supported on numbers")
+        return BINARY_OPERATORS[type(node.op)](left, right)
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](evaluate_node(node.operand, names))
+
+    if isinstance(node, ast.Compare) and all(type(op) in COMPARISONS for op in node.ops):
+        left = evaluate_node(node.left, names)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = evaluate_node(comparator, names)
+            if not COMPARISONS[type(op)](left, right):
+                return False
+            left = right
+        return True
+
+    if isinstance(node, ast.IfExp):
+        # only the chosen branch is evaluated, as in python
+        return evaluate_node(node.body if evaluate_node(node.test, names) else node.orelse, names)
+
+    if isinstance(node, ast.BoolOp):
+        # like python, returns the operand that decides the result
+        for value in node.values:
+            result = evaluate_node(value, names)
+            if bool(result) != isinstance(node.op, ast.And):
+                return result
+        return result
+
+    if isinstance(node, ast.Name):
+        if node.id not in names:
+            raise NameError(f"name '{node.id}' is not defined")
+        return names[node.id]
+
+    if isinstance(node, ast.Attribute):
+        module = evaluate_node(node.value, names)
+        if isinstance(module, dict) and node.attr in module:
+            return module[node.attr]
+        raise ValueError(f"unsupported attribute: {node.attr}")
+
+    if isinstance(node, ast.Call) and not node.keywords:
+        function = evaluate_node(node.func, names)
+        if not callable(function) or isinstance(function, dict):
+            raise ValueError("unsupported call")
+        return function(*[evaluate_node(argument, names) for argument in node.args])
+
+    raise ValueError(f"unsupported expression: {type(node).__name__}")
+
+
+def safe_eval(expression, names=DEFAULT_NAMES):
+    """
+    Evaluates an arithmetic expression such as "round((140 - 65) * 72 / (72 * 1.2))" or "(4, 3)".
+    Syntax errors are raised as they would be by eval(); anything outside the allowed subset raises ValueError.
+    """
+    expression = expression.strip(" \t")
+
+    if NUMBER.fullmatch(expression):
+        return float(expression) if "." in expression else int(expression)
+
+    return evaluate_node(ast.parse(expression, filename="<string>", mode="eval"), names)
+
+
+@functools.lru_cache(maxsize=None)
+def parse_limit(value):
+    # ground truths and limits repeat across runs and comparisons, so each distinct value is parsed once
+    if isinstance(value, str):
+        return safe_eval(value)
+    return value
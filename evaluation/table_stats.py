@@ -1,57 +1,257 @@
 import json 
-import numpy as np
+import math
 import os
+import argparse
+import numpy as np
+
+
+def proportion_stats(correct, total):
+    # accuracy in percent and the standard error of the proportion, rounded as in the results files
+    if total == 0:
+        return {"average": float("nan"), "std": float("nan")}
+    mean = correct / total
+    return {
+        "average": round(mean * 100, 2),
+        "std": round(math.sqrt(mean * (1 - mean) / total), 2)
+    }
+
+
+class AccuracyAggregator:
+    """
+    Running counts of correct and total rows per category, per calculator and per note type, updated with
+    each output record as it is written. Aggregators of shards run in parallel can be combined with merge,
+    and saved/loaded as JSON, so no outputs file has to be read again to get the results.
+    """
+
+    GROUPS = {"category": "Category", "calculator": "Calculator Name", "note type": "Note Type"}
+
+    def __init__(self):
+        # group -> name -> [correct, total]; dicts keep the order in which names were first seen
+        self.counts = {group: {} for group in self.GROUPS}
+        self.correct = 0
+        self.total = 0
+
+    def update(self, record):
+        correct = int(record["Result"] == "Correct")
+
+        for group, field in self.GROUPS.items():
+            name = record.get(field)
+            if name is None:
+                continue
+            counts = self.counts[group].setdefault(name, [0, 0])
+            counts[0] += correct
+            counts[1] += 1
+
+        self.correct += correct
+        self.total += 1
+
+    def merge(self, other):
+        for group, names in other.counts.items():
+            for name, (correct, total) in names.items():
+                counts = self.counts[group].setdefault(name, [0, 0])
+                counts[0] += correct
+                counts[1] += total
+
+        self.correct += other.correct
+        self.total += other.total
+
+        return self
+
+    def accuracy(self):
+        return self.correct / self.total if self.total else 0.0
+
+    def postfix(self):
+        # short summary for the tqdm progress bar
+        return f"accuracy={self.accuracy() * 100:.2f}% ({self.correct}/{self.total})"
+
+    def stats(self, group="category"):
+        # {name: {"average", "std"}} for one group, plus "overall" for the category group
+        stats = {name: proportion_stats(correct, total) for name, (correct, total) in self.counts[group].items()}
+
+        if group == "category":
+            stats["overall"] = proportion_stats(self.correct, self.total)
+
+        return stats
+
+    def write_results(self, model_name, prompt_style):
+        """
+        Writes results/results_<model>_<prompt>.json (per-category and overall accuracy, as before) and
+        results/results_<model>_<prompt>_breakdown.json with the per-calculator and per-note-type accuracy.
+        """
+        category_stats = self.stats("category")
+
+        if not os.path.exists("results"):
+            os.makedirs("results")
+
+        if "/" in model_name:
+            model_name = model_name.split('/')[1]
+
+        with open(f"results/results_{model_name}_{prompt_style}.json", "w") as file:
+            json.dump(category_stats, file, indent=4)
+
+        with open(f"results/results_{model_name}_{prompt_style}_breakdown.json", "w") as file:
+            json.dump({"calculator": self.stats("calculator"), "note type": self.stats("note type")}, file, indent=4)
+
+        return category_stats
+
+    def to_dict(self):
+        return {"counts": self.counts, "correct": self.correct, "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregator = cls()
+        aggregator.counts = {group: {name: list(counts) for name, counts in names.items()} for group, names in data["counts"].items()}
+        aggregator.correct = data["correct"]
+        aggregator.total = data["total"]
+        return aggregator
+
+    def save(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
+
+    @classmethod
+    def from_file(cls, output_file):
+        # aggregator over the records already in an outputs JSONL (empty if it does not exist yet)
+        aggregator = cls()
+
+        if os.path.exists(output_file):
+            with open(output_file) as file:
+                for line in file:
+                    aggregator.update(json.loads(line))
+
+        return aggregator
 
 
 def compute_overall_accuracy(output_path, model_name, prompt_style): 
-    category_accuracy = {}
-
-    with open(f"outputs/{output_path}") as file:
-        for line in file:
-            data = json.loads(line)
-            
-            category = data["Category"]
-
-            if category not in category_accuracy:
-                category_accuracy[category] = []
-
-            if data["Result"] == "Correct":
-                category_accuracy[category].append(1)
-            else:
-                category_accuracy[category].append(0)
-
-    # Compute average and standard deviation for each category
-    category_stats = {}
-    all_results = []
-
-    for cat, results in category_accuracy.items():
-        results_array = np.array(results)
-        category_mean = np.mean(results_array)
-        category_std = round(np.sqrt(category_mean * (1-category_mean) / len(results_array)), 2)
-        category_stats[cat] = {
-            "average": round(category_mean * 100, 2),
-            "std": category_std
+    aggregator = AccuracyAggregator.from_file(f"outputs/{output_path}")
+    return aggregator.write_results(model_name, prompt_style)
+
+
+def load_correctness(output_files):
+    """
+    Reads outputs JSONL files and aligns their records on (Calculator ID, Note ID). Returns the keys present
+    in every file (in the order of the first file), their categories, and a rows x files array that is 1.0
+    where the file's record is correct.
+    """
+    records = []
+
+    for output_file in output_files:
+        results = {}
+        with open(output_file) as file:
+            for line in file:
+                record = json.loads(line)
+                results[(str(record["Calculator ID"]), str(record["Note ID"]))] = (record["Category"], record["Result"] == "Correct")
+        records.append(results)
+
+    keys = [key for key in records[0] if all(key in results for results in records[1:])]
+    categories = np.array([records[0][key][0] for key in keys])
+    correct = np.array([[results[key][1] for results in records] for key in keys], dtype=np.float64).reshape(len(keys), len(records))
+
+    return keys, categories, correct
+
+
+def bootstrap_means(values, n_resamples=10000, seed=0, chunk_size=1000):
+    """
+    Bootstrap distribution of the column means of values (rows x ...; e.g. rows x models x prompt styles).
+    Each resample is drawn as multinomial row counts, so a chunk of resamples is one matrix product instead
+    of a Python loop; returns an array of shape (n_resamples, ...).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rows = values.shape[0]
+    flat = values.reshape(rows, -1)
+    rng = np.random.default_rng(seed)
+    means = np.empty((n_resamples, flat.shape[1]))
+
+    for start in range(0, n_resamples, chunk_size):
+        size = min(chunk_size, n_resamples - start)
+        counts = rng.multinomial(rows, np.full(rows, 1 / rows), size=size)
+        means[start:start + size] = counts @ flat / rows
+
+    return means.reshape((n_resamples,) + values.shape[1:])
+
+
+def percentile_interval(samples, confidence=0.95):
+    alpha = (1 - confidence) / 2
+    return np.percentile(samples, [alpha * 100, (1 - alpha) * 100], axis=0)
+
+
+def bootstrap_accuracy(correct, categories, n_resamples=10000, confidence=0.95, seed=0):
+    """
+    Accuracy with percentile bootstrap confidence intervals per category and overall. correct is a
+    rows x ... correctness array; categories gives the category of each row, and each category is resampled
+    on its own rows. Returns {category: {"average", "lower", "upper"}} in percent, each with the trailing
+    shape of correct.
+    """
+    correct = np.asarray(correct, dtype=np.float64)
+    categories = np.asarray(categories)
+    groups = {category: categories == category for category in dict.fromkeys(categories)}
+    groups["overall"] = np.ones(len(categories), dtype=bool)
+    stats = {}
+
+    for offset, (category, mask) in enumerate(groups.items()):
+        samples = bootstrap_means(correct[mask], n_resamples, seed + offset)
+        lower, upper = percentile_interval(samples, confidence)
+        stats[category] = {
+            "average": np.round(correct[mask].mean(axis=0) * 100, 2),
+            "lower": np.round(lower * 100, 2),
+            "upper": np.round(upper * 100, 2)
         }
-        all_results.extend(results)
 
-    # Compute overall average and standard deviation
-    all_results_array = np.array(all_results)
-    overall_average = np.mean(all_results_array)
-    overall_std =  round(np.sqrt(overall_average * (1-overall_average) / 1047), 2)
+    return stats
 
-    category_stats["overall"] = {
-        "average": round(overall_average * 100, 2),
-        "std": overall_std
-    }
 
-    if not os.path.exists("results"):
-        os.makedirs("results")
+def paired_comparison(output_file_a, output_file_b, n_resamples=10000, confidence=0.95, seed=0):
+    """
+    Paired bootstrap of the accuracy difference (a - b) between two outputs files on the rows they share,
+    per category and overall. The p-value is two-sided: twice the share of resampled differences on the
+    other side of zero, capped at 1.
+    """
+    _, categories, correct = load_correctness([output_file_a, output_file_b])
+    differences = correct[:, 0] - correct[:, 1]
+    groups = {category: categories == category for category in dict.fromkeys(categories)}
+    groups["overall"] = np.ones(len(categories), dtype=bool)
+    comparison = {}
+
+    for offset, (category, mask) in enumerate(groups.items()):
+        samples = bootstrap_means(differences[mask], n_resamples, seed + offset)
+        lower, upper = percentile_interval(samples, confidence)
+        p_value = min(1.0, 2 * min(np.mean(samples <= 0), np.mean(samples >= 0)))
+        comparison[category] = {
+            "rows": int(mask.sum()),
+            "difference": round(float(differences[mask].mean()) * 100, 2),
+            "lower": round(float(lower) * 100, 2),
+            "upper": round(float(upper) * 100, 2),
+            "p_value": round(float(p_value), 4)
+        }
+
+    return comparison
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Bootstrap confidence intervals of the accuracy of outputs files, or a paired comparison of two of them')
+    parser.add_argument('--outputs', type=str, nargs='+', help='Files in outputs/ to compute confidence intervals for, e.g. OpenAI_gpt-4_zero_shot.jsonl')
+    parser.add_argument('--compare', type=str, nargs=2, default=None, help='Two files in outputs/ to compare on the (Calculator ID, Note ID) rows they share.')
+    parser.add_argument('--resamples', type=int, default=10000, help='Number of bootstrap resamples.')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the intervals.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the resampling.')
 
-    if "/" in model_name:
-        model_name = model_name.split('/')[1]
+    args = parser.parse_args()
 
-    with open(f"results/results_{model_name}_{prompt_style}.json", "w") as file:
-        json.dump(category_stats, file, indent=4)
+    if args.compare is not None:
+        comparison = paired_comparison(f"outputs/{args.compare[0]}", f"outputs/{args.compare[1]}", args.resamples, args.confidence, args.seed)
+        print(json.dumps(comparison, indent=4))
 
-    return category_stats
+    if args.outputs:
+        # the files are stacked as columns of one matrix over the rows they share and resampled together
+        _, categories, correct = load_correctness([f"outputs/{output_file}" for output_file in args.outputs])
+        stats = bootstrap_accuracy(correct, categories, args.resamples, args.confidence, args.seed)
 
+        for index, output_file in enumerate(args.outputs):
+            print(output_file)
+            print(json.dumps({category: {key: float(value[index]) for key, value in values.items()} for category, values in stats.items()}, indent=4))
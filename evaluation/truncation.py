@@ -0,0 +1,34 @@
+import hashlib
+
+
+class TextTruncator:
+    """
+    Shortens texts to their first max_tokens tokens (encode, cut, decode), as done for the pmc_llama notes and
+    the pmc_llama/meditron one-shot examples. Each distinct (text, max_tokens) pair is tokenized once; results
+    are cached under a hash of the text, and truncate_many tokenizes all uncached texts in one batched call.
+    """
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.truncated = {}
+
+    def key(self, text, max_tokens):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest(), max_tokens
+
+    def truncate_many(self, texts, max_tokens):
+        keys = [self.key(text, max_tokens) for text in texts]
+        missing = {}
+
+        for key, text in zip(keys, texts):
+            if key not in self.truncated:
+                missing[key] = text
+
+        if missing:
+            input_ids = self.tokenizer(list(missing.values()), add_special_tokens=False)["input_ids"]
+            truncated = self.tokenizer.batch_decode([ids[:max_tokens] for ids in input_ids])
+            self.truncated.update(zip(missing.keys(), truncated))
+
+        return [self.truncated[key] for key in keys]
+
+    def truncate(self, text, max_tokens):
+        return self.truncate_many([text], max_tokens)[0]